@@ -0,0 +1,149 @@
+"""
+Streaming NDJSON export for Study Assistant
+Writes sessions, generations and quiz results as one JSON object per line
+"""
+
+import gzip
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+from database import EPOCH_MIGRATION, DatabaseManager
+
+# Tables exported, in order, and the record type written for their rows
+EXPORT_TABLES = [('sessions', 'session'), ('generations', 'generation'), ('quiz_results', 'quiz_result')]
+
+
+def to_epoch(value: Optional[str]) -> Optional[int]:
+    """Convert an ISO date/timestamp (naive means UTC) to epoch seconds"""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def export_state_path(output_path: str) -> str:
+    """Get the path of the resume state file kept next to an export"""
+    return f"{output_path}.state.json"
+
+
+def _load_state(state_path: str, start: Optional[str], end: Optional[str],
+                compress: bool, shard_count: int) -> Optional[Dict[str, Any]]:
+    """Load resume state, if it belongs to an export with the same parameters"""
+    if not os.path.exists(state_path):
+        return None
+    with open(state_path, 'r', encoding='utf-8') as f:
+        state = json.load(f)
+    if (state.get('start'), state.get('end'), state.get('gzip')) != (start, end, compress):
+        return None
+    if state.get('shards', 1) != shard_count or 'after' not in state:
+        return None
+    return state
+
+
+def _save_state(state_path: str, state: Dict[str, Any]):
+    """Write resume state atomically"""
+    tmp_path = f"{state_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, state_path)
+
+
+def export_activity_ndjson(db: DatabaseManager, output_path: str, start: Optional[str] = None,
+                           end: Optional[str] = None, compress: bool = False, resume: bool = True,
+                           chunk_size: int = 1000,
+                           progress_callback: Optional[Callable[[str, int], None]] = None) -> Dict[str, int]:
+    """
+    Export activity in a date range as NDJSON, optionally gzip-compressed
+
+    Each line is a JSON object with a "type" of session, generation or
+    quiz_result plus the row's fields (generations include their summary and
+    quiz text). Rows are read in keyset-paginated chunks and each chunk is
+    written and flushed before the next is read, so memory use doesn't
+    depend on the size of the export.
+
+    After every chunk the output's byte offset and the (timestamp, key)
+    cursor of the last exported row are saved to <output>.state.json. An interrupted export started again
+    with resume=True truncates the file to that offset and carries on from
+    the saved row. With compression every chunk is its own gzip member, so
+    the resumed file is still one valid gzip stream.
+
+    A sharded database is exported shard by shard within each table, so
+    records of one type stay together; the state also records the shard.
+
+    Args:
+        db: Database to export
+        output_path: NDJSON file to write
+        start: Inclusive ISO date/timestamp lower bound (UTC if naive)
+        end: Exclusive ISO date/timestamp upper bound (UTC if naive)
+        compress: gzip-compress the output
+        resume: Continue a matching interrupted export instead of starting over
+        chunk_size: Rows per chunk
+        progress_callback: Called with (table, rows exported so far) after each chunk
+
+    Returns:
+        dict: Number of rows exported per table (including earlier runs when resuming)
+
+    Raises:
+        RuntimeError: The epoch columns the export reads by are still being backfilled
+    """
+    state_path = export_state_path(output_path)
+    shards = db.shards
+    for shard in shards:
+        if any(version == EPOCH_MIGRATION for version, _, _ in shard.get_pending_backfills()):
+            raise RuntimeError(f"{shard.db_path} is still being migrated; run 'manage_db.py migrate' first")
+    state = _load_state(state_path, start, end, compress, len(shards)) if resume else None
+    if state is None:
+        state = {
+            'start': start,
+            'end': end,
+            'gzip': compress,
+            'shards': len(shards),
+            'table_index': 0,
+            'shard_index': 0,
+            'after': None,
+            'offset': 0,
+            'counts': {table: 0 for table, _ in EXPORT_TABLES}
+        }
+
+    start_epoch, end_epoch = to_epoch(start), to_epoch(end)
+    mode = 'r+b' if state['offset'] and os.path.exists(output_path) else 'wb'
+
+    with open(output_path, mode) as output:
+        # Drop anything written after the last saved chunk
+        output.seek(state['offset'])
+        output.truncate()
+
+        steps = [(t, s) for t in range(len(EXPORT_TABLES)) for s in range(len(shards))]
+        for table_index, shard_index in steps[steps.index((state['table_index'], state['shard_index'])):]:
+            table, record_type = EXPORT_TABLES[table_index]
+            if (table_index, shard_index) != (state['table_index'], state['shard_index']):
+                state['table_index'] = table_index
+                state['shard_index'] = shard_index
+                state['after'] = None
+
+            chunks = shards[shard_index].iter_activity_chunks(table, start_epoch, end_epoch,
+                                                              after=state['after'], chunk_size=chunk_size)
+            for after, records in chunks:
+                lines = ''.join(
+                    json.dumps({'type': record_type, **record}, ensure_ascii=False) + '\n'
+                    for record in records
+                ).encode('utf-8')
+                output.write(gzip.compress(lines) if compress else lines)
+                output.flush()
+                os.fsync(output.fileno())
+
+                state['after'] = after
+                state['offset'] = output.tell()
+                state['counts'][table] += len(records)
+                _save_state(state_path, state)
+                if progress_callback:
+                    progress_callback(table, state['counts'][table])
+
+    # Finished: nothing left to resume
+    if os.path.exists(state_path):
+        os.remove(state_path)
+    return state['counts']
@@ -1,18 +1,11 @@
 import streamlit as st
 import PyPDF2
-from io import BytesIO
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 import os
 import re
 from typing import Dict, List
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.enums import TA_LEFT, TA_JUSTIFY
-from reportlab.lib.colors import HexColor
 from datetime import datetime
 
 # Load environment variables from .env file
@@ -24,8 +17,25 @@ except ImportError:
     pass
 
 # Import database and session tracking
-from database import DatabaseManager
+from sharding import open_database
 from session_utils import get_session_id, get_client_ip, get_user_agent
+from export_cache import export_cache, make_export_key
+from quiz_parser import parse_quiz_data
+from pdf_renderer import render_report_pdf
+from quiz_report import QuizReport, build_text_report
+from database import run_scheduled_backfills
+from retention import run_scheduled_maintenance
+from rollups import run_scheduled_rollups
+
+# Fragments (Streamlit >= 1.37) rerun only the decorated function on widget
+# interaction; fall back to a plain function (full-script rerun) on older versions
+if hasattr(st, 'fragment'):
+    fragment = st.fragment
+elif hasattr(st, 'experimental_fragment'):
+    fragment = st.experimental_fragment
+else:
+    def fragment(func):
+        return func
 
 # Page configuration
 st.set_page_config(
@@ -143,64 +153,15 @@ def parse_and_display_summary(summary: str):
     st.markdown('</div>', unsafe_allow_html=True)
 
 
-def parse_quiz_data(quiz: str) -> list:
-    """
-    Parse quiz string into structured data
-    
-    Returns:
-        list: List of dicts with question data
-    """
-    questions_data = []
-    
-    # Split questions by "Question" keyword
-    questions = re.split(r'Question\s+\d+:', quiz)
-    questions = [q.strip() for q in questions if q.strip()]
-    
-    for i, question_block in enumerate(questions, 1):
-        lines = question_block.strip().split('\n')
-        
-        question_text = ""
-        options = {}
-        answer_key = ""
-        answer_text = ""
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            
-            # Check if it's an option
-            option_match = re.match(r'^([a-d])\)\s*(.+)', line, re.IGNORECASE)
-            if option_match:
-                key = option_match.group(1).lower()
-                text = option_match.group(2).strip()
-                options[key] = text
-            # Check if it's the answer line
-            elif re.match(r'^Answer:', line, re.IGNORECASE):
-                answer_full = re.sub(r'^Answer:\s*', '', line, flags=re.IGNORECASE)
-                # Extract answer key (a, b, c, or d)
-                answer_match = re.match(r'^([a-d])\)', answer_full, re.IGNORECASE)
-                if answer_match:
-                    answer_key = answer_match.group(1).lower()
-                    answer_text = answer_full
-            # Otherwise, it's part of the question
-            elif not options and not answer_key:
-                question_text += " " + line
-        
-        questions_data.append({
-            'id': i,
-            'question': question_text.strip(),
-            'options': options,
-            'answer_key': answer_key,
-            'answer_text': answer_text
-        })
-    
-    return questions_data
-
-
+@fragment
 def display_interactive_quiz(quiz: str):
     """
     Display quiz in interactive mode where users can select answers
+
+    Runs as a fragment: selecting an answer reruns only this function, so the
+    database heartbeat, PDF extraction and download payloads in main() are not
+    rebuilt on every click. Actions that change the rest of the page (mode
+    switch, submit, retake) trigger a full rerun with st.rerun().
     """
     st.markdown('<div class="quiz-box">', unsafe_allow_html=True)
     
@@ -279,10 +240,10 @@ def display_interactive_quiz(quiz: str):
                     # Log quiz result to database
                     if st.session_state.generation_id:
                         try:
-                            from database import DatabaseManager
+                            from sharding import open_database
                             from session_utils import get_session_id
                             
-                            db = DatabaseManager()
+                            db = open_database(write_behind=True)
                             session_id = get_session_id()
                             
                             # Calculate results
@@ -300,7 +261,8 @@ def display_interactive_quiz(quiz: str):
                                 score=correct_count,
                                 total_questions=total_count,
                                 answered_count=answered_count,
-                                user_answers=st.session_state.user_answers
+                                user_answers=st.session_state.user_answers,
+                                answer_key={q_data['id']: q_data['answer_key'] for q_data in questions_data}
                             )
                         except Exception as e:
                             # Don't fail if logging fails
@@ -414,414 +376,6 @@ def parse_and_display_quiz(quiz: str):
     st.markdown('</div>', unsafe_allow_html=True)
 
 
-def generate_pdf(summary: str, quiz: str) -> BytesIO:
-    """
-    Generate a formatted PDF with summary and quiz questions
-    
-    Args:
-        summary: Summary text
-        quiz: Quiz questions text
-        
-    Returns:
-        BytesIO: PDF file in memory
-    """
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=letter,
-        rightMargin=72,
-        leftMargin=72,
-        topMargin=72,
-        bottomMargin=18,
-    )
-    
-    # Container for the PDF elements
-    elements = []
-    
-    # Define styles
-    styles = getSampleStyleSheet()
-    
-    # Custom styles
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=HexColor('#1E88E5'),
-        spaceAfter=20,
-        spaceBefore=10,
-        alignment=TA_LEFT,
-        fontName='Helvetica-Bold'
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=16,
-        textColor=HexColor('#1565C0'),
-        spaceAfter=12,
-        spaceBefore=12,
-        fontName='Helvetica-Bold'
-    )
-    
-    body_style = ParagraphStyle(
-        'CustomBody',
-        parent=styles['BodyText'],
-        fontSize=11,
-        alignment=TA_JUSTIFY,
-        spaceAfter=8,
-        leading=16
-    )
-    
-    question_style = ParagraphStyle(
-        'QuestionStyle',
-        parent=styles['BodyText'],
-        fontSize=12,
-        fontName='Helvetica-Bold',
-        spaceAfter=8,
-        spaceBefore=10
-    )
-    
-    option_style = ParagraphStyle(
-        'OptionStyle',
-        parent=styles['BodyText'],
-        fontSize=11,
-        leftIndent=20,
-        spaceAfter=4
-    )
-    
-    answer_style = ParagraphStyle(
-        'AnswerStyle',
-        parent=styles['BodyText'],
-        fontSize=11,
-        textColor=HexColor('#28a745'),
-        fontName='Helvetica-Bold',
-        leftIndent=20,
-        spaceAfter=6,
-        spaceBefore=6
-    )
-    
-    # Add title
-    elements.append(Paragraph("📚 Study Assistant - Quiz Generator", title_style))
-    elements.append(Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M')}", styles['Normal']))
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Add summary section
-    elements.append(Paragraph("📋 Summary", heading_style))
-    elements.append(Spacer(1, 0.1*inch))
-    
-    # Process summary lines
-    summary_lines = summary.strip().split('\n')
-    for line in summary_lines:
-        line = line.strip()
-        if line:
-            # Remove markdown bold syntax for PDF
-            line = re.sub(r'\*\*([^*]+)\*\*', r'<b>\1</b>', line)
-            # Handle headers
-            if line.startswith('###'):
-                line = re.sub(r'^###\s*', '', line)
-                elements.append(Paragraph(line, heading_style))
-            elif line.startswith('##'):
-                line = re.sub(r'^##\s*', '', line)
-                elements.append(Paragraph(line, heading_style))
-            else:
-                # Add bullet point if not present
-                if not re.match(r'^[-•*]', line):
-                    line = '• ' + line
-                elements.append(Paragraph(line, body_style))
-    
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Add quiz section
-    elements.append(Paragraph("📝 Quiz Questions", heading_style))
-    elements.append(Spacer(1, 0.1*inch))
-    
-    # Parse quiz questions
-    questions = re.split(r'Question\s+\d+:', quiz)
-    questions = [q.strip() for q in questions if q.strip()]
-    
-    for i, question_block in enumerate(questions, 1):
-        lines = question_block.strip().split('\n')
-        
-        question_text = ""
-        options = []
-        answer = ""
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-                
-            if re.match(r'^[a-d]\)', line, re.IGNORECASE):
-                options.append(line)
-            elif re.match(r'^Answer:', line, re.IGNORECASE):
-                answer = re.sub(r'^Answer:\s*', '', line, flags=re.IGNORECASE)
-            elif not options and not answer:
-                question_text += " " + line
-        
-        # Add question
-        elements.append(Paragraph(f"<b>Question {i}:</b> {question_text.strip()}", question_style))
-        
-        # Add options
-        for option in options:
-            elements.append(Paragraph(option, option_style))
-        
-        # Add answer
-        if answer:
-            elements.append(Paragraph(f"✓ Answer: {answer}", answer_style))
-        
-        elements.append(Spacer(1, 0.2*inch))
-    
-    # Add footer
-    elements.append(Spacer(1, 0.3*inch))
-    footer_text = "Generated with Study Assistant | Built with Streamlit, LangChain, and OpenAI"
-    elements.append(Paragraph(footer_text, styles['Normal']))
-    
-    # Build PDF
-    doc.build(elements)
-    buffer.seek(0)
-    return buffer
-
-
-def generate_pdf_with_results(summary: str, quiz: str, user_answers: dict = None) -> BytesIO:
-    """
-    Generate a formatted PDF with summary, quiz questions, and user results
-    
-    Args:
-        summary: Summary text
-        quiz: Quiz questions text
-        user_answers: Dict of user answers {question_id: answer_key}
-        
-    Returns:
-        BytesIO: PDF file in memory
-    """
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=letter,
-        rightMargin=72,
-        leftMargin=72,
-        topMargin=72,
-        bottomMargin=18,
-    )
-    
-    # Container for the PDF elements
-    elements = []
-    
-    # Define styles
-    styles = getSampleStyleSheet()
-    
-    # Custom styles
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=HexColor('#1E88E5'),
-        spaceAfter=20,
-        spaceBefore=10,
-        alignment=TA_LEFT,
-        fontName='Helvetica-Bold'
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=16,
-        textColor=HexColor('#1565C0'),
-        spaceAfter=12,
-        spaceBefore=12,
-        fontName='Helvetica-Bold'
-    )
-    
-    body_style = ParagraphStyle(
-        'CustomBody',
-        parent=styles['BodyText'],
-        fontSize=11,
-        alignment=TA_JUSTIFY,
-        spaceAfter=8,
-        leading=16
-    )
-    
-    question_style = ParagraphStyle(
-        'QuestionStyle',
-        parent=styles['BodyText'],
-        fontSize=12,
-        fontName='Helvetica-Bold',
-        spaceAfter=8,
-        spaceBefore=10
-    )
-    
-    option_style = ParagraphStyle(
-        'OptionStyle',
-        parent=styles['BodyText'],
-        fontSize=11,
-        leftIndent=20,
-        spaceAfter=4
-    )
-    
-    answer_style = ParagraphStyle(
-        'AnswerStyle',
-        parent=styles['BodyText'],
-        fontSize=11,
-        textColor=HexColor('#28a745'),
-        fontName='Helvetica-Bold',
-        leftIndent=20,
-        spaceAfter=6,
-        spaceBefore=6
-    )
-    
-    incorrect_style = ParagraphStyle(
-        'IncorrectStyle',
-        parent=styles['BodyText'],
-        fontSize=11,
-        textColor=HexColor('#dc3545'),
-        fontName='Helvetica-Bold',
-        leftIndent=20,
-        spaceAfter=6,
-        spaceBefore=6
-    )
-    
-    # Add title
-    elements.append(Paragraph("📚 Study Assistant - Quiz Generator", title_style))
-    elements.append(Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M')}", styles['Normal']))
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Add summary section
-    elements.append(Paragraph("📋 Summary", heading_style))
-    elements.append(Spacer(1, 0.1*inch))
-    
-    # Process summary lines
-    summary_lines = summary.strip().split('\n')
-    for line in summary_lines:
-        line = line.strip()
-        if line:
-            line = re.sub(r'\*\*([^*]+)\*\*', r'<b>\1</b>', line)
-            if line.startswith('###'):
-                line = re.sub(r'^###\s*', '', line)
-                elements.append(Paragraph(line, heading_style))
-            elif line.startswith('##'):
-                line = re.sub(r'^##\s*', '', line)
-                elements.append(Paragraph(line, heading_style))
-            else:
-                if not re.match(r'^[-•*]', line):
-                    line = '• ' + line
-                elements.append(Paragraph(line, body_style))
-    
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Parse quiz questions
-    questions_data = parse_quiz_data(quiz)
-    
-    # Add Quiz Results Summary Box if available (before quiz questions)
-    if user_answers:
-        correct_count = sum(
-            1 for q in questions_data
-            if user_answers.get(q['id']) == q['answer_key']
-        )
-        total_count = len(questions_data)
-        answered_count = len(user_answers)
-        percentage = (correct_count / total_count * 100) if total_count > 0 else 0
-        
-        # Determine grade
-        if percentage >= 80:
-            grade = "🌟 Excellent"
-            grade_color = HexColor('#28a745')
-        elif percentage >= 60:
-            grade = "👍 Good"
-            grade_color = HexColor('#17a2b8')
-        else:
-            grade = "📚 Keep Learning"
-            grade_color = HexColor('#ffc107')
-        
-        # Results heading style
-        results_heading_style = ParagraphStyle(
-            'ResultsHeading',
-            parent=styles['Heading1'],
-            fontSize=20,
-            textColor=HexColor('#dc3545'),
-            spaceAfter=15,
-            spaceBefore=10,
-            fontName='Helvetica-Bold'
-        )
-        
-        results_box_style = ParagraphStyle(
-            'ResultsBox',
-            parent=styles['BodyText'],
-            fontSize=13,
-            fontName='Helvetica-Bold',
-            spaceAfter=6,
-            leading=20
-        )
-        
-        grade_style = ParagraphStyle(
-            'GradeStyle',
-            parent=styles['BodyText'],
-            fontSize=14,
-            textColor=grade_color,
-            fontName='Helvetica-Bold',
-            spaceAfter=8,
-            spaceBefore=4
-        )
-        
-        # Add prominent results section
-        elements.append(Paragraph("📊 QUIZ RESULTS", results_heading_style))
-        elements.append(Spacer(1, 0.05*inch))
-        elements.append(Paragraph("="*70, styles['Code']))
-        elements.append(Spacer(1, 0.1*inch))
-        
-        elements.append(Paragraph("<b>PERFORMANCE SUMMARY:</b>", results_box_style))
-        elements.append(Paragraph(f"Score: <font color='#1E88E5'><b>{correct_count}/{total_count}</b></font> questions correct", results_box_style))
-        elements.append(Paragraph(f"Percentage: <font color='#1E88E5'><b>{percentage:.1f}%</b></font>", results_box_style))
-        elements.append(Paragraph(f"Answered: {answered_count}/{total_count} questions", results_box_style))
-        elements.append(Paragraph(f"Grade: {grade}", grade_style))
-        
-        elements.append(Spacer(1, 0.1*inch))
-        elements.append(Paragraph("="*70, styles['Code']))
-        elements.append(Spacer(1, 0.3*inch))
-    
-    # Add quiz section
-    elements.append(Paragraph("📝 Quiz Questions & Answers", heading_style))
-    elements.append(Spacer(1, 0.1*inch))
-    
-    for q in questions_data:
-        # Add question
-        elements.append(Paragraph(f"<b>Question {q['id']}:</b> {q['question']}", question_style))
-        
-        # Add options
-        for key in sorted(q['options'].keys()):
-            option_text = f"{key}) {q['options'][key]}"
-            # Highlight user's answer if provided
-            if user_answers and user_answers.get(q['id']) == key:
-                option_text = f"<b>[YOUR ANSWER]</b> {option_text}"
-            elements.append(Paragraph(option_text, option_style))
-        
-        # Add correct answer and status
-        if user_answers:
-            user_answer = user_answers.get(q['id'])
-            is_correct = user_answer == q['answer_key']
-            
-            if is_correct:
-                elements.append(Paragraph(f"✅ CORRECT - Answer: {q['answer_text']}", answer_style))
-            else:
-                if user_answer:
-                    elements.append(Paragraph(f"❌ INCORRECT - Correct answer: {q['answer_text']}", incorrect_style))
-                else:
-                    elements.append(Paragraph(f"⚠️ NOT ANSWERED - Correct answer: {q['answer_text']}", answer_style))
-        else:
-            elements.append(Paragraph(f"✓ Answer: {q['answer_text']}", answer_style))
-        
-        elements.append(Spacer(1, 0.2*inch))
-    
-    # Add footer
-    elements.append(Spacer(1, 0.3*inch))
-    footer_text = "Generated with Study Assistant | Built with Streamlit, LangChain, and OpenAI"
-    elements.append(Paragraph(footer_text, styles['Normal']))
-    
-    # Build PDF
-    doc.build(elements)
-    buffer.seek(0)
-    return buffer
-
-
 def extract_text_from_pdf(pdf_file) -> str:
     """
     Extract text content from uploaded PDF file using PyPDF2
@@ -996,11 +550,49 @@ d) The number of users accessing the model
 Answer: b) The amount of text a model can process at once"""
 
 
+def show_export_download(kind: str, builder, user_answers: dict, prepare_label: str,
+                         download_label: str, file_name: str, mime: str):
+    """
+    Show a download button for an export that is rendered lazily
+    
+    The payload is looked up in the process-wide export cache by
+    (summary, quiz, answers) hash and date; on a miss a prepare button is
+    shown and the export is only built once it is clicked. A cached
+    report keeps the "generated" time of its first rendering that day.
+    """
+    key = make_export_key(kind, st.session_state.summary, st.session_state.quiz, user_answers)
+    payload = export_cache.get(key)
+    
+    if payload is None and st.button(prepare_label, key=f"prepare_{kind}", use_container_width=True):
+        try:
+            with st.spinner("Preparing download..."):
+                payload = export_cache.get_or_build(key, builder)
+        except Exception as e:
+            st.error(f"Error generating {kind.upper()}: {str(e)}")
+    
+    if payload is not None:
+        st.download_button(
+            label=download_label,
+            data=payload,
+            file_name=file_name,
+            mime=mime,
+            use_container_width=True
+        )
+
+
 def main():
     """Main application function"""
     
-    # Initialize database
-    db = DatabaseManager()
+    # Initialize database; activity logging is queued to a background
+    # writer so the UI never waits on SQLite
+    db = open_database(write_behind=True)
+    
+    # Migration backfills, retention and compaction run in the background,
+    # dashboard rollups every few minutes (per shard database file)
+    for shard in db.shards:
+        run_scheduled_backfills(shard.db_path)
+        run_scheduled_maintenance(shard.db_path)
+        run_scheduled_rollups(shard.db_path)
     
     # Get session info
     session_id = get_session_id()
@@ -1297,118 +889,38 @@ def main():
         
         col_a, col_b = st.columns(2)
         
+        # Exports are built only when requested and cached by content, so
+        # idle reruns cost nothing and repeat downloads are instant
+        user_answers = st.session_state.user_answers if st.session_state.quiz_submitted else None
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        
         with col_a:
             # Text download with quiz results
-            quiz_results_text = ""
-            if st.session_state.quiz_submitted and st.session_state.user_answers:
-                questions_data = parse_quiz_data(st.session_state.quiz)
-                correct_count = sum(
-                    1 for q in questions_data
-                    if st.session_state.user_answers.get(q['id']) == q['answer_key']
-                )
-                total_count = len(questions_data)
-                answered_count = len(st.session_state.user_answers)
-                percentage = (correct_count / total_count * 100) if total_count > 0 else 0
-                
-                # Grade determination
-                if percentage >= 80:
-                    grade = "🌟 Excellent"
-                elif percentage >= 60:
-                    grade = "👍 Good"
-                else:
-                    grade = "📚 Keep Learning"
-                
-                quiz_results_text = f"""
-
-{'='*70}
-                           📊 QUIZ RESULTS
-{'='*70}
-
-PERFORMANCE SUMMARY:
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-  Score:           {correct_count}/{total_count} questions correct
-  Percentage:      {percentage:.1f}%
-  Answered:        {answered_count}/{total_count} questions
-  Grade:           {grade}
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-DETAILED ANSWER REVIEW:
-{'='*70}
-"""
-                for q in questions_data:
-                    user_answer = st.session_state.user_answers.get(q['id'])
-                    is_correct = user_answer == q['answer_key']
-                    
-                    if is_correct:
-                        status = "✅ CORRECT"
-                        status_line = "━" * 70
-                    elif user_answer:
-                        status = "❌ INCORRECT"
-                        status_line = "━" * 70
-                    else:
-                        status = "⚠️  NOT ANSWERED"
-                        status_line = "━" * 70
-                    
-                    user_answer_text = f"{user_answer.upper()}) {q['options'].get(user_answer, 'N/A')}" if user_answer else "Not answered"
-                    
-                    quiz_results_text += f"""
-Question {q['id']}: {q['question']}
-{status_line}
-  Your Answer:     {user_answer_text}
-  Correct Answer:  {q['answer_text']}
-  Status:          {status}
-{'='*70}
-
-"""
-            
-            download_content = f"""╔══════════════════════════════════════════════════════════════════════╗
-║              STUDY ASSISTANT - QUIZ GENERATOR                        ║
-╚══════════════════════════════════════════════════════════════════════╝
-
-{'='*70}
-                              📋 SUMMARY
-{'='*70}
-
-{st.session_state.summary}
-
-{'='*70}
-                          📝 QUIZ QUESTIONS
-{'='*70}
-
-{st.session_state.quiz}
-{quiz_results_text}
-{'='*70}
-
-Generated using Study Assistant
-Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
-{'='*70}
-"""
-            st.download_button(
-                label="📄 Download as Text",
-                data=download_content,
-                file_name=f"study_quiz_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
-                mime="text/plain",
-                use_container_width=True
+            show_export_download(
+                kind='txt',
+                builder=lambda: build_text_report(
+                    QuizReport.build(st.session_state.summary, st.session_state.quiz, user_answers)
+                ).encode('utf-8'),
+                user_answers=user_answers,
+                prepare_label="📄 Prepare Text",
+                download_label="📄 Download as Text",
+                file_name=f"study_quiz_{timestamp}.txt",
+                mime="text/plain"
             )
         
         with col_b:
             # PDF download with quiz results
-            try:
-                pdf_buffer = generate_pdf_with_results(
-                    st.session_state.summary,
-                    st.session_state.quiz,
-                    st.session_state.user_answers if st.session_state.quiz_submitted else None
-                )
-                st.download_button(
-                    label="📕 Download as PDF",
-                    data=pdf_buffer,
-                    file_name=f"study_quiz_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
-                    mime="application/pdf",
-                    use_container_width=True
-                )
-            except Exception as e:
-                st.error(f"Error generating PDF: {str(e)}")
+            show_export_download(
+                kind='pdf',
+                builder=lambda: render_report_pdf(
+                    QuizReport.build(st.session_state.summary, st.session_state.quiz, user_answers)
+                ),
+                user_answers=user_answers,
+                prepare_label="📕 Prepare PDF",
+                download_label="📕 Download as PDF",
+                file_name=f"study_quiz_{timestamp}.pdf",
+                mime="application/pdf"
+            )
     
     # Footer
     st.markdown("---")
@@ -0,0 +1,120 @@
+"""
+Bulk export for Study Assistant
+Renders stored generations to PDFs in worker processes and streams them into a ZIP
+"""
+
+import csv
+import io
+import multiprocessing
+import os
+import re
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from database import DatabaseManager
+from pdf_renderer import render_pdf, QUIZ_HEADING
+
+SAFE_NAME_PATTERN = re.compile(r'[^A-Za-z0-9._-]+')
+
+MANIFEST_FIELDS = ['generation_id', 'session_id', 'timestamp', 'file_name', 'model_used', 'pdf_path']
+
+
+def generation_archive_name(generation: Dict[str, Any]) -> str:
+    """Get the path of a generation's PDF inside the export ZIP"""
+    stem = f"generation_{generation['id']}"
+    if generation.get('file_name'):
+        source = SAFE_NAME_PATTERN.sub('_', os.path.splitext(generation['file_name'])[0]).strip('_')
+        if source:
+            stem = f"{stem}_{source[:60]}"
+    return f"{generation['session_id'][:8]}/{stem}.pdf"
+
+
+def render_generation_pdf(generation: Dict[str, Any]) -> Tuple[str, bytes]:
+    """
+    Render one generation to PDF (runs inside a worker process)
+
+    Returns:
+        tuple: (archive path, PDF bytes)
+    """
+    pdf_bytes = render_pdf(
+        generation['summary'],
+        generation['quiz'],
+        quiz_heading=QUIZ_HEADING,
+        generated_on=generation['timestamp'][:16].replace('T', ' ')
+    )
+    return generation_archive_name(generation), pdf_bytes
+
+
+def export_generations_zip(db: DatabaseManager, output, start: Optional[str] = None,
+                           end: Optional[str] = None, session_ids: Optional[List[str]] = None,
+                           max_workers: Optional[int] = None,
+                           progress_callback: Optional[Callable[[int, int], None]] = None) -> int:
+    """
+    Export generations as PDFs inside a single ZIP file
+
+    Rows are read from the database in chunks and handed to a process pool.
+    Only a bounded window of renders is in flight at any time, and each
+    finished PDF is written to the ZIP straight away, so memory use does not
+    grow with the number of generations exported. Workers are spawned, not
+    forked: a fork of the app would copy its threads' locks (the activity
+    writer, the connection pool) in whatever state they happen to be in.
+
+    Args:
+        db: Database to read generations from
+        output: Path or writable binary file object for the ZIP
+        start: Inclusive ISO timestamp lower bound
+        end: Exclusive ISO timestamp upper bound
+        session_ids: Only include these sessions
+        max_workers: Number of worker processes (defaults to CPU count)
+        progress_callback: Called with (done, total) after each PDF is written
+
+    Returns:
+        int: Number of generations exported
+    """
+    total = db.count_generations(start, end, session_ids)
+    max_workers = max_workers or os.cpu_count() or 1
+    window = max_workers * 2
+    done = 0
+
+    manifest = io.StringIO()
+    writer = csv.DictWriter(manifest, fieldnames=MANIFEST_FIELDS)
+    writer.writeheader()
+
+    with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as archive, \
+            ProcessPoolExecutor(max_workers=max_workers,
+                                mp_context=multiprocessing.get_context('spawn')) as executor:
+        pending = deque()
+
+        def write_next():
+            nonlocal done
+            generation, future = pending.popleft()
+            arcname, pdf_bytes = future.result()
+            archive.writestr(arcname, pdf_bytes)
+            writer.writerow({
+                'generation_id': generation['id'],
+                'session_id': generation['session_id'],
+                'timestamp': generation['timestamp'],
+                'file_name': generation['file_name'] or '',
+                'model_used': generation['model_used'] or '',
+                'pdf_path': arcname
+            })
+            done += 1
+            if progress_callback:
+                progress_callback(done, total)
+
+        for generation in db.iter_generations(start, end, session_ids):
+            future = executor.submit(render_generation_pdf, generation)
+            # Keep only the metadata around while the worker renders
+            metadata = {k: generation[k] for k in ('id', 'session_id', 'timestamp', 'file_name', 'model_used')}
+            pending.append((metadata, future))
+            if len(pending) >= window:
+                write_next()
+
+        while pending:
+            write_next()
+
+        archive.writestr('manifest.csv', manifest.getvalue())
+
+    return done
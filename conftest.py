@@ -0,0 +1,6 @@
+"""
+pytest configuration for Study Assistant
+"""
+
+# A setup check meant to be run directly (python test_admin_config.py), not a test module
+collect_ignore = ["test_admin_config.py"]
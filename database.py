@@ -5,28 +5,909 @@ Handles multi-user session tracking and activity logging
 
 import sqlite3
 import json
+import hashlib
+import zlib
+import threading
+import queue
+import time
+import atexit
+import logging
+import re
+import functools
+from concurrent.futures import Future
+from contextlib import contextmanager
 from datetime import datetime, timezone
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Iterator, Tuple, Callable, ContextManager
 import os
+from pathlib import Path
+
+from quiz_parser import parse_quiz_data
+from scheduler import run_in_background_if_due
+
+# Optional zstd compression for stored content
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Codec for new content blobs. zlib (standard library) unless BLOB_CODEC=zstd
+# opts in; every host that opens the database then needs zstandard installed
+# to read them, so it's never picked just because the package happens to be
+# importable.
+BLOB_CODEC = os.getenv("BLOB_CODEC", "zlib").strip().lower() or "zlib"
+if BLOB_CODEC not in ("zlib", "zstd"):
+    logger.warning("Ignoring unknown BLOB_CODEC=%r; using zlib", BLOB_CODEC)
+    BLOB_CODEC = "zlib"
+elif BLOB_CODEC == "zstd" and zstandard is None:
+    logger.warning("BLOB_CODEC=zstd needs the zstandard package; using zlib")
+    BLOB_CODEC = "zlib"
+
+# A write statement: (sql, params)
+Statement = Tuple[str, tuple]
+
+# A schema migration: (version, description, DDL step run on the migration's cursor, data backfill or None)
+Migration = Tuple[int, str, Callable[[sqlite3.Cursor], Optional[bool]], Optional[Callable[..., int]]]
+
+# Connection tuning
+BUSY_TIMEOUT_MS = 5000
+STATEMENT_CACHE_SIZE = 256
+
+# Words of a full-text search query; each is quoted so user input can't
+# inject FTS5 query syntax
+SEARCH_TERM_PATTERN = re.compile(r'\w+')
+# Words shown in a search result snippet
+SNIPPET_WORDS = 16
+
+# Connection pool shared by all threads: idle connections per (abspath,
+# read_only), at most POOL_MAX_IDLE each. A thread borrows one for the
+# duration of a connection()/cursor()/transaction() block (nested blocks on
+# the same thread reuse it) and hands it back afterwards, so connections
+# outlive both DatabaseManager instances (one is created per rerun) and the
+# short-lived threads Streamlit runs each rerun on.
+POOL_MAX_IDLE = 8
+
+_idle_connections: Dict[Tuple[str, bool], "queue.LifoQueue"] = {}
+_idle_connections_lock = threading.Lock()
+# Connections borrowed by the current thread: {(abspath, read_only): [connection, depth]}
+_thread_local = threading.local()
+
+
+def _open_connection(db_path: str) -> sqlite3.Connection:
+    """Open and configure a pooled connection"""
+    conn = sqlite3.connect(
+        db_path,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        check_same_thread=False
+    )
+    # New database files release free pages incrementally; this has to come
+    # before anything is written, and is a no-op for existing files
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    # WAL lets readers run alongside the single writer; NORMAL sync is
+    # durable across application crashes and much cheaper per commit
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    return conn
+
+
+def _open_read_only_connection(db_path: str) -> sqlite3.Connection:
+    """
+    Open a pooled connection that can only read
+    
+    Used for admin analytics: it can't take the write lock, so it never
+    queues behind or in front of activity logging.
+    """
+    conn = sqlite3.connect(
+        f"{Path(db_path).absolute().as_uri()}?mode=ro",
+        uri=True,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        check_same_thread=False
+    )
+    conn.execute("PRAGMA query_only = ON")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    return conn
+
+
+def content_hash(text: str) -> str:
+    """Get the content address of a text blob"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def compress_text(text: str) -> Tuple[str, bytes]:
+    """
+    Compress text for blob storage with BLOB_CODEC
+    
+    Returns:
+        tuple: (codec name, compressed bytes)
+    """
+    data = text.encode('utf-8')
+    if BLOB_CODEC == 'zstd':
+        return 'zstd', zstandard.ZstdCompressor(level=10).compress(data)
+    return 'zlib', zlib.compress(data, 9)
+
+
+def decompress_text(codec: str, data: bytes) -> str:
+    """Decompress a stored blob"""
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed content")
+        return zstandard.ZstdDecompressor().decompress(data).decode('utf-8')
+    return zlib.decompress(data).decode('utf-8')
+
+
+def build_snippet(texts: List[str], terms: List[str], words: int = SNIPPET_WORDS) -> str:
+    """
+    Cut a window of words around the first search match, with matches in **bold**
+    
+    Stand-in for FTS5's snippet(), which a contentless index can't run. A
+    word matches a term it starts with, or the term's first letters for
+    longer terms, a rough match for the porter stems the index compares.
+    
+    Args:
+        texts: Fields to look in, in order of preference
+        terms: Search terms
+        words: Window size in words
+    """
+    prefixes = tuple(term.lower()[:max(4, len(term) - 3)] for term in terms)
+    
+    def matches(word: str) -> bool:
+        return any(token.lower().startswith(prefixes) for token in SEARCH_TERM_PATTERN.findall(word))
+    
+    for text in texts:
+        text_words = text.split()
+        first = next((i for i, word in enumerate(text_words) if matches(word)), None)
+        if first is None:
+            continue
+        start = max(0, min(first - words // 4, len(text_words) - words))
+        window = [f"**{word}**" if matches(word) else word for word in text_words[start:start + words]]
+        return ("…" if start > 0 else "") + " ".join(window) + ("…" if start + words < len(text_words) else "")
+    return ""
+
+
+@contextmanager
+def borrow_connection(db_path: str, read_only: bool = False) -> Iterator[sqlite3.Connection]:
+    """
+    Borrow a pooled connection to a database file for the duration of a block
+    
+    Only one thread uses a connection at a time; a block nested in another
+    on the same thread gets the same connection (and so sees its open
+    transaction and attached databases).
+    """
+    key = (os.path.abspath(db_path), read_only)
+    borrowed = getattr(_thread_local, 'borrowed', None)
+    if borrowed is None:
+        borrowed = _thread_local.borrowed = {}
+    
+    lease = borrowed.get(key)
+    if lease is not None:
+        lease[1] += 1
+        try:
+            yield lease[0]
+        finally:
+            lease[1] -= 1
+        return
+    
+    with _idle_connections_lock:
+        idle = _idle_connections.get(key)
+        if idle is None:
+            idle = _idle_connections[key] = queue.LifoQueue(maxsize=POOL_MAX_IDLE)
+    try:
+        conn = idle.get_nowait()
+    except queue.Empty:
+        conn = (_open_read_only_connection if read_only else _open_connection)(db_path)
+    
+    borrowed[key] = [conn, 1]
+    try:
+        yield conn
+    finally:
+        del borrowed[key]
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+
+# Row ids a write-behind writer reserves per round trip; ids left unused
+# when its process exits are skipped
+ID_BLOCK_SIZE = 100
+# Attempts at committing a write group while the database is busy or
+# locked, and the delay before the first retry (doubled for each further one)
+WRITE_ATTEMPTS = 4
+WRITE_RETRY_DELAY = 0.25
+
+
+def _is_busy_error(error: sqlite3.Error) -> bool:
+    """Check whether a write failed only because another connection held the lock"""
+    code = getattr(error, 'sqlite_errorcode', None)
+    if code is not None:
+        return code & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    return isinstance(error, sqlite3.OperationalError) and 'locked' in str(error)
+
+
+class ActivityWriter:
+    """
+    Background writer that batches activity logging into few transactions
+    
+    Callers submit groups of statements and return immediately. A daemon
+    thread drains the queue, commits up to batch_size groups per transaction
+    (or whatever arrived within flush_interval seconds) and runs consecutive
+    identical statements with executemany. Row ids for new generations and
+    quiz results come from blocks reserved in the table's AUTOINCREMENT
+    sequence, so callers get them synchronously and writers in other
+    processes (or plain inserts) never reuse them; ids from different
+    writers interleave rather than strictly follow commit order.
+    
+    Each submitted group gets a Future that resolves once it is committed,
+    or to the error if it could not be. The writer is shared by every
+    caller in the process, so a failure is only reported through the
+    failing group's own Future, logged and counted in failed_writes; it
+    never surfaces in another caller's submit() or flush().
+    """
+    
+    def __init__(self, db_path: str, batch_size: int = 200, flush_interval: float = 0.5):
+        """Start the writer thread for a database file"""
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue" = queue.Queue()
+        self._id_blocks: Dict[str, List[int]] = {}
+        self._id_lock = threading.Lock()
+        self.failed_writes = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="activity-writer", daemon=True)
+        self._thread.start()
+    
+    def allocate_id(self, table: str) -> int:
+        """Take the next row id of an AUTOINCREMENT table from this writer's reserved block"""
+        with self._id_lock:
+            block = self._id_blocks.get(table)
+            if block is None or block[0] > block[1]:
+                block = self._id_blocks[table] = list(self._reserve_ids(table))
+            row_id = block[0]
+            block[0] += 1
+            return row_id
+    
+    def _reserve_ids(self, table: str) -> Tuple[int, int]:
+        """
+        Reserve the next ID_BLOCK_SIZE ids of a table by advancing its sqlite_sequence entry
+        
+        BEGIN IMMEDIATE takes the write lock before the sequence is read, so
+        concurrent reservations are serialized across processes.
+        
+        Returns:
+            tuple: (first, last) reserved id
+        """
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Ids can run ahead of the sequence if rows were inserted with explicit ids
+                max_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+                row = conn.execute("""
+                    UPDATE sqlite_sequence SET seq = MAX(seq, ?) + ?
+                    WHERE name = ?
+                    RETURNING seq
+                """, (max_id, ID_BLOCK_SIZE, table)).fetchone()
+                if row is None:
+                    row = conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?) RETURNING seq",
+                                       (table, max_id + ID_BLOCK_SIZE)).fetchone()
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+        last_id = row[0]
+        return last_id - ID_BLOCK_SIZE + 1, last_id
+    
+    def submit(self, statements: List[Statement]) -> Future:
+        """
+        Queue statements to be committed together
+        
+        Returns:
+            Future: Resolves to None once committed, or raises the
+                sqlite3.Error that kept the statements from committing
+        """
+        if self._closed:
+            raise RuntimeError("ActivityWriter is closed")
+        future: Future = Future()
+        self._queue.put((statements, future))
+        return future
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until everything submitted so far is committed
+        
+        Failed writes count as done; see the Futures from submit().
+        
+        Returns:
+            bool: False if the timeout expired first
+        """
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+    
+    def close(self):
+        """Flush pending writes durably and stop the writer thread"""
+        if self._closed:
+            return
+        try:
+            self.flush()
+        finally:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
+    
+    def _run(self):
+        """Writer thread: collect batches and commit them"""
+        conn = _open_connection(self.db_path)
+        try:
+            while True:
+                item = self._queue.get()
+                batch: List[Tuple[List[Statement], Future]] = []
+                markers: List[threading.Event] = []
+                stop = False
+                deadline = time.monotonic() + self.flush_interval
+                
+                while True:
+                    if item is None:
+                        stop = True
+                    elif isinstance(item, threading.Event):
+                        markers.append(item)
+                    else:
+                        batch.append(item)
+                    # A flush marker or shutdown commits what we have right away
+                    if stop or markers or len(batch) >= self.batch_size:
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                
+                if batch:
+                    self._write_batch(conn, batch)
+                for marker in markers:
+                    marker.set()
+                if stop:
+                    # Checkpoint so the final writes are in the main database file
+                    conn.execute("PRAGMA wal_checkpoint(FULL)")
+                    return
+        finally:
+            conn.close()
+    
+    def _write_batch(self, conn: sqlite3.Connection, batch: List[Tuple[List[Statement], Future]]):
+        """
+        Commit a batch in one transaction, falling back to one transaction per group
+        
+        Only a busy/locked database is retried (with backoff); any other
+        error fails the group at once, so a broken statement doesn't hold up
+        the writer thread.
+        """
+        try:
+            with conn:
+                self._execute_grouped(conn, [stmt for group, _ in batch for stmt in group])
+        except sqlite3.Error:
+            logger.exception("Batched activity write failed; retrying groups individually")
+            for group, future in batch:
+                delay = WRITE_RETRY_DELAY
+                for attempt in range(1, WRITE_ATTEMPTS + 1):
+                    try:
+                        with conn:
+                            self._execute_grouped(conn, group)
+                        future.set_result(None)
+                        break
+                    except sqlite3.Error as e:
+                        if attempt == WRITE_ATTEMPTS or not _is_busy_error(e):
+                            self._fail(group, future, e)
+                            break
+                        time.sleep(delay)
+                        delay *= 2
+        else:
+            for _, future in batch:
+                future.set_result(None)
+        bump_write_version(self.db_path)
+    
+    def _fail(self, group: List[Statement], future: Future, error: sqlite3.Error):
+        """Report a write that couldn't be committed to its submitter only"""
+        logger.error("Activity write failed: %s: %s", error, group)
+        self.failed_writes += 1
+        future.set_exception(error)
+    
+    @staticmethod
+    def _execute_grouped(conn: sqlite3.Connection, statements: List[Statement]):
+        """Run statements in order, using executemany for runs of identical SQL"""
+        i = 0
+        while i < len(statements):
+            sql = statements[i][0]
+            j = i
+            while j < len(statements) and statements[j][0] == sql:
+                j += 1
+            conn.executemany(sql, [params for _, params in statements[i:j]])
+            i = j
+
+
+# ISO timestamp columns that also get an indexed integer *_epoch copy
+EPOCH_COLUMNS = {
+    'sessions': ['created_at', 'last_activity'],
+    'generations': ['timestamp'],
+    'quiz_results': ['completed_at'],
+}
+
+# Insert for one quiz_answers row: (result_id, generation_id, question_id, chosen, correct_key, is_correct)
+QUIZ_ANSWER_INSERT = """
+    INSERT OR IGNORE INTO quiz_answers
+    (result_id, generation_id, question_id, chosen, correct_key, is_correct)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+# Per-session generation and quiz result listings (metadata only, no content)
+SESSION_GENERATION_COLUMNS = """
+    id, timestamp, file_name, file_size, content_length,
+    input_method, model_used, debug_mode
+"""
+SESSION_QUIZ_RESULT_COLUMNS = """
+    qr.id, qr.generation_id, qr.completed_at, qr.score,
+    qr.total_questions, qr.percentage, qr.answered_count,
+    g.file_name, g.model_used
+"""
+
+# Schema migration whose backfill fills the *_epoch columns of older rows;
+# readers that walk rows by epoch wait for it (see get_pending_backfills)
+EPOCH_MIGRATION = 5
+
+# Seconds behind its newest row the live feed keeps re-reading, for rows
+# committed after later ones (ids reserved by write-behind writers and
+# concurrent writers don't follow commit order); see get_activity_after
+LIVE_FEED_LAG_SECONDS = 60
+
+# Timestamp column that date-range exports filter each activity table on
+ACTIVITY_EXPORT_TIME_COLUMNS = {
+    'sessions': 'created_at_epoch',
+    'generations': 'timestamp_epoch',
+    'quiz_results': 'completed_at_epoch',
+}
+
+# Columns of get_sessions_columns; created_at and last_activity are epoch seconds
+SESSION_FRAME_COLUMNS = ['session_id', 'username', 'ip_address', 'created_at', 'last_activity',
+                         'generation_count', 'quiz_count', 'last_percentage']
+
+
+def sessions_rows_to_columns(rows: List[tuple]) -> Dict[str, tuple]:
+    """Transpose session rows (SESSION_FRAME_COLUMNS first) into {column: values}"""
+    values = list(zip(*rows)) if rows else [() for _ in SESSION_FRAME_COLUMNS]
+    return dict(zip(SESSION_FRAME_COLUMNS, values))
+
+
+# Minimum seconds between session heartbeat writes when nothing else changed
+SESSION_HEARTBEAT_INTERVAL = 60.0
+# Prune the debounce table once it tracks this many sessions
+SESSION_DEBOUNCE_MAX_ENTRIES = 10000
+
+# Last heartbeat written per (db_path, session_id): (monotonic time, (username, ip, ua))
+_session_heartbeats: Dict[Tuple[str, str], Tuple[float, Tuple]] = {}
+_session_heartbeats_lock = threading.Lock()
+
+
+def _heartbeat_due(db_path: str, session_id: str, details: Tuple,
+                   interval: float) -> Optional[Tuple]:
+    """
+    Decide whether a session heartbeat needs to hit the database
+    
+    A write is due when the session hasn't been written by this process
+    within `interval` seconds, or when a provided username/IP/user agent
+    differs from what was last written (None means "unchanged"). Nothing
+    is recorded here; see _record_heartbeat().
+    
+    Returns:
+        tuple or None: Details to record once the write is issued, or None
+            if no write is due
+    """
+    with _session_heartbeats_lock:
+        previous = _session_heartbeats.get((db_path, session_id))
+    if previous is None:
+        return details
+    last_time, last_details = previous
+    changed = any(new is not None and new != old for new, old in zip(details, last_details))
+    if not changed and time.monotonic() - last_time < interval:
+        return None
+    return tuple(new if new is not None else old for new, old in zip(details, last_details))
+
+
+def _record_heartbeat(db_path: str, session_id: str, details: Tuple, interval: float) -> float:
+    """
+    Record a heartbeat write that was issued, starting its debounce interval
+    
+    Returns:
+        float: The recorded time, for _forget_heartbeat()
+    """
+    now = time.monotonic()
+    with _session_heartbeats_lock:
+        if len(_session_heartbeats) >= SESSION_DEBOUNCE_MAX_ENTRIES:
+            stale = [k for k, (t, _) in _session_heartbeats.items() if now - t >= interval]
+            for k in stale:
+                del _session_heartbeats[k]
+        _session_heartbeats[(db_path, session_id)] = (now, details)
+    return now
+
+
+def _forget_heartbeat(db_path: str, session_id: str, recorded_at: float):
+    """Drop a recorded heartbeat whose write failed, so the next rerun writes it again"""
+    key = (db_path, session_id)
+    with _session_heartbeats_lock:
+        previous = _session_heartbeats.get(key)
+        if previous is not None and previous[0] == recorded_at:
+            del _session_heartbeats[key]
+
+
+# Schema features per database file, filled by the first DatabaseManager
+# that migrates it in this process: {abspath: {'search': bool}}
+_schema_features: Dict[str, Dict[str, bool]] = {}
+_schema_lock = threading.Lock()
+
+
+# Admin query results: {(abspath, method, args): (write version, expiry, result)}.
+# Entries are dropped once the TTL passes or anything is committed to the
+# database file in this process; the TTL bounds staleness from writes made
+# by other processes (e.g. manage_db).
+QUERY_CACHE_TTL = 10.0
+QUERY_CACHE_MAX_ENTRIES = 512
+
+_write_versions: Dict[str, int] = {}
+_query_cache: Dict[Tuple, Tuple[int, float, Any]] = {}
+_query_cache_lock = threading.Lock()
+
+
+def bump_write_version(db_path: str):
+    """Record that a write was committed to a database file"""
+    key = os.path.abspath(db_path)
+    with _query_cache_lock:
+        _write_versions[key] = _write_versions.get(key, 0) + 1
+
+
+def get_write_version(db_path: str) -> int:
+    """Get the number of commits made to a database file by this process"""
+    with _query_cache_lock:
+        return _write_versions.get(os.path.abspath(db_path), 0)
+
+
+def cached_query(method: Callable) -> Callable:
+    """
+    Cache a DatabaseManager read method by database file and arguments
+    
+    A cached result is reused until QUERY_CACHE_TTL expires or the write
+    version of its database file moves on. Results are shared between
+    callers, so they must not be modified.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        db_key = os.path.abspath(self.db_path)
+        key = (db_key, method.__name__, args, tuple(sorted(kwargs.items())))
+        now = time.monotonic()
+        try:
+            with _query_cache_lock:
+                version = _write_versions.get(db_key, 0)
+                entry = _query_cache.get(key)
+        except TypeError:
+            # Unhashable arguments: not cacheable
+            return method(self, *args, **kwargs)
+        if entry is not None and entry[0] == version and entry[1] > now:
+            return entry[2]
+        
+        # The version is read before querying, so a write that commits
+        # meanwhile invalidates this result on the next call
+        result = method(self, *args, **kwargs)
+        with _query_cache_lock:
+            if len(_query_cache) >= QUERY_CACHE_MAX_ENTRIES:
+                stale = [k for k, (v, expires, _) in _query_cache.items()
+                         if expires <= now or v != _write_versions.get(k[0], 0)]
+                for k in stale or list(_query_cache)[:QUERY_CACHE_MAX_ENTRIES // 4]:
+                    del _query_cache[k]
+            _query_cache[key] = (version, now + QUERY_CACHE_TTL, result)
+        return result
+    return wrapper
+
+
+# Process-wide writers, one per database file
+_writers: Dict[str, ActivityWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_activity_writer(db_path: str) -> ActivityWriter:
+    """Get (starting if needed) the shared write-behind writer for a database file"""
+    key = os.path.abspath(db_path)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None:
+            writer = _writers[key] = ActivityWriter(db_path)
+        return writer
+
+
+@atexit.register
+def close_activity_writers():
+    """Flush and stop all write-behind writers (runs at interpreter shutdown)"""
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.close()
 
 
 class DatabaseManager:
     """Manages SQLite database for user sessions and activity tracking"""
     
-    def __init__(self, db_path: str = "study_assistant.db"):
-        """Initialize database connection and create tables if needed"""
+    def __init__(self, db_path: str = "study_assistant.db", write_behind: bool = False,
+                 heartbeat_interval: float = SESSION_HEARTBEAT_INTERVAL, read_only: bool = False):
+        """
+        Initialize database connection and create tables if needed
+        
+        Args:
+            db_path: SQLite database file
+            write_behind: Queue activity logging to a background writer
+                instead of committing on the caller's thread
+            heartbeat_interval: Minimum seconds between last_activity writes
+                from create_or_update_session for an unchanged session
+            read_only: Use read-only connections (mode=ro, query_only) for
+                analytics; any write raises sqlite3.OperationalError
+        """
         self.db_path = db_path
+        self.heartbeat_interval = heartbeat_interval
+        self.read_only = read_only
         self.init_database()
+        self.writer = get_activity_writer(db_path) if write_behind and not read_only else None
+
+    @property
+    def shards(self) -> List['DatabaseManager']:
+        """Database files holding the activity (one; see sharding.ShardedDatabaseManager)"""
+        return [self]
+
+    def connection(self) -> ContextManager[sqlite3.Connection]:
+        """Borrow a pooled connection for a block (see borrow_connection)"""
+        return borrow_connection(self.db_path, self.read_only)
+    
+    @contextmanager
+    def cursor(self) -> Iterator[sqlite3.Cursor]:
+        """Get a cursor on a pooled connection for read queries"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                yield cursor
+            finally:
+                cursor.close()
     
-    def get_connection(self):
-        """Get database connection"""
-        return sqlite3.connect(self.db_path)
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Cursor]:
+        """
+        Get a cursor whose statements are committed together, or rolled back on error
+        
+        Committing bumps the database's write version, invalidating cached
+        query results.
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                yield cursor
+                conn.commit()
+                bump_write_version(self.db_path)
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+    
+    @contextmanager
+    def schema_transaction(self) -> Iterator[sqlite3.Cursor]:
+        """
+        Get a cursor in a write-locked transaction that also covers DDL
+        
+        In its default mode Python's sqlite3 only opens a transaction before
+        INSERT/UPDATE/DELETE, so CREATE, ALTER and DROP run by transaction()
+        commit on their own and survive a rollback. Here the transaction is
+        opened explicitly with BEGIN IMMEDIATE, which also takes the write
+        lock up front. The block may end it early with ROLLBACK.
+        """
+        with self.connection() as conn:
+            isolation_level = conn.isolation_level
+            conn.isolation_level = None
+            cursor = conn.cursor()
+            try:
+                cursor.execute("BEGIN IMMEDIATE")
+                try:
+                    yield cursor
+                    if conn.in_transaction:
+                        cursor.execute("COMMIT")
+                except BaseException:
+                    if conn.in_transaction:
+                        cursor.execute("ROLLBACK")
+                    raise
+                bump_write_version(self.db_path)
+            finally:
+                cursor.close()
+                conn.isolation_level = isolation_level
     
     def init_database(self):
-        """Create database tables if they don't exist"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        """
+        Bring the schema up to date, once per process and database file
+        
+        Every rerun constructs a DatabaseManager; after the first one has
+        applied the migrations, later instances only look up the result, so
+        no DDL runs on the request path. Only the DDL is applied here; data
+        backfills are left to run_backfills().
+        """
+        if self.read_only:
+            # Migrations need a writable connection
+            self.search_enabled = DatabaseManager(self.db_path).search_enabled
+            return
+        
+        key = os.path.abspath(self.db_path)
+        with _schema_lock:
+            features = _schema_features.get(key)
+            if features is None:
+                self.apply_migrations()
+                features = _schema_features[key] = self._detect_features()
+        self.search_enabled = features['search']
+    
+    def _migrations(self) -> List[Migration]:
+        """Ordered schema migrations: (version, description, DDL step, data backfill or None)"""
+        return [
+            (1, "Sessions, generations and quiz results tables", self._migrate_core_tables, None),
+            (2, "Content-addressed blobs for summary and quiz text", self._migrate_blobs,
+             self.migrate_inline_content),
+            (3, "Per-session counters", self._migrate_session_counters, self.rebuild_session_counters),
+            (4, "Keyset pagination and prefix search indexes on sessions", self._migrate_session_indexes, None),
+            (EPOCH_MIGRATION, "Indexed integer epoch timestamps", self._migrate_epoch_columns,
+             self.backfill_epoch_columns),
+            (6, "Trigger-maintained activity statistics", self._migrate_activity_stats, None),
+            (7, "Full-text search index over generations", self._migrate_search_index,
+             self.rebuild_search_index),
+            (8, "Session creation time index for range exports", self._migrate_session_created_epoch_index, None),
+            (9, "Per-question quiz answers", self._migrate_quiz_answers, self.backfill_quiz_answers),
+            (10, "Hourly and daily activity rollups", self._migrate_rollups, None),
+            (11, "Timestamp watermarks for activity rollups", self._migrate_rollup_epoch_watermarks, None),
+            (12, "Contentless full-text search index", self._migrate_contentless_search_index,
+             self.rebuild_search_index),
+        ]
+    
+    def apply_migrations(self) -> List[int]:
+        """
+        Apply the schema changes of migrations this database hasn't had yet
         
+        Each step runs in its own schema_transaction(), together with its
+        schema_version row, so it is applied completely or not at all, and
+        a process that finds another one migrating the same file waits and
+        then skips what that one applied. A step with a data backfill is
+        also queued in schema_backfills for run_backfills(), so opening a
+        database never waits on a scan of existing rows. Steps are
+        idempotent, so a database created before versioning is simply
+        brought up to date. A step returning False is rolled back, not
+        recorded, and retried by the next process.
+        
+        Returns:
+            list: Versions applied by this call
+        """
+        with self.schema_transaction() as cursor:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    description TEXT NOT NULL,
+                    applied_at TEXT NOT NULL
+                )
+            """)
+            # Backfills still to run (completed_at NULL) and how far the last run got
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS schema_backfills (
+                    version INTEGER PRIMARY KEY,
+                    description TEXT NOT NULL,
+                    rows_done INTEGER NOT NULL DEFAULT 0,
+                    completed_at TEXT
+                )
+            """)
+            cursor.execute("SELECT version FROM schema_version")
+            applied = {row[0] for row in cursor.fetchall()}
+            # A new database has no existing rows to backfill
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sessions'")
+            has_data = cursor.fetchone() is not None
+        
+        newly_applied = []
+        for version, description, step, backfill in self._migrations():
+            if version in applied:
+                continue
+            with self.schema_transaction() as cursor:
+                cursor.execute("SELECT 1 FROM schema_version WHERE version = ?", (version,))
+                if cursor.fetchone() is not None:
+                    continue
+                logger.info("Applying schema migration %d: %s", version, description)
+                if step(cursor) is False:
+                    cursor.execute("ROLLBACK")
+                    continue
+                cursor.execute("""
+                    INSERT OR IGNORE INTO schema_version (version, description, applied_at)
+                    VALUES (?, ?, ?)
+                """, (version, description, self.get_utc_timestamp()))
+                if backfill is not None and has_data:
+                    cursor.execute("""
+                        INSERT OR IGNORE INTO schema_backfills (version, description)
+                        VALUES (?, ?)
+                    """, (version, description))
+            newly_applied.append(version)
+        return newly_applied
+    
+    def get_pending_backfills(self) -> List[Tuple[int, str, int]]:
+        """
+        Get the data backfills that haven't finished yet
+        
+        Returns:
+            list: (version, description, rows done by the last run), in version order
+        """
+        with self.cursor() as cursor:
+            cursor.execute("""
+                SELECT version, description, rows_done FROM schema_backfills
+                WHERE completed_at IS NULL
+                ORDER BY version
+            """)
+            rows = cursor.fetchall()
+        return rows
+    
+    def run_backfills(self, progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict[int, int]:
+        """
+        Run the pending data backfills of applied migrations, oldest first
+        
+        Each backfill works in small batches and records its row count in
+        schema_backfills after every batch. Backfills are idempotent, so one
+        interrupted by a restart is simply run again by the next call.
+        Called by `manage_db.py migrate` and by run_scheduled_backfills().
+        
+        Args:
+            progress_callback: Called with (version, rows done) after each batch
+        
+        Returns:
+            dict: Rows processed per completed migration version
+        """
+        backfills = {version: backfill for version, _, _, backfill in self._migrations() if backfill}
+        completed = {}
+        for version, description, _ in self.get_pending_backfills():
+            logger.info("Backfilling schema migration %d: %s", version, description)
+            
+            def record_progress(rows: int, version: int = version):
+                with self.transaction() as cursor:
+                    cursor.execute("UPDATE schema_backfills SET rows_done = ? WHERE version = ?",
+                                   (rows, version))
+                if progress_callback:
+                    progress_callback(version, rows)
+            
+            rows = backfills[version](progress_callback=record_progress)
+            with self.transaction() as cursor:
+                cursor.execute("""
+                    UPDATE schema_backfills SET rows_done = ?, completed_at = ?
+                    WHERE version = ?
+                """, (rows, self.get_utc_timestamp(), version))
+            completed[version] = rows
+        return completed
+    
+    def get_schema_version(self) -> int:
+        """Get the highest applied schema migration"""
+        with self.cursor() as cursor:
+            cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+            version = cursor.fetchone()[0]
+        return version
+    
+    def _detect_features(self) -> Dict[str, bool]:
+        """Check which optional schema features this database has"""
+        with self.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'generations_fts'")
+            search = cursor.fetchone() is not None
+        return {'search': search}
+    
+    def _migrate_core_tables(self, cursor: sqlite3.Cursor):
+        """Migration 1: sessions, generations and quiz results"""
         # Sessions table
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS sessions (
@@ -89,115 +970,724 @@ class DatabaseManager:
             CREATE INDEX IF NOT EXISTS idx_quiz_results_session 
             ON quiz_results(session_id, completed_at)
         """)
+    
+    def _migrate_blobs(self, cursor: sqlite3.Cursor):
+        """Migration 2: move summary/quiz text into content-addressed blobs"""
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                codec TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                data BLOB NOT NULL
+            )
+        """)
+        
+        # Generations reference their text by blob hash
+        self._add_missing_columns(cursor, 'generations', {
+            'summary_hash': 'TEXT',
+            'quiz_hash': 'TEXT',
+        })
+        
+        # Reference lookups when deleting unused blobs
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_generations_summary_hash 
+            ON generations(summary_hash)
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_generations_quiz_hash 
+            ON generations(quiz_hash)
+        """)
+    
+    def _migrate_session_counters(self, cursor: sqlite3.Cursor):
+        """Migration 3: per-session counters maintained by the logging methods"""
+        self._add_missing_columns(cursor, 'sessions', {
+            'generation_count': 'INTEGER NOT NULL DEFAULT 0',
+            'quiz_count': 'INTEGER NOT NULL DEFAULT 0',
+            'last_score': 'INTEGER',
+            'last_percentage': 'REAL',
+        })
+    
+    def _migrate_session_indexes(self, cursor: sqlite3.Cursor):
+        """Migration 4: indexes for the admin sessions list"""
+        # Keyset pagination order
+        cursor.execute("DROP INDEX IF EXISTS idx_sessions_last_activity")
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_sessions_activity_keyset 
+            ON sessions(last_activity, session_id)
+        """)
+        
+        # Case-insensitive prefix search (LIKE 'abc%')
+        for column in ('session_id', 'username', 'ip_address'):
+            cursor.execute(f"""
+                CREATE INDEX IF NOT EXISTS idx_sessions_{column}_nocase 
+                ON sessions({column} COLLATE NOCASE)
+            """)
+    
+    def _migrate_epoch_columns(self, cursor: sqlite3.Cursor):
+        """
+        Migration 5: integer epoch copies of the ISO timestamps
+        
+        Time range filters can then use an index instead of wrapping
+        columns in datetime().
+        """
+        for table, columns in EPOCH_COLUMNS.items():
+            self._add_missing_columns(cursor, table, {
+                f"{column}_epoch": 'INTEGER' for column in columns
+            })
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_sessions_last_activity_epoch 
+            ON sessions(last_activity_epoch)
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_generations_timestamp_epoch 
+            ON generations(timestamp_epoch)
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_quiz_results_completed_epoch 
+            ON quiz_results(completed_at_epoch)
+        """)
+    
+    def _migrate_activity_stats(self, cursor: sqlite3.Cursor):
+        """Migration 6: running aggregates for the dashboard statistics"""
+        self._init_activity_stats(cursor)
+    
+    def _migrate_search_index(self, cursor: sqlite3.Cursor) -> bool:
+        """Migration 7: FTS5 index over generation text (skipped without FTS5)"""
+        try:
+            self._init_search_index(cursor)
+        except sqlite3.OperationalError as e:
+            # SQLite built without FTS5; retried by the next process
+            logger.warning("Full-text search disabled: %s", e)
+            return False
+        
+        return True
+    
+    def _migrate_quiz_answers(self, cursor: sqlite3.Cursor):
+        """
+        Migration 9: one row per answered question, for item analysis
+        
+        The covering index on (generation_id, question_id, chosen, is_correct)
+        answers the per-question difficulty and distractor aggregates
+        without touching the table.
+        """
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS quiz_answers (
+                result_id INTEGER NOT NULL,
+                generation_id INTEGER NOT NULL,
+                question_id INTEGER NOT NULL,
+                chosen TEXT,
+                correct_key TEXT,
+                is_correct INTEGER,
+                PRIMARY KEY (result_id, question_id),
+                FOREIGN KEY (result_id) REFERENCES quiz_results(id)
+            ) WITHOUT ROWID
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_quiz_answers_generation 
+            ON quiz_answers(generation_id, question_id, chosen, is_correct)
+        """)
+        
+        # Answers go with their quiz result, whichever code path deletes it
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_quiz_answers_delete
+            AFTER DELETE ON quiz_results BEGIN
+                DELETE FROM quiz_answers WHERE result_id = OLD.id;
+            END
+        """)
+    
+    def backfill_quiz_answers(self, batch_size: int = 500,
+                              progress_callback: Optional[Callable[[int], None]] = None) -> int:
+        """
+        Fill quiz_answers from the user_answers JSON of existing quiz results
+        
+        Correct answers are recovered by parsing each generation's quiz text.
+        Results that already have answer rows are left alone.
+        
+        Returns:
+            int: Number of quiz results backfilled
+        """
+        backfilled = 0
+        last_id = 0
+        answer_keys: Dict[int, Dict[int, str]] = {}
+        while True:
+            with self.transaction() as cursor:
+                cursor.execute("""
+                    SELECT qr.id, qr.generation_id, qr.user_answers, g.quiz, qb.codec, qb.data
+                    FROM quiz_results qr
+                    LEFT JOIN generations g ON g.id = qr.generation_id
+                    LEFT JOIN blobs qb ON qb.hash = g.quiz_hash
+                    WHERE qr.id > ?
+                      AND NOT EXISTS (SELECT 1 FROM quiz_answers qa WHERE qa.result_id = qr.id)
+                    ORDER BY qr.id
+                    LIMIT ?
+                """, (last_id, batch_size))
+                rows = cursor.fetchall()
+                
+                answer_rows = []
+                for result_id, generation_id, user_answers, inline_quiz, codec, data in rows:
+                    if generation_id not in answer_keys:
+                        quiz = self._resolve_content(inline_quiz, codec, data)
+                        answer_keys[generation_id] = {
+                            q['id']: q['answer_key'] for q in parse_quiz_data(quiz) if q['answer_key']
+                        } if quiz else {}
+                    answer_rows.extend(self._quiz_answer_rows(
+                        result_id, generation_id,
+                        json.loads(user_answers) if user_answers else {},
+                        answer_keys[generation_id] or None
+                    ))
+                
+                cursor.executemany(QUIZ_ANSWER_INSERT, answer_rows)
+            
+            backfilled += len(rows)
+            if progress_callback:
+                progress_callback(backfilled)
+            if len(rows) < batch_size:
+                return backfilled
+            last_id = rows[-1][0]
+    
+    @staticmethod
+    def _quiz_answer_rows(result_id: int, generation_id: int, user_answers: Dict,
+                          answer_key: Optional[Dict]) -> List[tuple]:
+        """
+        Build quiz_answers rows for one quiz result
+        
+        With an answer key every question gets a row (unanswered ones with
+        chosen = NULL); without one only answered questions are recorded and
+        correctness is unknown (NULL).
+        """
+        chosen_by_question = {int(question_id): chosen for question_id, chosen in user_answers.items()}
+        correct_by_question = {int(question_id): key for question_id, key in (answer_key or {}).items() if key}
+        
+        rows = []
+        for question_id in sorted(set(chosen_by_question) | set(correct_by_question)):
+            chosen = chosen_by_question.get(question_id)
+            correct_key = correct_by_question.get(question_id)
+            is_correct = int(chosen == correct_key) if correct_key is not None else None
+            rows.append((result_id, generation_id, question_id, chosen, correct_key, is_correct))
+        return rows
+    
+    def _migrate_rollups(self, cursor: sqlite3.Cursor):
+        """
+        Migration 10: pre-aggregated activity per hour and per day
+        
+        Filled incrementally by rollups.update_rollups(), which records how
+        far it got in each source table in rollup_state.
+        """
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS activity_rollups (
+                period TEXT NOT NULL,
+                bucket_epoch INTEGER NOT NULL,
+                sessions INTEGER NOT NULL DEFAULT 0,
+                generations INTEGER NOT NULL DEFAULT 0,
+                quizzes INTEGER NOT NULL DEFAULT 0,
+                score_sum REAL NOT NULL DEFAULT 0,
+                score_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (period, bucket_epoch)
+            ) WITHOUT ROWID
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS model_rollups (
+                period TEXT NOT NULL,
+                bucket_epoch INTEGER NOT NULL,
+                model TEXT NOT NULL,
+                generations INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (period, bucket_epoch, model)
+            ) WITHOUT ROWID
+        """)
         
-        conn.commit()
-        conn.close()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS rollup_state (
+                source TEXT PRIMARY KEY,
+                last_id INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        # last_epoch is added by migration 11
+    
+    def _migrate_rollup_epoch_watermarks(self, cursor: sqlite3.Cursor):
+        """
+        Migration 11: rollups continue from an (epoch, id) watermark
+        
+        Session rowids are reused after archiving and write-behind ids don't
+        follow commit order, so an id alone can't mark how far the rollups
+        got. Existing watermarks take the timestamp of the last row they
+        covered (one index seek per source).
+        """
+        added = self._add_missing_columns(cursor, 'rollup_state', {
+            'last_epoch': 'INTEGER NOT NULL DEFAULT 0',
+        })
+        if not added:
+            return
+        for source, key_column, epoch_column in (('sessions', 'rowid', 'created_at_epoch'),
+                                                 ('generations', 'id', 'timestamp_epoch'),
+                                                 ('quiz_results', 'id', 'completed_at_epoch')):
+            cursor.execute(f"""
+                UPDATE rollup_state SET last_epoch = COALESCE((
+                    SELECT {epoch_column} FROM {source}
+                    WHERE {key_column} <= rollup_state.last_id
+                    ORDER BY {key_column} DESC LIMIT 1
+                ), 0)
+                WHERE source = ?
+            """, (source,))
+    
+    def _migrate_session_created_epoch_index(self, cursor: sqlite3.Cursor):
+        """Migration 8: index sessions by creation epoch"""
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_sessions_created_epoch 
+            ON sessions(created_at_epoch)
+        """)
+    
+    @staticmethod
+    def _init_activity_stats(cursor: sqlite3.Cursor):
+        """
+        Create the running-aggregates table and the triggers that maintain it
+        
+        The single row mirrors COUNT(*)/AVG(percentage) over the activity
+        tables; it's seeded from them once, then kept current by triggers on
+        every insert and delete, whichever code path does the write.
+        """
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS activity_stats (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                total_sessions INTEGER NOT NULL DEFAULT 0,
+                total_generations INTEGER NOT NULL DEFAULT 0,
+                total_quiz_completions INTEGER NOT NULL DEFAULT 0,
+                score_sum REAL NOT NULL DEFAULT 0,
+                score_count INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        
+        cursor.execute("""
+            INSERT OR IGNORE INTO activity_stats
+            (id, total_sessions, total_generations, total_quiz_completions, score_sum, score_count)
+            SELECT 1,
+                   (SELECT COUNT(*) FROM sessions),
+                   (SELECT COUNT(*) FROM generations),
+                   (SELECT COUNT(*) FROM quiz_results),
+                   (SELECT COALESCE(SUM(percentage), 0) FROM quiz_results),
+                   (SELECT COUNT(percentage) FROM quiz_results)
+        """)
+        
+        triggers = {
+            'trg_stats_session_insert': """
+                AFTER INSERT ON sessions BEGIN
+                    UPDATE activity_stats SET total_sessions = total_sessions + 1 WHERE id = 1;
+                END
+            """,
+            'trg_stats_session_delete': """
+                AFTER DELETE ON sessions BEGIN
+                    UPDATE activity_stats SET total_sessions = total_sessions - 1 WHERE id = 1;
+                END
+            """,
+            'trg_stats_generation_insert': """
+                AFTER INSERT ON generations BEGIN
+                    UPDATE activity_stats SET total_generations = total_generations + 1 WHERE id = 1;
+                END
+            """,
+            'trg_stats_generation_delete': """
+                AFTER DELETE ON generations BEGIN
+                    UPDATE activity_stats SET total_generations = total_generations - 1 WHERE id = 1;
+                END
+            """,
+            'trg_stats_quiz_insert': """
+                AFTER INSERT ON quiz_results BEGIN
+                    UPDATE activity_stats SET
+                        total_quiz_completions = total_quiz_completions + 1,
+                        score_sum = score_sum + COALESCE(NEW.percentage, 0),
+                        score_count = score_count + (NEW.percentage IS NOT NULL)
+                    WHERE id = 1;
+                END
+            """,
+            'trg_stats_quiz_delete': """
+                AFTER DELETE ON quiz_results BEGIN
+                    UPDATE activity_stats SET
+                        total_quiz_completions = total_quiz_completions - 1,
+                        score_sum = score_sum - COALESCE(OLD.percentage, 0),
+                        score_count = score_count - (OLD.percentage IS NOT NULL)
+                    WHERE id = 1;
+                END
+            """,
+        }
+        for name, body in triggers.items():
+            cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+    
+    @staticmethod
+    def _init_search_index(cursor: sqlite3.Cursor):
+        """
+        Create the FTS5 index over generation summaries, quizzes and file names
+        
+        The index is contentless (rowid = generation id): it holds only the
+        token lists, not another uncompressed copy of the text, which stays
+        in the compressed blobs. Snippets are cut from the blob text, and
+        deletes go through unindex_generations(), since removing a row from
+        a contentless index needs the text it was indexed with.
+        """
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS generations_fts USING fts5(
+                summary, quiz, file_name,
+                content = '',
+                tokenize = 'porter unicode61'
+            )
+        """)
+    
+    def _migrate_contentless_search_index(self, cursor: sqlite3.Cursor) -> bool:
+        """
+        Migration 12: replace a search index that stored its own copy of the text
+        
+        The index is recreated empty (or created, if it's missing);
+        rebuild_search_index() fills it as a backfill. An index that was
+        already created contentless is left alone.
+        """
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'generations_fts'")
+        row = cursor.fetchone()
+        cursor.execute("DROP TRIGGER IF EXISTS trg_generations_fts_delete")
+        if row is not None and "content = ''" in row[0]:
+            return True
+        if row is not None:
+            cursor.execute("DROP TABLE generations_fts")
+        return self._migrate_search_index(cursor)
+    
+    def unindex_generations(self, cursor: sqlite3.Cursor, generation_ids: List[int]):
+        """
+        Remove generations from the search index, ahead of deleting them
+        
+        Call it in the transaction that deletes the generations: their text
+        is read back from the blobs to tell the contentless index which
+        tokens to drop.
+        """
+        if not self.search_enabled or not generation_ids:
+            return
+        cursor.execute(f"""
+            SELECT g.id, g.file_name, g.summary, sb.codec, sb.data, g.quiz, qb.codec, qb.data
+            FROM generations g
+            LEFT JOIN blobs sb ON sb.hash = g.summary_hash
+            LEFT JOIN blobs qb ON qb.hash = g.quiz_hash
+            WHERE g.id IN ({', '.join('?' for _ in generation_ids)})
+        """, generation_ids)
+        cursor.executemany("""
+            INSERT INTO generations_fts (generations_fts, rowid, summary, quiz, file_name)
+            VALUES ('delete', ?, ?, ?, ?)
+        """, [
+            (row[0],
+             self._resolve_content(row[2], row[3], row[4]),
+             self._resolve_content(row[5], row[6], row[7]),
+             row[1] or "")
+            for row in cursor.fetchall()
+        ])
+    
+    def rebuild_search_index(self, batch_size: int = 500,
+                             progress_callback: Optional[Callable[[int], None]] = None) -> int:
+        """
+        Re-index the text of every generation for full-text search
+        
+        Generations logged while this runs are indexed by log_generation,
+        so only those that existed when it started are re-indexed.
+        
+        Args:
+            batch_size: Generations indexed per transaction
+            progress_callback: Called with the number indexed so far after each batch
+        
+        Returns:
+            int: Number of generations indexed
+        """
+        if not self.search_enabled:
+            return 0
+        
+        with self.transaction() as cursor:
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM generations")
+            max_id = cursor.fetchone()[0]
+            cursor.execute("INSERT INTO generations_fts (generations_fts) VALUES ('delete-all')")
+        
+        indexed = 0
+        last_id = 0
+        while True:
+            with self.transaction() as cursor:
+                cursor.execute("""
+                    SELECT g.id, g.file_name, g.summary, sb.codec, sb.data, g.quiz, qb.codec, qb.data
+                    FROM generations g
+                    LEFT JOIN blobs sb ON sb.hash = g.summary_hash
+                    LEFT JOIN blobs qb ON qb.hash = g.quiz_hash
+                    WHERE g.id > ? AND g.id <= ?
+                    ORDER BY g.id
+                    LIMIT ?
+                """, (last_id, max_id, batch_size))
+                rows = cursor.fetchall()
+                
+                cursor.executemany(
+                    "INSERT INTO generations_fts (rowid, summary, quiz, file_name) VALUES (?, ?, ?, ?)",
+                    [
+                        (row[0],
+                         self._resolve_content(row[2], row[3], row[4]),
+                         self._resolve_content(row[5], row[6], row[7]),
+                         row[1] or "")
+                        for row in rows
+                    ]
+                )
+            
+            indexed += len(rows)
+            if progress_callback:
+                progress_callback(indexed)
+            if len(rows) < batch_size:
+                return indexed
+            last_id = rows[-1][0]
+    
+    def backfill_epoch_columns(self, batch_size: int = 5000,
+                               progress_callback: Optional[Callable[[int], None]] = None) -> int:
+        """
+        Fill the *_epoch columns of rows written before they existed
+        
+        Returns:
+            int: Number of rows updated
+        """
+        updated = 0
+        for table, columns in EPOCH_COLUMNS.items():
+            assignments = ", ".join(
+                f"{column}_epoch = CAST(strftime('%s', {column}) AS INTEGER)" for column in columns
+            )
+            pending = " OR ".join(f"{column}_epoch IS NULL" for column in columns)
+            while True:
+                with self.transaction() as cursor:
+                    cursor.execute(f"""
+                        UPDATE {table} SET {assignments}
+                        WHERE rowid IN (SELECT rowid FROM {table} WHERE {pending} LIMIT ?)
+                    """, (batch_size,))
+                    count = cursor.rowcount
+                updated += count
+                if progress_callback:
+                    progress_callback(updated)
+                if count < batch_size:
+                    break
+        return updated
+    
+    @staticmethod
+    def _add_missing_columns(cursor: sqlite3.Cursor, table: str, columns: Dict[str, str]) -> List[str]:
+        """
+        Add columns that an existing table doesn't have yet
+        
+        Returns:
+            list: Names of the columns that were added
+        """
+        cursor.execute(f"PRAGMA table_info({table})")
+        existing = {row[1] for row in cursor.fetchall()}
+        added = []
+        for name, definition in columns.items():
+            if name not in existing:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+                added.append(name)
+        return added
     
     def get_utc_timestamp(self) -> str:
         """Get current UTC timestamp in ISO format"""
         return datetime.now(timezone.utc).isoformat()
     
+    def get_utc_now(self) -> Tuple[str, int]:
+        """Get current UTC time as (ISO timestamp, integer epoch seconds)"""
+        now = datetime.now(timezone.utc)
+        return now.isoformat(), int(now.timestamp())
+    
+    def _write(self, statements: List[Statement]) -> Optional[Future]:
+        """
+        Commit statements together, or queue them on the write-behind writer
+        
+        Returns:
+            Future or None: The writer's Future for queued statements, None
+                once they are committed
+        """
+        if self.writer:
+            return self.writer.submit(statements)
+        with self.transaction() as cursor:
+            for sql, params in statements:
+                cursor.execute(sql, params)
+        return None
+    
+    def _insert_and_write(self, table: str, columns: List[str], values: tuple,
+                          follow_up: Callable[[int], List[Statement]]) -> int:
+        """
+        Insert a row plus the statements that depend on its id
+        
+        With a write-behind writer the id is taken from the writer's reserved
+        block and everything is queued; otherwise the row is inserted first
+        and its rowid used.
+        
+        Returns:
+            int: Id of the inserted row
+        """
+        sql = f"""
+            INSERT INTO {table} (id, {', '.join(columns)})
+            VALUES ({', '.join('?' for _ in range(len(columns) + 1))})
+        """
+        if self.writer:
+            row_id = self.writer.allocate_id(table)
+            self.writer.submit([(sql, (row_id,) + values)] + follow_up(row_id))
+            return row_id
+        with self.transaction() as cursor:
+            cursor.execute(sql, (None,) + values)
+            row_id = cursor.lastrowid
+            for stmt_sql, params in follow_up(row_id):
+                cursor.execute(stmt_sql, params)
+        return row_id
+    
+    @staticmethod
+    def _blob_statement(text: Optional[str], statements: List[Statement]) -> Optional[str]:
+        """
+        Add the statement storing text as a blob (if it's new) to statements
+        
+        Returns:
+            str or None: Blob hash, or None for empty text
+        """
+        if not text:
+            return None
+        blob_hash = content_hash(text)
+        codec, data = compress_text(text)
+        statements.append((
+            "INSERT OR IGNORE INTO blobs (hash, codec, size, data) VALUES (?, ?, ?, ?)",
+            (blob_hash, codec, len(text), data)
+        ))
+        return blob_hash
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until queued write-behind activity is committed or has failed"""
+        return self.writer.flush(timeout) if self.writer else True
+    
     def create_or_update_session(self, session_id: str, username: Optional[str] = None, 
                                  ip_address: Optional[str] = None, 
                                  user_agent: Optional[str] = None):
-        """Create a new session or update existing one"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        """
+        Create a new session or update existing one
         
-        now = self.get_utc_timestamp()
+        Called on every rerun, so writes are debounced: last_activity is
+        written at most once per heartbeat_interval per session unless the
+        username, IP or user agent changed.
         
-        # Check if session exists
-        cursor.execute("SELECT session_id FROM sessions WHERE session_id = ?", (session_id,))
-        exists = cursor.fetchone()
+        The debounce interval only starts once the write is committed (or
+        queued, with write-behind); a queued write that then fails is
+        forgotten, so the next rerun retries it.
         
-        if exists:
-            # Update last activity
-            cursor.execute("""
-                UPDATE sessions 
-                SET last_activity = ?,
-                    username = COALESCE(?, username),
-                    ip_address = COALESCE(?, ip_address),
-                    user_agent = COALESCE(?, user_agent)
-                WHERE session_id = ?
-            """, (now, username, ip_address, user_agent, session_id))
-        else:
-            # Create new session
-            cursor.execute("""
-                INSERT INTO sessions (session_id, username, ip_address, user_agent, created_at, last_activity)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (session_id, username, ip_address, user_agent, now, now))
+        Returns:
+            bool: True if a write was issued
+        """
+        details = _heartbeat_due(self.db_path, session_id, (username, ip_address, user_agent),
+                                 self.heartbeat_interval)
+        if details is None:
+            return False
+        
+        now, now_epoch = self.get_utc_now()
         
-        conn.commit()
-        conn.close()
+        # Create the session, or update last activity if it exists
+        future = self._write([
+            ("""
+                INSERT INTO sessions (session_id, username, ip_address, user_agent,
+                                      created_at, last_activity, created_at_epoch, last_activity_epoch)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(session_id) DO UPDATE SET
+                    last_activity = excluded.last_activity,
+                    last_activity_epoch = excluded.last_activity_epoch,
+                    username = COALESCE(excluded.username, sessions.username),
+                    ip_address = COALESCE(excluded.ip_address, sessions.ip_address),
+                    user_agent = COALESCE(excluded.user_agent, sessions.user_agent)
+            """, (session_id, username, ip_address, user_agent, now, now, now_epoch, now_epoch)),
+        ])
+        recorded_at = _record_heartbeat(self.db_path, session_id, details, self.heartbeat_interval)
+        if future is not None:
+            future.add_done_callback(
+                lambda f: f.exception() and _forget_heartbeat(self.db_path, session_id, recorded_at)
+            )
+        return True
     
     def log_generation(self, session_id: str, file_name: Optional[str] = None,
                       file_size: Optional[int] = None, content_length: Optional[int] = None,
                       input_method: str = "text", summary: str = "", quiz: str = "",
                       model_used: str = "", debug_mode: bool = False) -> int:
         """Log a content generation event"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        now = self.get_utc_timestamp()
-        
-        cursor.execute("""
-            INSERT INTO generations 
-            (session_id, timestamp, file_name, file_size, content_length, 
-             input_method, summary, quiz, model_used, debug_mode)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (session_id, now, file_name, file_size, content_length,
-              input_method, summary, quiz, model_used, int(debug_mode)))
-        
-        generation_id = cursor.lastrowid
+        now, now_epoch = self.get_utc_now()
         
-        # Update session last activity
-        cursor.execute("""
-            UPDATE sessions SET last_activity = ? WHERE session_id = ?
-        """, (now, session_id))
+        # Summary and quiz text are stored once per distinct content
+        blob_statements = []
+        summary_hash = self._blob_statement(summary, blob_statements)
+        quiz_hash = self._blob_statement(quiz, blob_statements)
         
-        conn.commit()
-        conn.close()
+        def follow_up(generation_id: int) -> List[Statement]:
+            # Update session last activity and counters
+            statements = blob_statements + [
+                ("""
+                    UPDATE sessions
+                    SET last_activity = ?, last_activity_epoch = ?,
+                        generation_count = generation_count + 1
+                    WHERE session_id = ?
+                """, (now, now_epoch, session_id)),
+            ]
+            # Index the text for full-text search in the same transaction
+            if self.search_enabled:
+                statements.append((
+                    "INSERT INTO generations_fts (rowid, summary, quiz, file_name) VALUES (?, ?, ?, ?)",
+                    (generation_id, summary or "", quiz or "", file_name or "")
+                ))
+            return statements
         
-        return generation_id
+        return self._insert_and_write(
+            'generations',
+            ['session_id', 'timestamp', 'timestamp_epoch', 'file_name', 'file_size', 'content_length',
+             'input_method', 'summary_hash', 'quiz_hash', 'model_used', 'debug_mode'],
+            (session_id, now, now_epoch, file_name, file_size, content_length,
+             input_method, summary_hash, quiz_hash, model_used, int(debug_mode)),
+            follow_up
+        )
     
     def log_quiz_result(self, session_id: str, generation_id: int,
                        score: int, total_questions: int, answered_count: int,
-                       user_answers: Dict[str, str]):
-        """Log quiz completion results"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+                       user_answers: Dict[str, str],
+                       answer_key: Optional[Dict[int, str]] = None) -> int:
+        """
+        Log quiz completion results
         
-        now = self.get_utc_timestamp()
+        Args:
+            user_answers: Chosen option per question id
+            answer_key: Correct option per question id; recorded with each
+                answer so per-question statistics don't need the quiz text
+        """
+        now, now_epoch = self.get_utc_now()
         percentage = (score / total_questions * 100) if total_questions > 0 else 0
         
-        cursor.execute("""
-            INSERT INTO quiz_results 
-            (session_id, generation_id, completed_at, score, total_questions, 
-             percentage, answered_count, user_answers)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (session_id, generation_id, now, score, total_questions,
-              percentage, answered_count, json.dumps(user_answers)))
-        
-        # Update session last activity
-        cursor.execute("""
-            UPDATE sessions SET last_activity = ? WHERE session_id = ?
-        """, (now, session_id))
+        def follow_up(result_id: int) -> List[Statement]:
+            # Update session last activity and counters
+            statements = [
+                ("""
+                    UPDATE sessions
+                    SET last_activity = ?, last_activity_epoch = ?, quiz_count = quiz_count + 1,
+                        last_score = ?, last_percentage = ?
+                    WHERE session_id = ?
+                """, (now, now_epoch, score, percentage, session_id)),
+            ]
+            # Per-question answers, in the same transaction
+            for row in self._quiz_answer_rows(result_id, generation_id, user_answers, answer_key):
+                statements.append((QUIZ_ANSWER_INSERT, row))
+            return statements
         
-        conn.commit()
-        conn.close()
+        return self._insert_and_write(
+            'quiz_results',
+            ['session_id', 'generation_id', 'completed_at', 'completed_at_epoch', 'score', 'total_questions',
+             'percentage', 'answered_count', 'user_answers'],
+            (session_id, generation_id, now, now_epoch, score, total_questions,
+             percentage, answered_count, json.dumps(user_answers)),
+            follow_up
+        )
     
+    @cached_query
     def get_session_info(self, session_id: str) -> Optional[Dict[str, Any]]:
-        """Get session information"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT session_id, username, ip_address, user_agent, created_at, last_activity
-            FROM sessions WHERE session_id = ?
-        """, (session_id,))
-        
-        row = cursor.fetchone()
-        conn.close()
+        """Get session information, including its generation and quiz counters"""
+        with self.cursor() as cursor:
+            cursor.execute("""
+                SELECT session_id, username, ip_address, user_agent, created_at, last_activity,
+                       generation_count, quiz_count
+                FROM sessions WHERE session_id = ?
+            """, (session_id,))
+            
+            row = cursor.fetchone()
         
         if row:
             return {
@@ -206,94 +1696,181 @@ class DatabaseManager:
                 'ip_address': row[2],
                 'user_agent': row[3],
                 'created_at': row[4],
-                'last_activity': row[5]
+                'last_activity': row[5],
+                'generation_count': row[6] or 0,
+                'quiz_count': row[7] or 0
             }
         return None
     
+    @staticmethod
+    def _session_generation(row: tuple) -> Dict[str, Any]:
+        """Convert a SESSION_GENERATION_COLUMNS row to a dict"""
+        return {
+            'id': row[0],
+            'timestamp': row[1],
+            'file_name': row[2],
+            'file_size': row[3],
+            'content_length': row[4],
+            'input_method': row[5],
+            'model_used': row[6],
+            'debug_mode': bool(row[7])
+        }
+    
+    @staticmethod
+    def _session_quiz_result(row: tuple) -> Dict[str, Any]:
+        """Convert a SESSION_QUIZ_RESULT_COLUMNS row to a dict"""
+        return {
+            'id': row[0],
+            'generation_id': row[1],
+            'completed_at': row[2],
+            'score': row[3],
+            'total_questions': row[4],
+            'percentage': row[5],
+            'answered_count': row[6],
+            'file_name': row[7],
+            'model_used': row[8]
+        }
+    
+    @cached_query
     def get_session_generations(self, session_id: str) -> List[Dict[str, Any]]:
         """Get all generations for a session"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT {SESSION_GENERATION_COLUMNS}
+                FROM generations 
+                WHERE session_id = ?
+                ORDER BY timestamp DESC
+            """, (session_id,))
+            
+            rows = cursor.fetchall()
         
-        cursor.execute("""
-            SELECT id, timestamp, file_name, file_size, content_length,
-                   input_method, model_used, debug_mode
-            FROM generations 
-            WHERE session_id = ?
-            ORDER BY timestamp DESC
-        """, (session_id,))
+        return [self._session_generation(row) for row in rows]
+    
+    @cached_query
+    def get_session_generations_page(self, session_id: str, limit: int = 20,
+                                     after: Optional[Tuple[str, int]] = None
+                                     ) -> Tuple[List[Dict[str, Any]], Optional[Tuple[str, int]]]:
+        """
+        Get one page of a session's generations, newest first
         
-        rows = cursor.fetchall()
-        conn.close()
+        Keyset-paginated on (timestamp, id), which the (session_id,
+        timestamp) index covers, so a page costs the same however many
+        generations the session has. Summary and quiz text are not loaded;
+        use get_generation_content for that.
         
-        return [
-            {
-                'id': row[0],
-                'timestamp': row[1],
-                'file_name': row[2],
-                'file_size': row[3],
-                'content_length': row[4],
-                'input_method': row[5],
-                'model_used': row[6],
-                'debug_mode': bool(row[7])
-            }
-            for row in rows
-        ]
+        Args:
+            session_id: Session to list
+            limit: Page size
+            after: Cursor returned with the previous page, or None for the first page
+        
+        Returns:
+            tuple: (generations, cursor for the next page or None if this is the last)
+        """
+        keyset = "AND (timestamp, id) < (?, ?)" if after else ""
+        with self.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT {SESSION_GENERATION_COLUMNS}
+                FROM generations
+                WHERE session_id = ? {keyset}
+                ORDER BY timestamp DESC, id DESC
+                LIMIT ?
+            """, (session_id,) + tuple(after or ()) + (limit + 1,))
+            
+            rows = cursor.fetchall()
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = (rows[-1][1], rows[-1][0])
+        return [self._session_generation(row) for row in rows], next_cursor
     
+    @cached_query
     def get_session_quiz_results(self, session_id: str) -> List[Dict[str, Any]]:
         """Get all quiz results for a session"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT {SESSION_QUIZ_RESULT_COLUMNS}
+                FROM quiz_results qr
+                JOIN generations g ON qr.generation_id = g.id
+                WHERE qr.session_id = ?
+                ORDER BY qr.completed_at DESC
+            """, (session_id,))
+            
+            rows = cursor.fetchall()
         
-        cursor.execute("""
-            SELECT qr.id, qr.generation_id, qr.completed_at, qr.score, 
-                   qr.total_questions, qr.percentage, qr.answered_count,
-                   g.file_name, g.model_used
-            FROM quiz_results qr
-            JOIN generations g ON qr.generation_id = g.id
-            WHERE qr.session_id = ?
-            ORDER BY qr.completed_at DESC
-        """, (session_id,))
-        
-        rows = cursor.fetchall()
-        conn.close()
+        return [self._session_quiz_result(row) for row in rows]
+    
+    @cached_query
+    def get_session_quiz_results_page(self, session_id: str, limit: int = 20,
+                                      after: Optional[Tuple[str, int]] = None
+                                      ) -> Tuple[List[Dict[str, Any]], Optional[Tuple[str, int]]]:
+        """
+        Get one page of a session's quiz results, newest first
         
-        return [
-            {
-                'id': row[0],
-                'generation_id': row[1],
-                'completed_at': row[2],
-                'score': row[3],
-                'total_questions': row[4],
-                'percentage': row[5],
-                'answered_count': row[6],
-                'file_name': row[7],
-                'model_used': row[8]
-            }
-            for row in rows
-        ]
+        Keyset-paginated on (completed_at, id) like get_session_generations_page.
+        
+        Returns:
+            tuple: (quiz results, cursor for the next page or None if this is the last)
+        """
+        keyset = "AND (qr.completed_at, qr.id) < (?, ?)" if after else ""
+        with self.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT {SESSION_QUIZ_RESULT_COLUMNS}
+                FROM quiz_results qr
+                JOIN generations g ON qr.generation_id = g.id
+                WHERE qr.session_id = ? {keyset}
+                ORDER BY qr.completed_at DESC, qr.id DESC
+                LIMIT ?
+            """, (session_id,) + tuple(after or ()) + (limit + 1,))
+            
+            rows = cursor.fetchall()
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = (rows[-1][2], rows[-1][0])
+        return [self._session_quiz_result(row) for row in rows], next_cursor
     
     def get_all_sessions_summary(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Get summary of all sessions for admin view"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        sessions, _ = self.get_sessions_page(limit=limit)
+        return sessions
+    
+    @cached_query
+    def get_sessions_page(self, search: str = "", limit: int = 100,
+                          after: Optional[Tuple[str, str]] = None
+                          ) -> Tuple[List[Dict[str, Any]], Optional[Tuple[str, str]]]:
+        """
+        Get one page of sessions, most recently active first
         
-        cursor.execute("""
-            SELECT s.session_id, s.username, s.ip_address, s.created_at, s.last_activity,
-                   COUNT(DISTINCT g.id) as generation_count,
-                   COUNT(DISTINCT qr.id) as quiz_count
-            FROM sessions s
-            LEFT JOIN generations g ON s.session_id = g.session_id
-            LEFT JOIN quiz_results qr ON s.session_id = qr.session_id
-            GROUP BY s.session_id
-            ORDER BY s.last_activity DESC
-            LIMIT ?
-        """, (limit,))
+        Uses keyset pagination on (last_activity, session_id), so every page
+        is an index seek no matter how deep it is. A search matches the start
+        of the session ID, username or IP address (case-insensitive) using
+        their NOCASE indexes.
         
-        rows = cursor.fetchall()
-        conn.close()
+        Args:
+            search: Prefix to match, or "" for all sessions
+            limit: Page size
+            after: Cursor returned with the previous page, or None for the first page
         
-        return [
+        Returns:
+            tuple: (sessions, cursor for the next page or None if this is the last)
+        """
+        with self.cursor() as cursor:
+            # Counters are kept on sessions, so no joins are needed
+            cursor.execute(*self._sessions_page_query(
+                "session_id, username, ip_address, created_at, last_activity, "
+                "generation_count, quiz_count, last_percentage",
+                search, limit, after
+            ))
+            rows = cursor.fetchall()
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = (rows[-1][4], rows[-1][0])
+        
+        sessions = [
             {
                 'session_id': row[0],
                 'username': row[1],
@@ -301,49 +1878,654 @@ class DatabaseManager:
                 'created_at': row[3],
                 'last_activity': row[4],
                 'generation_count': row[5],
-                'quiz_count': row[6]
+                'quiz_count': row[6],
+                'last_percentage': row[7]
             }
             for row in rows
         ]
+        return sessions, next_cursor
     
-    def get_statistics(self) -> Dict[str, Any]:
-        """Get overall statistics"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    @cached_query
+    def get_sessions_columns(self, search: str = "", limit: int = 100,
+                             after: Optional[Tuple[str, str]] = None
+                             ) -> Tuple[Dict[str, tuple], Optional[Tuple[str, str]]]:
+        """
+        Get one page of sessions as columns, for building a DataFrame
         
-        # Total sessions
-        cursor.execute("SELECT COUNT(*) FROM sessions")
-        total_sessions = cursor.fetchone()[0]
+        Same page and cursor as get_sessions_page, but the rows are
+        transposed straight from the cursor into one tuple per column, and
+        created_at/last_activity are integer epoch seconds (UTC) instead of
+        ISO strings, so no per-row dicts or date parsing are needed.
         
-        # Total generations
-        cursor.execute("SELECT COUNT(*) FROM generations")
-        total_generations = cursor.fetchone()[0]
+        Returns:
+            tuple: ({column: values} for SESSION_FRAME_COLUMNS, next page cursor or None)
+        """
+        rows, next_cursor = self.get_sessions_page_rows(search, limit, after)
+        return sessions_rows_to_columns(rows), next_cursor
+    
+    @cached_query
+    def get_sessions_page_rows(self, search: str = "", limit: int = 100,
+                               after: Optional[Tuple[str, str]] = None
+                               ) -> Tuple[List[tuple], Optional[Tuple[str, str]]]:
+        """
+        Get one page of sessions as raw rows (the page behind get_sessions_columns)
         
-        # Total quiz completions
-        cursor.execute("SELECT COUNT(*) FROM quiz_results")
-        total_quiz_completions = cursor.fetchone()[0]
+        Rows hold the SESSION_FRAME_COLUMNS followed by the ISO last_activity
+        the keyset cursor is built from, so pages of several databases can
+        be merged with sharding.merge_keyset_pages before transposing.
         
-        # Average quiz score
-        cursor.execute("SELECT AVG(percentage) FROM quiz_results")
-        avg_score = cursor.fetchone()[0] or 0
+        Returns:
+            tuple: (rows, next page cursor or None)
+        """
+        with self.cursor() as cursor:
+            cursor.execute(*self._sessions_page_query(
+                "session_id, username, ip_address, created_at_epoch, last_activity_epoch, "
+                "generation_count, quiz_count, last_percentage, last_activity",
+                search, limit, after
+            ))
+            rows = cursor.fetchall()
         
-        # Active sessions (last 24 hours)
-        cursor.execute("""
-            SELECT COUNT(*) FROM sessions 
-            WHERE datetime(last_activity) > datetime('now', '-1 day')
-        """)
-        active_sessions_24h = cursor.fetchone()[0]
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = (rows[-1][-1], rows[-1][0])
+        return rows, next_cursor
+    
+    @staticmethod
+    def _sessions_page_query(columns: str, search: str, limit: int,
+                             after: Optional[Tuple[str, str]]) -> Tuple[str, List[Any]]:
+        """Build the keyset-paginated sessions query (fetches limit + 1 rows)"""
+        clauses = []
+        params: List[Any] = []
+        
+        search = search.strip()
+        if search:
+            pattern = search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            clauses.append("""(session_id LIKE ? ESCAPE '\\'
+                                OR username LIKE ? ESCAPE '\\'
+                                OR ip_address LIKE ? ESCAPE '\\')""")
+            params.extend([pattern, pattern, pattern])
+        if after:
+            clauses.append("(last_activity, session_id) < (?, ?)")
+            params.extend(after)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        
+        return f"""
+            SELECT {columns}
+            FROM sessions
+            {where}
+            ORDER BY last_activity DESC, session_id DESC
+            LIMIT ?
+        """, params + [limit + 1]
+    
+    def rebuild_session_counters(self, batch_size: int = 1000,
+                                 progress_callback: Optional[Callable[[int], None]] = None) -> int:
+        """
+        Recompute per-session generation/quiz counters and last score
+        
+        Used to backfill the counters on existing databases or repair them.
+        Sessions are processed in batches so writers are only blocked briefly.
         
-        conn.close()
+        Returns:
+            int: Number of sessions updated
+        """
+        updated = 0
+        last_session_id = ""
+        while True:
+            with self.transaction() as cursor:
+                cursor.execute("""
+                    SELECT session_id FROM sessions
+                    WHERE session_id > ?
+                    ORDER BY session_id
+                    LIMIT ?
+                """, (last_session_id, batch_size))
+                session_ids = [row[0] for row in cursor.fetchall()]
+                if not session_ids:
+                    return updated
+                
+                cursor.executemany("""
+                    UPDATE sessions SET
+                        generation_count = (SELECT COUNT(*) FROM generations g
+                                            WHERE g.session_id = sessions.session_id),
+                        quiz_count = (SELECT COUNT(*) FROM quiz_results qr
+                                      WHERE qr.session_id = sessions.session_id),
+                        last_score = (SELECT qr.score FROM quiz_results qr
+                                      WHERE qr.session_id = sessions.session_id
+                                      ORDER BY qr.completed_at DESC, qr.id DESC LIMIT 1),
+                        last_percentage = (SELECT qr.percentage FROM quiz_results qr
+                                           WHERE qr.session_id = sessions.session_id
+                                           ORDER BY qr.completed_at DESC, qr.id DESC LIMIT 1)
+                    WHERE session_id = ?
+                """, [(session_id,) for session_id in session_ids])
+            
+            updated += len(session_ids)
+            if progress_callback:
+                progress_callback(updated)
+            last_session_id = session_ids[-1]
+    
+    @cached_query
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get overall statistics
+        
+        score_sum and score_count (over quiz results with a percentage) are
+        included so statistics of several databases can be combined exactly.
+        """
+        with self.cursor() as cursor:
+            # Running totals maintained by triggers
+            cursor.execute("""
+                SELECT total_sessions, total_generations, total_quiz_completions,
+                       score_sum, score_count
+                FROM activity_stats WHERE id = 1
+            """)
+            row = cursor.fetchone() or (0, 0, 0, 0, 0)
+            total_sessions, total_generations, total_quiz_completions, score_sum, score_count = row
+            avg_score = (score_sum / score_count) if score_count else 0
+            
+            # Active sessions (last 24 hours), an index range scan on the epoch column
+            cursor.execute("""
+                SELECT COUNT(*) FROM sessions 
+                WHERE last_activity_epoch > ?
+            """, (int(time.time()) - 24 * 3600,))
+            active_sessions_24h = cursor.fetchone()[0]
         
         return {
             'total_sessions': total_sessions,
             'total_generations': total_generations,
             'total_quiz_completions': total_quiz_completions,
             'average_quiz_score': round(avg_score, 2),
+            'score_sum': score_sum,
+            'score_count': score_count,
             'active_sessions_24h': active_sessions_24h
         }
     
+    def get_activity_after(self, cursor: Optional[Dict[str, Dict[str, Any]]] = None, limit: int = 100
+                           ) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+        """
+        Get generations and quiz results logged after a feed cursor
+        
+        For live tailing. Rows don't become visible in id order (ids are
+        reserved before the rows commit), so the feed follows (epoch, id)
+        and keeps re-reading the last LIVE_FEED_LAG_SECONDS, skipping rows
+        it has already returned. Per table the cursor holds the watermark
+        up to which everything was returned ('epoch', 'id') and the ids
+        returned past it ('seen'). Each poll is one index range scan per
+        table over that window, plus a session lookup per row. Not
+        query-cached.
+        
+        Args:
+            cursor: As returned by the previous call; None starts the feed
+                with the latest `limit` rows of each table
+            limit: Maximum new rows per table per call (the rest come next call)
+        
+        Returns:
+            tuple: (items oldest first, cursor for the next call). Items have
+                type ('generation' or 'quiz_result'), id, session_id,
+                username, timestamp and a short description.
+        """
+        cursor = dict(cursor or {})
+        cutoff_epoch = int(time.time()) - LIVE_FEED_LAG_SECONDS
+        items = []
+        # table -> (item type, id column, epoch column, query)
+        queries = {
+            'generations': ('generation', 'g.id', 'g.timestamp_epoch', """
+                SELECT g.id, g.session_id, s.username, g.timestamp,
+                       COALESCE(g.file_name, g.input_method) || ' · ' || COALESCE(g.model_used, ''),
+                       g.timestamp_epoch
+                FROM generations g
+                LEFT JOIN sessions s ON s.session_id = g.session_id
+            """),
+            'quiz_results': ('quiz_result', 'qr.id', 'qr.completed_at_epoch', """
+                SELECT qr.id, qr.session_id, s.username, qr.completed_at,
+                       qr.score || '/' || qr.total_questions || ' (' || ROUND(qr.percentage, 1) || '%)',
+                       qr.completed_at_epoch
+                FROM quiz_results qr
+                LEFT JOIN sessions s ON s.session_id = qr.session_id
+            """),
+        }
+        
+        with self.cursor() as db_cursor:
+            for table, (item_type, id_column, epoch_column, select) in queries.items():
+                state = cursor.get(table)
+                if state is None:
+                    db_cursor.execute(f"""
+                        {select} WHERE {epoch_column} IS NOT NULL
+                        ORDER BY {epoch_column} DESC, {id_column} DESC LIMIT ?
+                    """, (limit,))
+                    new_rows = db_cursor.fetchall()[::-1]
+                    # The feed starts at the oldest of them
+                    watermark = (new_rows[0][5], new_rows[0][0]) if new_rows else (cutoff_epoch, 0)
+                    window = new_rows[1:]
+                    returned = {row[0] for row in window}
+                else:
+                    watermark = (state['epoch'], state['id'])
+                    seen = set(state['seen'])
+                    # Enough rows to hold every seen one plus `limit` new ones
+                    db_cursor.execute(f"""
+                        {select} WHERE ({epoch_column}, {id_column}) > (?, ?)
+                        ORDER BY {epoch_column}, {id_column} LIMIT ?
+                    """, watermark + (limit + len(seen),))
+                    window = db_cursor.fetchall()
+                    new_rows = [row for row in window if row[0] not in seen][:limit]
+                    returned = seen | {row[0] for row in new_rows}
+                
+                # Move the watermark over the returned rows that are past the lag window
+                settled = set()
+                for row in window:
+                    if row[0] not in returned or row[5] >= cutoff_epoch:
+                        break
+                    watermark = (row[5], row[0])
+                    settled.add(row[0])
+                cursor[table] = {'epoch': watermark[0], 'id': watermark[1],
+                                 'seen': sorted(returned - settled)}
+                
+                items.extend(
+                    {
+                        'type': item_type,
+                        'id': row[0],
+                        'session_id': row[1],
+                        'username': row[2],
+                        'timestamp': row[3],
+                        'description': row[4]
+                    }
+                    for row in new_rows
+                )
+        
+        items.sort(key=lambda item: item['timestamp'])
+        return items, cursor
+    
+    def _generation_filter(self, start: Optional[str] = None, end: Optional[str] = None,
+                           session_ids: Optional[List[str]] = None) -> Tuple[str, List[Any]]:
+        """Build the WHERE clause shared by the bulk generation queries"""
+        clauses = []
+        params: List[Any] = []
+        if start:
+            clauses.append("timestamp >= ?")
+            params.append(start)
+        if end:
+            clauses.append("timestamp < ?")
+            params.append(end)
+        if session_ids:
+            clauses.append(f"session_id IN ({', '.join('?' for _ in session_ids)})")
+            params.extend(session_ids)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+    
+    def count_generations(self, start: Optional[str] = None, end: Optional[str] = None,
+                          session_ids: Optional[List[str]] = None) -> int:
+        """Count generations matching a date range and/or session filter"""
+        where, params = self._generation_filter(start, end, session_ids)
+        with self.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM generations {where}", params)
+            count = cursor.fetchone()[0]
+        return count
+    
+    def iter_generations(self, start: Optional[str] = None, end: Optional[str] = None,
+                         session_ids: Optional[List[str]] = None,
+                         chunk_size: int = 200) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate generations with their summary and quiz text
+        
+        Rows are read in keyset-paginated chunks, each a separate short
+        query, so large date ranges never have to be held in memory and no
+        read transaction stays open while the caller works (e.g. renders
+        PDFs), which would hold up WAL checkpoints.
+        
+        Args:
+            start: Inclusive ISO timestamp lower bound
+            end: Exclusive ISO timestamp upper bound
+            session_ids: Only include these sessions
+            chunk_size: Number of rows fetched per query
+        """
+        where, params = self._generation_filter(start, end, session_ids)
+        keyset_where = f"{where} AND id > ?" if where else "WHERE id > ?"
+        last_id = 0
+        while True:
+            with self.cursor() as cursor:
+                cursor.execute(f"""
+                    SELECT g.id, g.session_id, g.timestamp, g.file_name, g.model_used,
+                           g.summary, sb.codec, sb.data, g.quiz, qb.codec, qb.data
+                    FROM (SELECT * FROM generations {keyset_where} ORDER BY id LIMIT ?) g
+                    LEFT JOIN blobs sb ON sb.hash = g.summary_hash
+                    LEFT JOIN blobs qb ON qb.hash = g.quiz_hash
+                    ORDER BY g.id
+                """, params + [last_id, chunk_size])
+                rows = cursor.fetchall()
+            
+            for row in rows:
+                yield {
+                    'id': row[0],
+                    'session_id': row[1],
+                    'timestamp': row[2],
+                    'file_name': row[3],
+                    'model_used': row[4],
+                    'summary': self._resolve_content(row[5], row[6], row[7]),
+                    'quiz': self._resolve_content(row[8], row[9], row[10])
+                }
+            if len(rows) < chunk_size:
+                return
+            last_id = rows[-1][0]
+    
+    @staticmethod
+    def _resolve_content(inline: Optional[str], codec: Optional[str], data: Optional[bytes]) -> str:
+        """Get generation text from its blob, or from the legacy inline column"""
+        if data is not None:
+            return decompress_text(codec, data)
+        return inline or ""
+    
+    def get_generation_content(self, generation_id: int) -> Optional[Dict[str, str]]:
+        """Get the summary and quiz text of a generation"""
+        with self.cursor() as cursor:
+            cursor.execute("""
+                SELECT g.summary, sb.codec, sb.data, g.quiz, qb.codec, qb.data
+                FROM generations g
+                LEFT JOIN blobs sb ON sb.hash = g.summary_hash
+                LEFT JOIN blobs qb ON qb.hash = g.quiz_hash
+                WHERE g.id = ?
+            """, (generation_id,))
+            row = cursor.fetchone()
+        
+        if row is None:
+            return None
+        return {
+            'summary': self._resolve_content(row[0], row[1], row[2]),
+            'quiz': self._resolve_content(row[3], row[4], row[5])
+        }
+    
+    def migrate_inline_content(self, batch_size: int = 500,
+                               progress_callback: Optional[Callable[[int], None]] = None) -> int:
+        """
+        Move inline summary/quiz text of older generations into blobs
+        
+        Runs in small batches so writers aren't blocked for long. The freed
+        pages are reused by new rows; run VACUUM to shrink the file itself.
+        
+        Returns:
+            int: Number of generations migrated
+        """
+        migrated = 0
+        while True:
+            with self.transaction() as cursor:
+                cursor.execute("""
+                    SELECT id, summary, quiz FROM generations
+                    WHERE summary_hash IS NULL AND quiz_hash IS NULL
+                      AND (summary IS NOT NULL OR quiz IS NOT NULL)
+                    LIMIT ?
+                """, (batch_size,))
+                rows = cursor.fetchall()
+                
+                for generation_id, summary, quiz in rows:
+                    statements: List[Statement] = []
+                    summary_hash = self._blob_statement(summary, statements)
+                    quiz_hash = self._blob_statement(quiz, statements)
+                    for sql, params in statements:
+                        cursor.execute(sql, params)
+                    cursor.execute("""
+                        UPDATE generations
+                        SET summary_hash = ?, quiz_hash = ?, summary = NULL, quiz = NULL
+                        WHERE id = ?
+                    """, (summary_hash, quiz_hash, generation_id))
+            
+            migrated += len(rows)
+            if progress_callback:
+                progress_callback(migrated)
+            if len(rows) < batch_size:
+                return migrated
+    
+    def search_generations(self, query: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Full-text search over generation summaries, quizzes and file names
+        
+        Every word in the query must match (word stems, case-insensitive);
+        results are ranked by BM25 relevance. Only the returned generations
+        have their text loaded, for the snippet.
+        
+        Args:
+            query: Free-text search words
+            limit: Maximum number of results
+        
+        Returns:
+            list: Matching generations, best first, with a highlighted snippet
+        """
+        terms = SEARCH_TERM_PATTERN.findall(query)
+        if not terms or not self.search_enabled:
+            return []
+        match = " ".join(f'"{term}"' for term in terms)
+        
+        with self.cursor() as cursor:
+            cursor.execute("""
+                SELECT g.id, g.session_id, g.timestamp, g.file_name, g.model_used, f.rank,
+                       g.summary, sb.codec, sb.data, g.quiz, qb.codec, qb.data
+                FROM (
+                    SELECT rowid, rank FROM generations_fts
+                    WHERE generations_fts MATCH ?
+                    ORDER BY rank
+                    LIMIT ?
+                ) f
+                JOIN generations g ON g.id = f.rowid
+                LEFT JOIN blobs sb ON sb.hash = g.summary_hash
+                LEFT JOIN blobs qb ON qb.hash = g.quiz_hash
+                ORDER BY f.rank
+            """, (match, limit))
+            rows = cursor.fetchall()
+        
+        results = []
+        seen = set()
+        for row in rows:
+            # A generation logged during a rebuild can be indexed twice
+            if row[0] in seen:
+                continue
+            seen.add(row[0])
+            texts = [self._resolve_content(row[6], row[7], row[8]),
+                     self._resolve_content(row[9], row[10], row[11]),
+                     row[3] or ""]
+            results.append({
+                'id': row[0],
+                'session_id': row[1],
+                'timestamp': row[2],
+                'file_name': row[3],
+                'model_used': row[4],
+                'snippet': build_snippet(texts, terms),
+                'rank': row[5]
+            })
+        
+        return results
+    
+    def get_question_stats(self, generation_id: int) -> List[Dict[str, Any]]:
+        """
+        Get difficulty and answer distribution for each question of a quiz
+        
+        Returns:
+            list: Per question: attempts, answered, correct, correct_rate
+                (None if correctness is unknown) and option_counts {option: count}
+        """
+        with self.cursor() as cursor:
+            cursor.execute("""
+                SELECT question_id, chosen, COUNT(*), SUM(is_correct), COUNT(is_correct)
+                FROM quiz_answers
+                WHERE generation_id = ?
+                GROUP BY question_id, chosen
+                ORDER BY question_id, chosen
+            """, (generation_id,))
+            rows = cursor.fetchall()
+        
+        stats: Dict[int, Dict[str, Any]] = {}
+        for question_id, chosen, count, correct, graded in rows:
+            question = stats.setdefault(question_id, {
+                'question_id': question_id,
+                'attempts': 0,
+                'answered': 0,
+                'correct': 0,
+                'graded': 0,
+                'option_counts': {}
+            })
+            question['attempts'] += count
+            question['correct'] += correct or 0
+            question['graded'] += graded
+            if chosen is not None:
+                question['answered'] += count
+                question['option_counts'][chosen] = count
+        
+        for question in stats.values():
+            graded = question.pop('graded')
+            question['correct_rate'] = question['correct'] / graded if graded else None
+        return list(stats.values())
+    
+    def get_hardest_questions(self, limit: int = 20, min_attempts: int = 5) -> List[Dict[str, Any]]:
+        """
+        Get the questions answered correctly least often, across all quizzes
+        
+        Args:
+            limit: Maximum number of questions
+            min_attempts: Ignore questions graded fewer times than this
+        
+        Returns:
+            list: generation_id, question_id, attempts, correct, correct_rate
+        """
+        with self.cursor() as cursor:
+            cursor.execute("""
+                SELECT generation_id, question_id, COUNT(is_correct), SUM(is_correct),
+                       AVG(is_correct)
+                FROM quiz_answers
+                GROUP BY generation_id, question_id
+                HAVING COUNT(is_correct) >= ?
+                ORDER BY AVG(is_correct), COUNT(is_correct) DESC
+                LIMIT ?
+            """, (min_attempts, limit))
+            rows = cursor.fetchall()
+        
+        return [
+            {
+                'generation_id': row[0],
+                'question_id': row[1],
+                'attempts': row[2],
+                'correct': row[3],
+                'correct_rate': row[4]
+            }
+            for row in rows
+        ]
+    
+    def iter_activity_chunks(self, table: str, start_epoch: Optional[int] = None,
+                             end_epoch: Optional[int] = None, after: Optional[Tuple[int, Any]] = None,
+                             chunk_size: int = 1000) -> Iterator[Tuple[Tuple[int, Any], List[Dict[str, Any]]]]:
+        """
+        Iterate all rows of an activity table in keyset-paginated chunks
+        
+        Rows are read in (timestamp, key) order, the key being the session
+        ID or the row id, each chunk a separate short query on the table's
+        epoch index continuing after the last row. No read transaction is
+        held open between chunks and memory use stays constant. Unlike
+        rowids, which sessions reuse once older ones are archived, the
+        cursor can't skip rows: new activity sorts after it. Rows still
+        waiting for the epoch column backfill (migration EPOCH_MIGRATION)
+        are not included.
+        
+        Args:
+            table: 'sessions', 'generations' or 'quiz_results'
+            start_epoch: Inclusive lower bound on the row's own timestamp
+            end_epoch: Exclusive upper bound on the row's own timestamp
+            after: Resume after this cursor
+            chunk_size: Rows per chunk
+        
+        Yields:
+            tuple: ((epoch, key) cursor of the last row in the chunk, list of row dicts)
+        """
+        time_column = ACTIVITY_EXPORT_TIME_COLUMNS[table]
+        # The key comes first in each query and the epoch last
+        if table == 'sessions':
+            key_column = 'session_id'
+            select = f"""
+                SELECT session_id, username, ip_address, user_agent, created_at, last_activity,
+                       generation_count, quiz_count, last_score, last_percentage, {time_column}
+                FROM sessions
+            """
+        elif table == 'generations':
+            key_column = 'g.id'
+            time_column = f"g.{time_column}"
+            select = f"""
+                SELECT g.id, g.session_id, g.timestamp, g.file_name, g.file_size, g.content_length,
+                       g.input_method, g.model_used, g.debug_mode,
+                       g.summary, sb.codec, sb.data, g.quiz, qb.codec, qb.data, {time_column}
+                FROM generations g
+                LEFT JOIN blobs sb ON sb.hash = g.summary_hash
+                LEFT JOIN blobs qb ON qb.hash = g.quiz_hash
+            """
+        else:
+            key_column = 'id'
+            select = f"""
+                SELECT id, session_id, generation_id, completed_at, score, total_questions,
+                       percentage, answered_count, user_answers, {time_column}
+                FROM quiz_results
+            """
+        
+        clauses = [f"{time_column} IS NOT NULL"]
+        params: List[Any] = []
+        if start_epoch is not None:
+            clauses.append(f"{time_column} >= ?")
+            params.append(start_epoch)
+        if end_epoch is not None:
+            clauses.append(f"{time_column} < ?")
+            params.append(end_epoch)
+        time_filter = " AND ".join(clauses)
+        
+        while True:
+            keyset = f"AND ({time_column}, {key_column}) > (?, ?)" if after else ""
+            with self.cursor() as cursor:
+                cursor.execute(f"""
+                    {select}
+                    WHERE {time_filter} {keyset}
+                    ORDER BY {time_column}, {key_column}
+                    LIMIT ?
+                """, params + list(after or ()) + [chunk_size])
+                rows = cursor.fetchall()
+            if not rows:
+                return
+            after = (rows[-1][-1], rows[-1][0])
+            yield after, [self._activity_record(table, row) for row in rows]
+            if len(rows) < chunk_size:
+                return
+    
+    def _activity_record(self, table: str, row: tuple) -> Dict[str, Any]:
+        """Turn a row from iter_activity_chunks' queries into an export record"""
+        if table == 'sessions':
+            return {
+                'session_id': row[0],
+                'username': row[1],
+                'ip_address': row[2],
+                'user_agent': row[3],
+                'created_at': row[4],
+                'last_activity': row[5],
+                'generation_count': row[6],
+                'quiz_count': row[7],
+                'last_score': row[8],
+                'last_percentage': row[9]
+            }
+        if table == 'generations':
+            return {
+                'id': row[0],
+                'session_id': row[1],
+                'timestamp': row[2],
+                'file_name': row[3],
+                'file_size': row[4],
+                'content_length': row[5],
+                'input_method': row[6],
+                'model_used': row[7],
+                'debug_mode': bool(row[8]),
+                'summary': self._resolve_content(row[9], row[10], row[11]),
+                'quiz': self._resolve_content(row[12], row[13], row[14])
+            }
+        return {
+            'id': row[0],
+            'session_id': row[1],
+            'generation_id': row[2],
+            'completed_at': row[3],
+            'score': row[4],
+            'total_questions': row[5],
+            'percentage': row[6],
+            'answered_count': row[7],
+            'user_answers': json.loads(row[8]) if row[8] else {}
+        }
+    
     def export_session_data(self, session_id: str, output_path: str):
         """Export all data for a specific session to JSON"""
         session_info = self.get_session_info(session_id)
@@ -364,3 +2546,24 @@ class DatabaseManager:
             json.dump(data, f, indent=2, ensure_ascii=False)
         
         return True
+
+
+# Pending migration backfills are picked up by a background job this often
+BACKFILL_INTERVAL = 600.0
+
+
+def run_scheduled_backfills(db_path: str = "study_assistant.db",
+                            interval: float = BACKFILL_INTERVAL) -> bool:
+    """
+    Start a background run of pending migration backfills if none ran in the last interval seconds
+
+    Cheap to call on every rerun; `manage_db.py migrate` runs them in the
+    foreground instead.
+
+    Returns:
+        bool: True if a run was started
+    """
+    return run_in_background_if_due(
+        f"backfills:{os.path.abspath(db_path)}", interval,
+        lambda: DatabaseManager(db_path).run_backfills()
+    )
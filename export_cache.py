@@ -0,0 +1,88 @@
+"""
+Export cache for Study Assistant
+Keeps rendered download payloads in memory so they are only built on request
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+from database import content_hash
+
+
+def answers_hash(user_answers: Optional[Dict]) -> str:
+    """Get a stable hash of a user answers dict (order independent)"""
+    if not user_answers:
+        return ""
+    items = sorted((str(k), v) for k, v in user_answers.items())
+    return content_hash(json.dumps(items))
+
+
+def make_export_key(kind: str, summary: str, quiz: str,
+                    user_answers: Optional[Dict] = None) -> Tuple[str, str, str, str, str]:
+    """
+    Build the cache key for an export
+
+    Reports carry the time they were rendered, so the key includes today's
+    date: a cached report is reused for the rest of the day (showing the
+    time of its first rendering), never across days.
+
+    Args:
+        kind: Export type, e.g. 'pdf' or 'txt'
+        summary: Summary text
+        quiz: Quiz questions text
+        user_answers: Submitted answers, or None for a plain export
+
+    Returns:
+        tuple: (kind, summary hash, quiz hash, answers hash, date)
+    """
+    return (kind, content_hash(summary or ""), content_hash(quiz or ""), answers_hash(user_answers),
+            date.today().isoformat())
+
+
+class ExportCache:
+    """Thread-safe LRU cache of rendered export payloads"""
+
+    def __init__(self, max_entries: int = 64):
+        """Initialize an empty cache holding at most max_entries payloads"""
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        """Get a cached payload and mark it as recently used"""
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key: Hashable, payload: bytes):
+        """Store a payload, evicting the least recently used entries"""
+        with self._lock:
+            self._entries[key] = payload
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_build(self, key: Hashable, builder: Callable[[], bytes]) -> bytes:
+        """Get a cached payload, building and storing it on a miss"""
+        payload = self.get(key)
+        if payload is None:
+            payload = builder()
+            self.put(key, payload)
+        return payload
+
+    def clear(self):
+        """Drop all cached payloads"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Process-wide cache shared by all Streamlit sessions
+export_cache = ExportCache()
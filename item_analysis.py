@@ -0,0 +1,230 @@
+"""
+Item analysis for Study Assistant
+Question difficulty, discrimination and distractor statistics over recorded quiz answers
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from database import DatabaseManager, cached_query
+
+# Answer options, in the order of the option columns below
+OPTIONS = ['a', 'b', 'c', 'd']
+
+# Thresholds for flagging questions
+EASY_P_VALUE = 0.9          # answered correctly by more than this share
+HARD_P_VALUE = 0.3          # answered correctly by less than this share
+MIN_DISCRIMINATION = 0.2    # item-rest correlation below this separates students poorly
+
+# Rows fetched per round trip when loading answers
+LOAD_CHUNK_SIZE = 50000
+
+# Graded answers with options as indexes into OPTIONS (-1 for unanswered)
+ANSWER_COLUMNS = """
+    result_id, generation_id, question_id,
+    COALESCE(instr(?, lower(chosen)), 0) - 1,
+    COALESCE(instr(?, lower(correct_key)), 0) - 1,
+    is_correct
+"""
+
+
+@dataclass
+class AnswerArrays:
+    """
+    Graded quiz answers as parallel arrays, one entry per (quiz result, question)
+
+    This is the results x questions answer matrix of every quiz in
+    coordinate form, so quizzes of different lengths fit in one set of
+    arrays and statistics are computed for all of them at once.
+    """
+
+    result_id: np.ndarray       # int64
+    generation_id: np.ndarray   # int64
+    question_id: np.ndarray     # int64
+    chosen: np.ndarray          # int8 index into OPTIONS, -1 if unanswered
+    correct: np.ndarray         # int8 index of the answer key
+    is_correct: np.ndarray      # int8, 0 or 1
+
+    def __len__(self) -> int:
+        return len(self.result_id)
+
+
+@cached_query
+def _load_shard_answers(db: DatabaseManager, generation_id: Optional[int] = None) -> np.ndarray:
+    """
+    Load one database file's graded answers as an (n, 6) int64 array
+
+    Query-cached like the DatabaseManager reads, so reruns reuse the arrays
+    until new activity is logged. A single quiz is read through the
+    generation index on quiz_answers.
+    """
+    options = ''.join(OPTIONS)
+    where = "WHERE is_correct IS NOT NULL"
+    params: list = [options, options]
+    if generation_id is not None:
+        where += " AND generation_id = ?"
+        params.append(generation_id)
+
+    chunks = []
+    with db.cursor() as cursor:
+        cursor.execute(f"SELECT {ANSWER_COLUMNS} FROM quiz_answers {where}", params)
+        while True:
+            rows = cursor.fetchmany(LOAD_CHUNK_SIZE)
+            if not rows:
+                break
+            chunks.append(np.array(rows, dtype=np.int64))
+    return np.concatenate(chunks) if chunks else np.empty((0, 6), dtype=np.int64)
+
+
+def load_answers(db: DatabaseManager, generation_id: Optional[int] = None) -> AnswerArrays:
+    """
+    Load graded answers (questions with a known answer key) from every shard
+
+    Args:
+        db: Database to read
+        generation_id: Only this quiz, or None for all quizzes
+
+    Returns:
+        AnswerArrays
+    """
+    data = np.concatenate([_load_shard_answers(shard, generation_id) for shard in db.shards])
+    return AnswerArrays(
+        result_id=data[:, 0],
+        generation_id=data[:, 1],
+        question_id=data[:, 2],
+        chosen=data[:, 3].astype(np.int8),
+        correct=data[:, 4].astype(np.int8),
+        is_correct=data[:, 5].astype(np.int8)
+    )
+
+
+def analyze_items(answers: AnswerArrays, min_attempts: int = 1) -> Dict[str, np.ndarray]:
+    """
+    Compute classical item statistics for every question
+
+    All statistics are grouped sums (np.bincount) over the answer arrays,
+    so the cost is linear in the number of answers with no Python loop
+    per question or attempt.
+
+    - p_value: share of attempts answered correctly (difficulty)
+    - discrimination: point-biserial correlation between answering the
+      question correctly and the score on the rest of the quiz; low or
+      negative values mean strong students miss it as often as weak ones
+    - option_rates: share of attempts choosing each of OPTIONS
+    - top_distractor / top_distractor_rate: most chosen wrong option
+
+    Args:
+        answers: Answers from load_answers
+        min_attempts: Leave out questions with fewer graded attempts
+
+    Returns:
+        dict: Parallel arrays, one entry per question: generation_id,
+            question_id, attempts, p_value, discrimination, option_rates
+            (n x len(OPTIONS)), answer_key, top_distractor,
+            top_distractor_rate and the boolean flags too_easy, too_hard,
+            low_discrimination and misleading
+    """
+    n_options = len(OPTIONS)
+    if not len(answers):
+        empty = np.empty(0)
+        return {
+            'generation_id': empty.astype(np.int64), 'question_id': empty.astype(np.int64),
+            'attempts': empty.astype(np.int64), 'p_value': empty, 'discrimination': empty,
+            'option_rates': np.empty((0, n_options)), 'answer_key': empty.astype(np.int8),
+            'top_distractor': empty.astype(np.int8), 'top_distractor_rate': empty,
+            'too_easy': empty.astype(bool), 'too_hard': empty.astype(bool),
+            'low_discrimination': empty.astype(bool), 'misleading': empty.astype(bool)
+        }
+
+    # Group ids: one item per (generation, question), one per quiz result
+    generations, generation_index = np.unique(answers.generation_id, return_inverse=True)
+    question_span = int(answers.question_id.max()) + 1
+    item_keys, item_index = np.unique(generation_index * question_span + answers.question_id,
+                                      return_inverse=True)
+    _, result_index = np.unique(answers.result_id, return_inverse=True)
+    n_items = len(item_keys)
+
+    # Difficulty
+    x = answers.is_correct.astype(np.float64)
+    attempts = np.bincount(item_index, minlength=n_items)
+    p_value = np.bincount(item_index, weights=x, minlength=n_items) / attempts
+
+    # Discrimination: correlation of x with the rest score (total minus this item)
+    rest = np.bincount(result_index, weights=x)[result_index] - x
+    mean_rest = np.bincount(item_index, weights=rest, minlength=n_items) / attempts
+    var_rest = np.bincount(item_index, weights=rest * rest, minlength=n_items) / attempts - mean_rest ** 2
+    covariance = np.bincount(item_index, weights=x * rest, minlength=n_items) / attempts - p_value * mean_rest
+    denominator = np.sqrt(p_value * (1 - p_value) * np.clip(var_rest, 0, None))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        discrimination = np.where(denominator > 0, covariance / denominator, np.nan)
+
+    # Distractors
+    answered = answers.chosen >= 0
+    option_counts = np.bincount(
+        item_index[answered] * n_options + answers.chosen[answered],
+        minlength=n_items * n_options
+    ).reshape(n_items, n_options)
+    option_rates = option_counts / attempts[:, None]
+
+    answer_key = np.zeros(n_items, dtype=np.int8)
+    answer_key[item_index] = answers.correct
+    distractor_rates = option_rates.copy()
+    keyed = np.flatnonzero(answer_key >= 0)
+    distractor_rates[keyed, answer_key[keyed]] = -1
+    top_distractor = distractor_rates.argmax(axis=1).astype(np.int8)
+    top_distractor_rate = distractor_rates[np.arange(n_items), top_distractor]
+
+    stats = {
+        'generation_id': generations[item_keys // question_span],
+        'question_id': item_keys % question_span,
+        'attempts': attempts,
+        'p_value': p_value,
+        'discrimination': discrimination,
+        'option_rates': option_rates,
+        'answer_key': answer_key,
+        'top_distractor': top_distractor,
+        'top_distractor_rate': top_distractor_rate,
+        'too_easy': p_value > EASY_P_VALUE,
+        'too_hard': p_value < HARD_P_VALUE,
+        'low_discrimination': discrimination < MIN_DISCRIMINATION,
+        # A wrong option that draws more students than the key, or strong
+        # students doing worse than weak ones, points to a flawed question
+        'misleading': (top_distractor_rate > p_value) | (discrimination < 0)
+    }
+
+    keep = attempts >= min_attempts
+    return {name: values[keep] for name, values in stats.items()}
+
+
+@cached_query
+def _count_shard_scores(db: DatabaseManager, bins: int) -> np.ndarray:
+    """
+    Count one database file's quiz results per percentage bin
+
+    Bucketed by the query, so only one row per bin comes back; 100% goes in
+    the top bin, as with np.histogram. Query-cached like _load_shard_answers.
+    """
+    counts = np.zeros(bins, dtype=np.int64)
+    with db.cursor() as cursor:
+        cursor.execute("""
+            SELECT MIN(CAST(percentage * ? / 100 AS INTEGER), ? - 1) AS bin, COUNT(*)
+            FROM quiz_results
+            WHERE percentage IS NOT NULL
+            GROUP BY bin
+        """, (bins, bins))
+        for index, count in cursor.fetchall():
+            counts[max(index, 0)] += count
+    return counts
+
+
+def get_score_histogram(db: DatabaseManager, bins: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Get the distribution of quiz percentages over all quiz results
+
+    Returns:
+        tuple: (counts per bin, bin edges from 0 to 100)
+    """
+    counts = sum(_count_shard_scores(shard, bins) for shard in db.shards)
+    return counts, np.linspace(0, 100, bins + 1)
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Database Maintenance Tool
+Command-line maintenance tasks for the Study Assistant activity database
+"""
+
+import argparse
+import os
+import sys
+
+from activity_export import export_activity_ndjson, export_state_path
+from database import DatabaseManager
+from retention import (archive_inactive_sessions, compact_database, default_archive_path,
+                       purge_orphan_blobs)
+from sharding import get_shard_count, open_database
+
+
+def migrate(db: DatabaseManager, args: argparse.Namespace):
+    """Run pending data backfills and show the schema version (DDL is applied when the database is opened)"""
+    with db.cursor() as cursor:
+        cursor.execute("SELECT version, description, applied_at FROM schema_version ORDER BY version")
+        rows = cursor.fetchall()
+    for version, description, applied_at in rows:
+        print(f"  {version:>3}  {applied_at[:19].replace('T', ' ')}  {description}")
+
+    for version, description, _ in db.get_pending_backfills():
+        print(f"🔄 Backfilling migration {version}: {description}")
+    completed = db.run_backfills(
+        progress_callback=lambda version, rows: print(f"   {rows} rows", end="\r")
+    )
+    for version, rows in completed.items():
+        print(f"   Migration {version}: {rows} rows backfilled")
+    print(f"✅ Schema is at version {db.get_schema_version()}")
+
+
+def rebuild_counters(db: DatabaseManager, args: argparse.Namespace):
+    """Recompute the per-session counters shown in the sessions overview"""
+    print("🔄 Rebuilding session counters...")
+    updated = db.rebuild_session_counters(batch_size=args.batch_size)
+    print(f"✅ Updated {updated} sessions")
+
+
+def archive(db: DatabaseManager, args: argparse.Namespace):
+    """Move inactive sessions and their activity to the archive database"""
+    archive_path = args.archive or default_archive_path(db.db_path)
+    print(f"🗄️ Archiving sessions inactive for more than {args.days} days to {archive_path}...")
+    totals = archive_inactive_sessions(
+        db, args.days, archive_path=archive_path, batch_size=args.batch_size,
+        progress_callback=lambda done: print(f"   {done} sessions archived...")
+    )
+    print(f"✅ Archived {totals['sessions']} sessions, {totals['generations']} generations, "
+          f"{totals['quiz_results']} quiz results ({totals['blobs']} blobs freed)")
+    if args.vacuum:
+        vacuum(db, args)
+
+
+def purge_blobs(db: DatabaseManager, args: argparse.Namespace):
+    """Delete stored summary/quiz text that no generation references"""
+    print("🧹 Deleting unreferenced blobs...")
+    deleted = purge_orphan_blobs(db, batch_size=args.batch_size)
+    print(f"✅ Deleted {deleted} blobs")
+
+
+def vacuum(db: DatabaseManager, args: argparse.Namespace):
+    """Release free pages and refresh query planner statistics"""
+    full = getattr(args, 'full', False)
+    print("🗜️ Running full VACUUM..." if full else "🗜️ Running incremental vacuum...")
+    result = compact_database(db, full=full, max_pages=None)
+    before, after = result['before'], result['after']
+    print(f"✅ {before['file_bytes'] / 1024 / 1024:.1f} MB → {after['file_bytes'] / 1024 / 1024:.1f} MB "
+          f"({after['freelist_count']} free pages, auto_vacuum={after['auto_vacuum']})")
+
+
+def export_ndjson(db: DatabaseManager, args: argparse.Namespace):
+    """Stream sessions, generations and quiz results to an NDJSON file"""
+    output = args.output
+    if args.gzip and not output.endswith('.gz'):
+        output += '.gz'
+    if not args.restart and os.path.exists(export_state_path(output)):
+        print(f"↩️ Resuming interrupted export to {output}...")
+    else:
+        print(f"🧾 Exporting activity to {output}...")
+    counts = export_activity_ndjson(
+        db, output, start=args.start, end=args.end, compress=args.gzip,
+        resume=not args.restart, chunk_size=args.chunk_size,
+        progress_callback=lambda table, done: print(f"   {table}: {done} rows", end="\r")
+    )
+    print(f"\n✅ Exported {counts['sessions']} sessions, {counts['generations']} generations, "
+          f"{counts['quiz_results']} quiz results")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line parser"""
+    parser = argparse.ArgumentParser(description="Study Assistant database maintenance")
+    parser.add_argument("--db", default="study_assistant.db", help="Path to the SQLite database")
+    parser.add_argument("--shards", type=int, default=get_shard_count(),
+                        help="Number of shard databases (default: DB_SHARDS or 1)")
+    parser.set_defaults(per_shard=True)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrator = subparsers.add_parser("migrate", help="Apply pending schema migrations and data backfills")
+    migrator.set_defaults(handler=migrate)
+
+    counters = subparsers.add_parser("rebuild-counters", help="Backfill/rebuild per-session counters")
+    counters.add_argument("--batch-size", type=int, default=1000, help="Sessions updated per transaction")
+    counters.set_defaults(handler=rebuild_counters)
+
+    archiver = subparsers.add_parser("archive", help="Archive sessions inactive for N days")
+    archiver.add_argument("--days", type=int, required=True, help="Archive sessions inactive for more than this many days")
+    archiver.add_argument("--archive", help="Archive database path (default: <db>_archive.db)")
+    archiver.add_argument("--batch-size", type=int, default=200, help="Sessions moved per batch")
+    archiver.add_argument("--vacuum", action="store_true", help="Run an incremental vacuum afterwards")
+    archiver.set_defaults(handler=archive)
+
+    blobs = subparsers.add_parser("purge-blobs", help="Delete unreferenced summary/quiz blobs")
+    blobs.add_argument("--batch-size", type=int, default=1000, help="Blobs checked per transaction")
+    blobs.set_defaults(handler=purge_blobs)
+
+    vacuumer = subparsers.add_parser("vacuum", help="Incremental vacuum and PRAGMA optimize")
+    vacuumer.add_argument("--full", action="store_true",
+                          help="Rewrite the whole file (also enables incremental auto-vacuum on older databases)")
+    vacuumer.set_defaults(handler=vacuum)
+
+    exporter = subparsers.add_parser("export-ndjson", help="Stream activity in a date range to NDJSON")
+    exporter.add_argument("output", help="Output file (.ndjson, or .ndjson.gz with --gzip)")
+    exporter.add_argument("--start", help="Inclusive start date/time, ISO format (UTC)")
+    exporter.add_argument("--end", help="Exclusive end date/time, ISO format (UTC)")
+    exporter.add_argument("--gzip", action="store_true", help="gzip-compress the output")
+    exporter.add_argument("--chunk-size", type=int, default=1000, help="Rows read and written per chunk")
+    exporter.add_argument("--restart", action="store_true", help="Start over instead of resuming an interrupted export")
+    exporter.set_defaults(handler=export_ndjson, per_shard=False)
+
+    return parser
+
+
+def main(argv=None):
+    """Run a maintenance command"""
+    args = build_parser().parse_args(argv)
+    db = open_database(args.db, args.shards)
+    if not args.per_shard:
+        args.handler(db, args)
+        return
+    # Maintenance commands work on one database file at a time
+    for shard in db.shards:
+        if len(db.shards) > 1:
+            print(f"📁 {shard.db_path}")
+        args.handler(shard, args)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n❌ Operation cancelled by user.")
+        sys.exit(1)
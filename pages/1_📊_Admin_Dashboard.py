@@ -5,10 +5,686 @@ View all sessions, generations, and quiz results
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 from database import DatabaseManager
-from session_utils import format_file_size, truncate_text
+from sharding import open_database
+from session_utils import format_file_size, get_session_id, truncate_text
 from admin_auth import check_admin_authentication, show_logout_button
-from datetime import datetime
+from bulk_export import export_generations_zip
+from activity_export import export_activity_ndjson
+from item_analysis import (EASY_P_VALUE, HARD_P_VALUE, MIN_DISCRIMINATION, OPTIONS, analyze_items,
+                           get_score_histogram, load_answers)
+from rollups import get_activity_series, get_model_mix, run_scheduled_rollups, update_rollups
+from retention import (archive_inactive_sessions, compact_database, default_archive_path,
+                       get_retention_days, get_storage_info)
+from collections import deque
+from datetime import date, datetime, timedelta
+import os
+import tempfile
+import time
+
+
+# Chart ranges: label -> (rollup period, seconds shown; None for all history)
+USAGE_RANGES = {
+    "Last 48 hours (hourly)": ('hour', 48 * 3600),
+    "Last 30 days": ('day', 30 * 86400),
+    "Last 90 days": ('day', 90 * 86400),
+    "Last 365 days": ('day', 365 * 86400),
+    "All time (daily)": ('day', None),
+}
+
+# Sessions table: column -> (display name, dtype); 'epoch' columns are UTC epoch seconds
+SESSION_TABLE_COLUMNS = {
+    'session_id': ('Session ID', 'string'),
+    'username': ('Username', 'string'),
+    'ip_address': ('IP Address', 'string'),
+    'created_at': ('Created At', 'epoch'),
+    'last_activity': ('Last Activity', 'epoch'),
+    'generation_count': ('Generations', 'Int64'),
+    'quiz_count': ('Quizzes Taken', 'Int64'),
+    'last_percentage': ('Last Score (%)', 'float64'),
+}
+
+# Generations / quiz results shown per page in the session detail view
+DETAIL_PAGE_SIZE = 20
+
+# Live activity feed: seconds between polls, and items kept on screen
+LIVE_FEED_INTERVAL = 5
+LIVE_FEED_MAX_ITEMS = 200
+LIVE_FEED_TYPES = {'generation': "📝 Generation", 'quiz_result': "✅ Quiz"}
+
+# Question analysis views
+QUESTION_ANALYSIS_VIEWS = ["Hardest questions", "Item analysis", "Score distribution"]
+
+# Item analysis: flag -> (stats key, label), and rows shown at most
+ITEM_FLAGS = {
+    "Too easy": ('too_easy', "😴 Too easy"),
+    "Too hard": ('too_hard', "🧗 Too hard"),
+    "Low discrimination": ('low_discrimination', "🤷 Low discrimination"),
+    "Misleading": ('misleading', "⚠️ Misleading"),
+}
+ITEM_ANALYSIS_MAX_ROWS = 500
+
+# NDJSON exports are written under here, one directory per admin session; a
+# resumable (interrupted) export is left in place
+NDJSON_EXPORT_DIR = os.path.join(tempfile.gettempdir(), "study_assistant_exports")
+
+
+def build_sessions_frame(columns: dict) -> pd.DataFrame:
+    """Build the sessions table from get_sessions_columns output with explicit dtypes"""
+    data = {}
+    for column, (label, dtype) in SESSION_TABLE_COLUMNS.items():
+        if dtype == 'epoch':
+            data[label] = pd.to_datetime(pd.array(columns[column], dtype='Int64'), unit='s', utc=True)
+        else:
+            data[label] = pd.array(columns[column], dtype=dtype)
+    return pd.DataFrame(data)
+
+
+def poll_live_feed(db: DatabaseManager):
+    """
+    Fetch activity logged since the last poll and display the feed
+    
+    Only rows past the feed cursor are read (see get_activity_after), and
+    they are added to a bounded buffer in session state, newest first.
+    """
+    state = st.session_state
+    if 'live_feed' not in state:
+        state.live_feed = deque(maxlen=LIVE_FEED_MAX_ITEMS)
+        state.live_feed_cursor = None
+    
+    items, state.live_feed_cursor = db.get_activity_after(state.live_feed_cursor, limit=LIVE_FEED_MAX_ITEMS)
+    state.live_feed.extendleft(items)
+    
+    st.caption(f"Updated {datetime.now().strftime('%H:%M:%S')} · {len(items)} new · "
+               f"refreshing every {LIVE_FEED_INTERVAL}s")
+    if not state.live_feed:
+        st.info("No activity yet.")
+        return
+    
+    st.dataframe(
+        pd.DataFrame([
+            {
+                'Time': item['timestamp'][:19].replace('T', ' '),
+                'Type': LIVE_FEED_TYPES[item['type']],
+                'Session': item['session_id'][:8],
+                'Username': item['username'] or 'Anonymous',
+                'Details': item['description']
+            }
+            for item in state.live_feed
+        ]),
+        use_container_width=True,
+        hide_index=True
+    )
+
+
+# Poll in a fragment that reruns on its own (streamlit >= 1.37); older
+# versions rerun the whole page instead (see show_admin_dashboard)
+if hasattr(st, 'fragment'):
+    poll_live_feed = st.fragment(run_every=LIVE_FEED_INTERVAL)(poll_live_feed)
+
+
+def show_live_feed(db: DatabaseManager):
+    """Display a live-tail feed of new generations and quiz results"""
+    st.header("📡 Live Activity")
+    
+    if not st.toggle("Follow new activity", key="live_feed_on"):
+        st.session_state.pop('live_feed', None)
+        st.caption("Turn on to watch generations and quiz results as they are logged.")
+        return
+    
+    poll_live_feed(db)
+
+
+def show_usage_charts(db: DatabaseManager):
+    """Display activity over time from the hourly/daily rollups"""
+    st.header("📉 Usage Over Time")
+    
+    col_u1, col_u2 = st.columns([3, 1])
+    with col_u1:
+        range_label = st.selectbox("Range", list(USAGE_RANGES), index=1, key="usage_range")
+    with col_u2:
+        st.write("")
+        if st.button("🔄 Refresh rollups"):
+            update_rollups(open_database(db.db_path))
+    
+    period, span = USAGE_RANGES[range_label]
+    width = 3600 if period == 'hour' else 86400
+    end_epoch = int(time.time()) // width * width + width
+    start_epoch = end_epoch - span if span else None
+    
+    series = get_activity_series(db, period, start_epoch, end_epoch)
+    if not series:
+        st.info("No rolled-up activity yet. Rollups are updated every few minutes.")
+        return
+    
+    df_usage = pd.DataFrame(series)
+    df_usage['time'] = pd.to_datetime(df_usage['bucket_epoch'], unit='s', utc=True)
+    df_usage = df_usage.set_index('time').drop(columns='bucket_epoch')
+    # Show empty hours/days as zero instead of interpolating across them
+    full_index = pd.date_range(
+        pd.to_datetime(start_epoch or series[0]['bucket_epoch'], unit='s', utc=True),
+        pd.to_datetime(end_epoch - width, unit='s', utc=True),
+        freq='h' if period == 'hour' else 'D'
+    )
+    df_usage = df_usage.reindex(full_index)
+    counts = df_usage[['sessions', 'generations', 'quizzes']].fillna(0)
+    
+    col_c1, col_c2 = st.columns(2)
+    with col_c1:
+        st.subheader("Activity")
+        st.line_chart(counts.rename(columns={
+            'sessions': 'New Sessions',
+            'generations': 'Generations',
+            'quizzes': 'Quizzes'
+        }))
+    with col_c2:
+        st.subheader("Average Quiz Score (%)")
+        st.line_chart(df_usage[['average_score']].rename(columns={'average_score': 'Avg Score'}))
+    
+    model_mix = get_model_mix(db, period, start_epoch, end_epoch)
+    if model_mix:
+        st.subheader("Model Mix")
+        df_models = pd.DataFrame(model_mix)
+        df_models['time'] = pd.to_datetime(df_models['bucket_epoch'], unit='s', utc=True)
+        st.bar_chart(df_models.pivot_table(index='time', columns='model', values='generations',
+                                           aggfunc='sum', fill_value=0))
+
+
+def show_generation_search(db: DatabaseManager):
+    """Display full-text search over generated summaries and quizzes"""
+    st.header("🔎 Search Generated Content")
+    
+    if not db.search_enabled:
+        st.info("Full-text search is unavailable (SQLite was built without FTS5).")
+        return
+    
+    col_t1, col_t2 = st.columns([3, 1])
+    with col_t1:
+        content_query = st.text_input("Search summaries, quizzes and file names", "",
+                                      placeholder="e.g. photosynthesis")
+    with col_t2:
+        max_results = st.number_input("Max results", min_value=5, max_value=200, value=25)
+    
+    if not content_query.strip():
+        return
+    
+    results = db.search_generations(content_query, limit=max_results)
+    if not results:
+        st.info("No generations match this search.")
+        return
+    
+    st.caption(f"{len(results)} best matches")
+    for result in results:
+        st.markdown(
+            f"**Generation {result['id']}** · {result['file_name'] or 'Text input'} · "
+            f"Session {result['session_id'][:8]}... · {result['timestamp'][:16].replace('T', ' ')}"
+        )
+        st.markdown(f"> {' '.join(result['snippet'].split())}")
+
+
+def show_question_analysis(db: DatabaseManager):
+    """Display per-question difficulty, discrimination and answer distributions"""
+    st.header("🎯 Question Analysis")
+    
+    # A selector rather than st.tabs, which would run every view's queries
+    # and statistics on each rerun, hidden ones included
+    view = st.radio("View", QUESTION_ANALYSIS_VIEWS, horizontal=True, key="question_analysis_view",
+                    label_visibility="collapsed")
+    if view == "Item analysis":
+        show_item_analysis(db)
+    elif view == "Score distribution":
+        show_score_distribution(db)
+    else:
+        show_hardest_questions(db)
+
+
+def show_hardest_questions(db: DatabaseManager):
+    """Display the questions answered correctly least often, and one quiz's answer breakdown"""
+    col_h1, col_h2 = st.columns([3, 1])
+    with col_h2:
+        min_attempts = st.number_input("Min. attempts", min_value=1, max_value=1000, value=5)
+    with col_h1:
+        hardest = db.get_hardest_questions(limit=20, min_attempts=min_attempts)
+        if hardest:
+            st.subheader("Hardest questions")
+            df_hardest = pd.DataFrame(hardest)
+            df_hardest['correct_rate'] = (df_hardest['correct_rate'] * 100).round(1)
+            st.dataframe(
+                df_hardest.rename(columns={
+                    'generation_id': 'Generation ID',
+                    'question_id': 'Question',
+                    'attempts': 'Attempts',
+                    'correct': 'Correct',
+                    'correct_rate': 'Correct (%)'
+                }),
+                use_container_width=True,
+                hide_index=True
+            )
+        else:
+            st.info("Not enough graded answers yet.")
+    
+    generation_id = st.number_input("Answer breakdown for generation ID", min_value=0, value=0,
+                                    help="0 to hide")
+    if generation_id:
+        question_stats = db.get_question_stats(int(generation_id))
+        if not question_stats:
+            st.info("No answers recorded for this generation.")
+            return
+        rows = []
+        for question in question_stats:
+            row = {
+                'Question': question['question_id'],
+                'Attempts': question['attempts'],
+                'Answered': question['answered'],
+                'Correct (%)': round(question['correct_rate'] * 100, 1) if question['correct_rate'] is not None else None,
+            }
+            for option in ('a', 'b', 'c', 'd'):
+                row[f"Chose {option.upper()}"] = question['option_counts'].get(option, 0)
+            rows.append(row)
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
+
+def show_item_analysis(db: DatabaseManager):
+    """Display p-values, discrimination and distractors for every question, with flags"""
+    col_i1, col_i2, col_i3 = st.columns([1, 1, 2])
+    with col_i1:
+        generation_id = st.number_input("Generation ID", min_value=0, value=0, help="0 for all quizzes",
+                                        key="item_generation_id")
+    with col_i2:
+        min_attempts = st.number_input("Min. attempts", min_value=1, max_value=1000, value=20,
+                                       key="item_min_attempts")
+    with col_i3:
+        flag_filter = st.selectbox("Show", list(ITEM_FLAGS) + ["All questions"], index=len(ITEM_FLAGS),
+                                   key="item_flag_filter")
+    
+    stats = analyze_items(load_answers(db, int(generation_id) or None), int(min_attempts))
+    if not len(stats['p_value']):
+        st.info("Not enough graded answers yet.")
+        return
+    
+    col_m1, col_m2, col_m3, col_m4 = st.columns(4)
+    with col_m1:
+        st.metric("Questions", len(stats['p_value']))
+    with col_m2:
+        st.metric(ITEM_FLAGS["Too easy"][1], int(stats['too_easy'].sum()))
+    with col_m3:
+        st.metric(ITEM_FLAGS["Too hard"][1], int(stats['too_hard'].sum()))
+    with col_m4:
+        st.metric(ITEM_FLAGS["Misleading"][1], int(stats['misleading'].sum()))
+    
+    # Worst-discriminating questions first
+    order = np.argsort(np.nan_to_num(stats['discrimination'], nan=np.inf), kind='stable')
+    if flag_filter in ITEM_FLAGS:
+        order = order[stats[ITEM_FLAGS[flag_filter][0]][order]]
+    order = order[:ITEM_ANALYSIS_MAX_ROWS]
+    
+    options = np.array([option.upper() for option in OPTIONS])
+    table = {
+        'Generation ID': stats['generation_id'][order],
+        'Question': stats['question_id'][order],
+        'Attempts': stats['attempts'][order],
+        'P-value': stats['p_value'][order].round(2),
+        'Discrimination': stats['discrimination'][order].round(2),
+        'Key': options[stats['answer_key'][order]],
+        'Top distractor': options[stats['top_distractor'][order]],
+    }
+    for index, option in enumerate(options):
+        table[f"Chose {option} (%)"] = (stats['option_rates'][order, index] * 100).round(1)
+    table['Flags'] = [
+        ", ".join(label for name, label in ITEM_FLAGS.values() if stats[name][i])
+        for i in order
+    ]
+    
+    st.dataframe(pd.DataFrame(table), use_container_width=True, hide_index=True)
+    st.caption(f"P-value: share answered correctly (too easy above {EASY_P_VALUE}, too hard below "
+               f"{HARD_P_VALUE}). Discrimination: point-biserial correlation with the rest of the quiz "
+               f"(weak below {MIN_DISCRIMINATION}). Misleading: a wrong option is chosen more often than "
+               f"the key, or discrimination is negative.")
+
+
+def show_score_distribution(db: DatabaseManager):
+    """Display a histogram of quiz percentages"""
+    counts, edges = get_score_histogram(db, bins=10)
+    if not counts.sum():
+        st.info("No quiz results yet.")
+        return
+    st.bar_chart(pd.DataFrame(
+        {'Quiz results': counts},
+        index=[f"{low:.0f}–{high:.0f}%" for low, high in zip(edges[:-1], edges[1:])]
+    ))
+
+
+def show_bulk_export(db: DatabaseManager):
+    """Display bulk PDF/ZIP export of generations"""
+    st.header("📦 Bulk Export")
+    st.markdown("Render every summary and quiz in a date range to PDF and download them as one ZIP")
+    
+    col_b1, col_b2 = st.columns([1, 2])
+    with col_b1:
+        today = date.today()
+        date_range = st.date_input(
+            "Date range (UTC)",
+            value=(today - timedelta(days=7), today),
+            key="bulk_export_dates"
+        )
+    with col_b2:
+        session_filter = st.text_area(
+            "Session IDs (optional, one per line or comma separated)",
+            height=68,
+            key="bulk_export_sessions"
+        )
+    
+    if st.button("📦 Export PDFs as ZIP"):
+        if not isinstance(date_range, (list, tuple)) or len(date_range) != 2:
+            st.warning("⚠️ Please select a start and end date.")
+            return
+        
+        start = date_range[0].isoformat()
+        end = (date_range[1] + timedelta(days=1)).isoformat()
+        session_ids = [sid.strip() for sid in session_filter.replace(',', '\n').split('\n') if sid.strip()]
+        
+        total = db.count_generations(start, end, session_ids or None)
+        if total == 0:
+            st.info("No generations found for this filter.")
+            return
+        
+        progress = st.progress(0.0, text=f"Rendering 0/{total} PDFs...")
+        
+        def update_progress(done, total):
+            progress.progress(done / total, text=f"Rendering {done}/{total} PDFs...")
+        
+        file_name = f"bulk_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+        # The ZIP is streamed to a temporary directory that's removed once
+        # the download is set up; the button is given the open file, which
+        # Streamlit copies into its media store for the download
+        with tempfile.TemporaryDirectory(prefix="bulk_export_") as tmp_dir:
+            output_path = os.path.join(tmp_dir, file_name)
+            try:
+                exported = export_generations_zip(
+                    db, output_path, start=start, end=end,
+                    session_ids=session_ids or None,
+                    progress_callback=update_progress
+                )
+            except Exception as e:
+                st.error(f"Bulk export failed: {str(e)}")
+                return
+            
+            st.success(f"✅ Exported {exported} generations")
+            with open(output_path, 'rb') as f:
+                st.download_button(
+                    label="📥 Download ZIP",
+                    data=f,
+                    file_name=file_name,
+                    mime="application/zip"
+                )
+
+
+def show_activity_export(db: DatabaseManager):
+    """Display streaming NDJSON export of all activity data"""
+    st.header("🧾 Activity Export (NDJSON)")
+    st.markdown("Export sessions, generations and quiz results in a date range, one JSON object per line")
+    
+    col_n1, col_n2 = st.columns([1, 2])
+    with col_n1:
+        today = date.today()
+        date_range = st.date_input(
+            "Date range (UTC)",
+            value=(today - timedelta(days=30), today),
+            key="ndjson_export_dates"
+        )
+    with col_n2:
+        st.write("")
+        compress = st.checkbox("gzip-compress (.ndjson.gz)", value=True, key="ndjson_export_gzip")
+    
+    if st.button("🧾 Export NDJSON"):
+        if not isinstance(date_range, (list, tuple)) or len(date_range) != 2:
+            st.warning("⚠️ Please select a start and end date.")
+            return
+        
+        start = date_range[0].isoformat()
+        end = (date_range[1] + timedelta(days=1)).isoformat()
+        file_name = f"activity_export_{date_range[0]:%Y%m%d}_{date_range[1]:%Y%m%d}.ndjson"
+        if compress:
+            file_name += ".gz"
+        # Kept in this admin session's own directory, so concurrent exports
+        # of the same range don't share a file: an interrupted export stays
+        # there to be resumed, a finished one is removed once it's offered
+        export_dir = os.path.join(NDJSON_EXPORT_DIR, get_session_id())
+        os.makedirs(export_dir, exist_ok=True)
+        output_path = os.path.join(export_dir, file_name)
+        
+        status = st.empty()
+        
+        def update_progress(table, done):
+            status.text(f"Exporting {table}: {done} rows...")
+        
+        try:
+            # Re-running the same range resumes an interrupted export
+            counts = export_activity_ndjson(db, output_path, start=start, end=end,
+                                            compress=compress, progress_callback=update_progress)
+        except Exception as e:
+            st.error(f"NDJSON export failed: {str(e)}")
+            return
+        
+        status.empty()
+        st.success(f"✅ Exported {counts['sessions']} sessions, {counts['generations']} generations "
+                   f"and {counts['quiz_results']} quiz results")
+        # Handed over as an open file (Streamlit copies it into its media store)
+        with open(output_path, 'rb') as f:
+            st.download_button(
+                label="📥 Download NDJSON",
+                data=f,
+                file_name=file_name,
+                mime="application/gzip" if compress else "application/x-ndjson"
+            )
+        os.remove(output_path)
+
+
+def show_retention(db: DatabaseManager):
+    """Display archival of old sessions and database compaction"""
+    st.header("🗄️ Data Retention")
+    
+    storage = [get_storage_info(shard) for shard in db.shards]
+    col_r1, col_r2, col_r3 = st.columns(3)
+    with col_r1:
+        st.metric("Database Size", format_file_size(sum(s['file_bytes'] for s in storage)))
+    with col_r2:
+        st.metric("Reclaimable", format_file_size(sum(s['free_bytes'] for s in storage)))
+    with col_r3:
+        st.metric("Auto-vacuum", ", ".join(sorted({s['auto_vacuum'] for s in storage})))
+    
+    retention_days = get_retention_days()
+    if retention_days:
+        st.caption(f"Sessions inactive for more than {retention_days} days are archived automatically (RETENTION_DAYS).")
+    else:
+        st.caption("Automatic archival is off; set RETENTION_DAYS to enable it.")
+    
+    col_a1, col_a2 = st.columns([1, 2])
+    with col_a1:
+        days = st.number_input("Archive sessions inactive for more than N days",
+                               min_value=1, max_value=3650, value=retention_days or 90)
+    with col_a2:
+        st.write("")
+        st.write(f"Archive file: `{default_archive_path(db.db_path)}`"
+                 + (f" (one per shard, {len(db.shards)} shards)" if len(db.shards) > 1 else ""))
+    
+    col_b1, col_b2 = st.columns(2)
+    with col_b1:
+        if st.button("🗄️ Archive old sessions"):
+            with st.spinner("Archiving..."):
+                totals = {'sessions': 0, 'generations': 0, 'quiz_results': 0}
+                for shard in db.shards:
+                    shard_totals = archive_inactive_sessions(shard, int(days))
+                    compact_database(shard)
+                    for key in totals:
+                        totals[key] += shard_totals[key]
+            st.success(f"✅ Archived {totals['sessions']} sessions, {totals['generations']} generations "
+                       f"and {totals['quiz_results']} quiz results")
+    with col_b2:
+        if st.button("🗜️ Compact database"):
+            with st.spinner("Compacting..."):
+                results = [compact_database(shard, max_pages=None) for shard in db.shards]
+            st.success(f"✅ {format_file_size(sum(r['before']['file_bytes'] for r in results))} → "
+                       f"{format_file_size(sum(r['after']['file_bytes'] for r in results))}")
+
+
+def get_page_cursors(name: str, page_key) -> list:
+    """
+    Get the keyset cursor stack of a paginated list, kept in session state
+    
+    The stack starts at [None] (first page) and is reset whenever page_key
+    (the list's filter) changes; the last entry is the current page's cursor.
+    """
+    if st.session_state.get(f"{name}_page_key") != page_key:
+        st.session_state[f"{name}_page_key"] = page_key
+        st.session_state[f"{name}_page_cursors"] = [None]
+    return st.session_state[f"{name}_page_cursors"]
+
+
+def show_page_controls(name: str, cursors: list, next_cursor):
+    """Display Previous/Next buttons for a cursor stack from get_page_cursors"""
+    col_p1, col_p2, col_p3 = st.columns([1, 1, 4])
+    with col_p1:
+        if st.button("◀ Previous", key=f"{name}_previous", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+    with col_p2:
+        if st.button("Next ▶", key=f"{name}_next", disabled=next_cursor is None):
+            cursors.append(next_cursor)
+            st.rerun()
+    with col_p3:
+        st.caption(f"Page {len(cursors)}")
+
+
+def show_session_details(db: DatabaseManager, usernames: dict):
+    """
+    Display one session's info, generations and quiz results
+    
+    Generations and quiz results are listed a page at a time, and a
+    generation's summary and quiz text are only loaded when asked for, so
+    sessions with hundreds of generations open instantly.
+    
+    Args:
+        db: Database to read
+        usernames: Session ID -> username for the sessions on the current page
+    """
+    st.header("🔍 Session Details")
+    
+    if not usernames:
+        return
+    
+    selected_session = st.selectbox(
+        "Select a session to view details",
+        options=list(usernames),
+        format_func=lambda x: f"{x[:8]}... - {usernames[x] or 'Anonymous'}"
+    )
+    if not selected_session:
+        return
+    
+    # Get session info
+    session_info = db.get_session_info(selected_session)
+    if session_info is None:
+        st.info("This session no longer exists.")
+        return
+    
+    # Display session info
+    col_s1, col_s2, col_s3 = st.columns(3)
+    with col_s1:
+        st.subheader("Session Info")
+        st.write(f"**Session ID:** {session_info['session_id'][:16]}...")
+        st.write(f"**Username:** {session_info['username'] or 'Anonymous'}")
+        st.write(f"**IP Address:** {session_info['ip_address']}")
+    with col_s2:
+        st.subheader("Timestamps")
+        st.write(f"**Created:** {session_info['created_at']}")
+        st.write(f"**Last Activity:** {session_info['last_activity']}")
+    with col_s3:
+        st.subheader("User Agent")
+        st.write(truncate_text(session_info['user_agent'] or 'Unknown', 100))
+    
+    page_size = st.number_input("Items per page", min_value=5, max_value=200, value=DETAIL_PAGE_SIZE,
+                                key="session_detail_page_size")
+    
+    # Generations, one page at a time
+    if session_info['generation_count']:
+        st.subheader(f"📝 Generations ({session_info['generation_count']})")
+        
+        cursors = get_page_cursors("session_generations", (selected_session, page_size))
+        generations, next_cursor = db.get_session_generations_page(
+            selected_session, limit=page_size, after=cursors[-1]
+        )
+        
+        for gen in generations:
+            with st.expander(f"Generation {gen['id']} - {gen['timestamp']}"):
+                col_g1, col_g2 = st.columns(2)
+                with col_g1:
+                    st.write(f"**Timestamp:** {gen['timestamp']}")
+                    st.write(f"**Input Method:** {gen['input_method']}")
+                    if gen['file_name']:
+                        st.write(f"**File:** {gen['file_name']}")
+                        if gen['file_size']:
+                            st.write(f"**Size:** {format_file_size(gen['file_size'])}")
+                with col_g2:
+                    st.write(f"**Model:** {gen['model_used']}")
+                    st.write(f"**Content Length:** {gen['content_length']} chars")
+                    st.write(f"**Debug Mode:** {'Yes' if gen['debug_mode'] else 'No'}")
+                
+                # Content is only read and decompressed on request
+                if st.checkbox("📄 Show summary and quiz", key=f"generation_content_{gen['id']}"):
+                    content = db.get_generation_content(gen['id'])
+                    if content:
+                        st.markdown(content['summary'] or "_No summary_")
+                        st.text(content['quiz'] or "No quiz")
+        
+        show_page_controls("session_generations", cursors, next_cursor)
+    
+    # Quiz results, one page at a time
+    if session_info['quiz_count']:
+        st.subheader(f"✅ Quiz Results ({session_info['quiz_count']})")
+        
+        cursors = get_page_cursors("session_quizzes", (selected_session, page_size))
+        quiz_results, next_cursor = db.get_session_quiz_results_page(
+            selected_session, limit=page_size, after=cursors[-1]
+        )
+        
+        for qr in quiz_results:
+            with st.expander(f"Quiz {qr['id']} - {qr['completed_at']} - Score: {qr['score']}/{qr['total_questions']} ({qr['percentage']:.1f}%)"):
+                col_q1, col_q2 = st.columns(2)
+                with col_q1:
+                    st.write(f"**Generation ID:** {qr['generation_id']}")
+                    st.write(f"**Completed At:** {qr['completed_at']}")
+                    st.write(f"**File:** {qr['file_name'] or 'N/A'}")
+                with col_q2:
+                    st.write(f"**Score:** {qr['score']}/{qr['total_questions']}")
+                    st.write(f"**Percentage:** {qr['percentage']:.1f}%")
+                    st.write(f"**Answered:** {qr['answered_count']}/{qr['total_questions']}")
+                
+                # Grade
+                if qr['percentage'] >= 80:
+                    st.success(f"🌟 Excellent ({qr['percentage']:.1f}%)")
+                elif qr['percentage'] >= 60:
+                    st.info(f"👍 Good ({qr['percentage']:.1f}%)")
+                else:
+                    st.warning(f"📚 Keep Learning ({qr['percentage']:.1f}%)")
+        
+        show_page_controls("session_quizzes", cursors, next_cursor)
+    
+    # Export session data
+    st.markdown("---")
+    if st.button(f"📥 Export Session Data ({selected_session[:8]}...)"):
+        output_path = f"session_export_{selected_session[:8]}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        if db.export_session_data(selected_session, output_path):
+            st.success(f"✅ Session data exported to {output_path}")
+            with open(output_path, 'r') as f:
+                st.download_button(
+                    label="📥 Download JSON",
+                    data=f.read(),
+                    file_name=output_path,
+                    mime="application/json"
+                )
+        else:
+            st.error("Failed to export session data")
 
 
 def show_admin_dashboard():
@@ -29,8 +705,11 @@ def show_admin_dashboard():
     # Show logout button
     show_logout_button()
     
-    # Initialize database
-    db = DatabaseManager()
+    # Initialize database; the dashboard reads through read-only connections
+    # so analytics never hold up activity logging on the student pages
+    db = open_database(read_only=True)
+    for shard in db.shards:
+        run_scheduled_rollups(shard.db_path)
     
     # Get statistics
     stats = db.get_statistics()
@@ -52,52 +731,48 @@ def show_admin_dashboard():
     
     st.markdown("---")
     
+    # New activity as it happens
+    show_live_feed(db)
+    
+    st.markdown("---")
+    
+    # Time series from the rollup tables
+    show_usage_charts(db)
+    
+    st.markdown("---")
+    
     # Sessions table
     st.header("👥 All Sessions")
     
     # Filters
     col_f1, col_f2 = st.columns([2, 1])
     with col_f1:
-        search_query = st.text_input("🔍 Search by Session ID, Username, or IP", "")
+        search_query = st.text_input("🔍 Search by Session ID, Username, or IP (starts with)", "")
     with col_f2:
-        limit = st.number_input("Show last N sessions", min_value=10, max_value=1000, value=100)
-    
-    # Get sessions
-    sessions = db.get_all_sessions_summary(limit=limit)
-    
-    # Filter sessions
-    if search_query:
-        sessions = [
-            s for s in sessions 
-            if search_query.lower() in s['session_id'].lower() or
-               (s['username'] and search_query.lower() in s['username'].lower()) or
-               (s['ip_address'] and search_query.lower() in s['ip_address'].lower())
-        ]
-    
-    if sessions:
-        # Convert to DataFrame
-        df_sessions = pd.DataFrame(sessions)
-        
-        # Format timestamps
-        df_sessions['created_at'] = pd.to_datetime(df_sessions['created_at']).dt.strftime('%Y-%m-%d %H:%M:%S UTC')
-        df_sessions['last_activity'] = pd.to_datetime(df_sessions['last_activity']).dt.strftime('%Y-%m-%d %H:%M:%S UTC')
-        
-        # Rename columns for display
-        df_sessions = df_sessions.rename(columns={
-            'session_id': 'Session ID',
-            'username': 'Username',
-            'ip_address': 'IP Address',
-            'created_at': 'Created At',
-            'last_activity': 'Last Activity',
-            'generation_count': 'Generations',
-            'quiz_count': 'Quizzes Taken'
-        })
+        limit = st.number_input("Sessions per page", min_value=10, max_value=1000, value=100)
+    
+    # Keyset pagination, reset when the filter changes
+    cursors = get_page_cursors("sessions", (search_query.strip(), limit))
+    
+    # Get sessions (searched and paginated in SQL), column by column
+    columns, next_cursor = db.get_sessions_columns(search=search_query, limit=limit, after=cursors[-1])
+    session_ids = columns['session_id']
+    
+    show_page_controls("sessions", cursors, next_cursor)
+    
+    if session_ids:
+        # Typed columns; timestamps are epoch seconds, formatted by the grid
+        df_sessions = build_sessions_frame(columns)
         
         # Display table
         st.dataframe(
             df_sessions,
             use_container_width=True,
-            hide_index=True
+            hide_index=True,
+            column_config={
+                label: st.column_config.DatetimeColumn(label, format="YYYY-MM-DD HH:mm:ss z")
+                for label, dtype in SESSION_TABLE_COLUMNS.values() if dtype == 'epoch'
+            }
         )
         
         # Export option
@@ -113,98 +788,38 @@ def show_admin_dashboard():
     
     st.markdown("---")
     
+    # Content search
+    show_generation_search(db)
+    
+    st.markdown("---")
+    
+    # Item analysis
+    show_question_analysis(db)
+    
+    st.markdown("---")
+    
+    # Bulk export
+    show_bulk_export(db)
+    
+    st.markdown("---")
+    
+    # Streaming activity export
+    show_activity_export(db)
+    
+    st.markdown("---")
+    
+    # Retention and compaction (these write)
+    show_retention(open_database(db.db_path))
+    
+    st.markdown("---")
+    
     # Session detail view
-    st.header("🔍 Session Details")
+    show_session_details(db, dict(zip(session_ids, columns['username'])))
     
-    if sessions:
-        session_ids = [s['session_id'] for s in sessions]
-        selected_session = st.selectbox(
-            "Select a session to view details",
-            options=session_ids,
-            format_func=lambda x: f"{x[:8]}... - {next((s['username'] or 'Anonymous') for s in sessions if s['session_id'] == x)}"
-        )
-        
-        if selected_session:
-            # Get session info
-            session_info = db.get_session_info(selected_session)
-            
-            # Display session info
-            col_s1, col_s2, col_s3 = st.columns(3)
-            with col_s1:
-                st.subheader("Session Info")
-                st.write(f"**Session ID:** {session_info['session_id'][:16]}...")
-                st.write(f"**Username:** {session_info['username'] or 'Anonymous'}")
-                st.write(f"**IP Address:** {session_info['ip_address']}")
-            with col_s2:
-                st.subheader("Timestamps")
-                st.write(f"**Created:** {session_info['created_at']}")
-                st.write(f"**Last Activity:** {session_info['last_activity']}")
-            with col_s3:
-                st.subheader("User Agent")
-                st.write(truncate_text(session_info['user_agent'] or 'Unknown', 100))
-            
-            # Get generations
-            generations = db.get_session_generations(selected_session)
-            
-            if generations:
-                st.subheader(f"📝 Generations ({len(generations)})")
-                
-                for gen in generations:
-                    with st.expander(f"Generation {gen['id']} - {gen['timestamp']}"):
-                        col_g1, col_g2 = st.columns(2)
-                        with col_g1:
-                            st.write(f"**Timestamp:** {gen['timestamp']}")
-                            st.write(f"**Input Method:** {gen['input_method']}")
-                            if gen['file_name']:
-                                st.write(f"**File:** {gen['file_name']}")
-                                if gen['file_size']:
-                                    st.write(f"**Size:** {format_file_size(gen['file_size'])}")
-                        with col_g2:
-                            st.write(f"**Model:** {gen['model_used']}")
-                            st.write(f"**Content Length:** {gen['content_length']} chars")
-                            st.write(f"**Debug Mode:** {'Yes' if gen['debug_mode'] else 'No'}")
-            
-            # Get quiz results
-            quiz_results = db.get_session_quiz_results(selected_session)
-            
-            if quiz_results:
-                st.subheader(f"✅ Quiz Results ({len(quiz_results)})")
-                
-                for qr in quiz_results:
-                    with st.expander(f"Quiz {qr['id']} - {qr['completed_at']} - Score: {qr['score']}/{qr['total_questions']} ({qr['percentage']:.1f}%)"):
-                        col_q1, col_q2 = st.columns(2)
-                        with col_q1:
-                            st.write(f"**Generation ID:** {qr['generation_id']}")
-                            st.write(f"**Completed At:** {qr['completed_at']}")
-                            st.write(f"**File:** {qr['file_name'] or 'N/A'}")
-                        with col_q2:
-                            st.write(f"**Score:** {qr['score']}/{qr['total_questions']}")
-                            st.write(f"**Percentage:** {qr['percentage']:.1f}%")
-                            st.write(f"**Answered:** {qr['answered_count']}/{qr['total_questions']}")
-                        
-                        # Grade
-                        if qr['percentage'] >= 80:
-                            st.success(f"🌟 Excellent ({qr['percentage']:.1f}%)")
-                        elif qr['percentage'] >= 60:
-                            st.info(f"👍 Good ({qr['percentage']:.1f}%)")
-                        else:
-                            st.warning(f"📚 Keep Learning ({qr['percentage']:.1f}%)")
-            
-            # Export session data
-            st.markdown("---")
-            if st.button(f"📥 Export Session Data ({selected_session[:8]}...)"):
-                output_path = f"session_export_{selected_session[:8]}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-                if db.export_session_data(selected_session, output_path):
-                    st.success(f"✅ Session data exported to {output_path}")
-                    with open(output_path, 'r') as f:
-                        st.download_button(
-                            label="📥 Download JSON",
-                            data=f.read(),
-                            file_name=output_path,
-                            mime="application/json"
-                        )
-                else:
-                    st.error("Failed to export session data")
+    # Without partial reruns, the live feed refreshes the whole page
+    if st.session_state.get('live_feed_on') and not hasattr(st, 'fragment'):
+        time.sleep(LIVE_FEED_INTERVAL)
+        st.rerun()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,306 @@
+"""
+PDF rendering engine for Study Assistant
+Builds summary/quiz PDFs with ReportLab, reusing styles across documents
+"""
+
+import re
+from datetime import datetime
+from functools import lru_cache
+from io import BytesIO
+from typing import Any, Dict, List, Optional, Tuple
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+from reportlab.lib.enums import TA_LEFT, TA_JUSTIFY
+from reportlab.lib.colors import HexColor
+
+from quiz_report import QuizReport
+
+DOCUMENT_TITLE = "📚 Study Assistant - Quiz Generator"
+FOOTER_TEXT = "Generated with Study Assistant | Built with Streamlit, LangChain, and OpenAI"
+QUIZ_HEADING = "📝 Quiz Questions"
+QUIZ_RESULTS_HEADING = "📝 Quiz Questions & Answers"
+
+# Precompiled markdown-to-ReportLab patterns
+BOLD_PATTERN = re.compile(r'\*\*([^*]+)\*\*')
+H3_PATTERN = re.compile(r'^###\s*')
+H2_PATTERN = re.compile(r'^##\s*')
+BULLET_PATTERN = re.compile(r'^[-•*]')
+
+
+@lru_cache(maxsize=1)
+def get_pdf_styles() -> Dict[str, ParagraphStyle]:
+    """
+    Build the paragraph styles used by every PDF export
+
+    Styles are created once per process and shared; ReportLab only reads
+    them while laying out a document.
+    """
+    styles = getSampleStyleSheet()
+
+    answer_kwargs = dict(
+        parent=styles['BodyText'],
+        fontSize=11,
+        fontName='Helvetica-Bold',
+        leftIndent=20,
+        spaceAfter=6,
+        spaceBefore=6
+    )
+    grade_kwargs = dict(
+        parent=styles['BodyText'],
+        fontSize=14,
+        fontName='Helvetica-Bold',
+        spaceAfter=8,
+        spaceBefore=4
+    )
+
+    return {
+        'normal': styles['Normal'],
+        'code': styles['Code'],
+        'title': ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=24,
+            textColor=HexColor('#1E88E5'),
+            spaceAfter=20,
+            spaceBefore=10,
+            alignment=TA_LEFT,
+            fontName='Helvetica-Bold'
+        ),
+        'heading': ParagraphStyle(
+            'CustomHeading',
+            parent=styles['Heading2'],
+            fontSize=16,
+            textColor=HexColor('#1565C0'),
+            spaceAfter=12,
+            spaceBefore=12,
+            fontName='Helvetica-Bold'
+        ),
+        'body': ParagraphStyle(
+            'CustomBody',
+            parent=styles['BodyText'],
+            fontSize=11,
+            alignment=TA_JUSTIFY,
+            spaceAfter=8,
+            leading=16
+        ),
+        'question': ParagraphStyle(
+            'QuestionStyle',
+            parent=styles['BodyText'],
+            fontSize=12,
+            fontName='Helvetica-Bold',
+            spaceAfter=8,
+            spaceBefore=10
+        ),
+        'option': ParagraphStyle(
+            'OptionStyle',
+            parent=styles['BodyText'],
+            fontSize=11,
+            leftIndent=20,
+            spaceAfter=4
+        ),
+        'answer': ParagraphStyle('AnswerStyle', textColor=HexColor('#28a745'), **answer_kwargs),
+        'incorrect': ParagraphStyle('IncorrectStyle', textColor=HexColor('#dc3545'), **answer_kwargs),
+        'results_heading': ParagraphStyle(
+            'ResultsHeading',
+            parent=styles['Heading1'],
+            fontSize=20,
+            textColor=HexColor('#dc3545'),
+            spaceAfter=15,
+            spaceBefore=10,
+            fontName='Helvetica-Bold'
+        ),
+        'results_box': ParagraphStyle(
+            'ResultsBox',
+            parent=styles['BodyText'],
+            fontSize=13,
+            fontName='Helvetica-Bold',
+            spaceAfter=6,
+            leading=20
+        ),
+        'grade_excellent': ParagraphStyle('GradeExcellent', textColor=HexColor('#28a745'), **grade_kwargs),
+        'grade_good': ParagraphStyle('GradeGood', textColor=HexColor('#17a2b8'), **grade_kwargs),
+        'grade_keep_learning': ParagraphStyle('GradeKeepLearning', textColor=HexColor('#ffc107'), **grade_kwargs),
+    }
+
+
+@lru_cache(maxsize=256)
+def convert_summary_markup(summary: str) -> Tuple[Tuple[str, str], ...]:
+    """
+    Convert summary markdown into (style name, ReportLab markup) pairs
+
+    The conversion is cached per summary text, so repeated exports of the
+    same summary (e.g. bulk exports of debug-mode generations) skip the regexes.
+    """
+    converted = []
+    for line in summary.strip().split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        # Convert markdown bold syntax for PDF
+        line = BOLD_PATTERN.sub(r'<b>\1</b>', line)
+        # Handle headers
+        if line.startswith('###'):
+            converted.append(('heading', H3_PATTERN.sub('', line)))
+        elif line.startswith('##'):
+            converted.append(('heading', H2_PATTERN.sub('', line)))
+        else:
+            # Add bullet point if not present
+            if not BULLET_PATTERN.match(line):
+                line = '• ' + line
+            converted.append(('body', line))
+    return tuple(converted)
+
+
+def summary_to_flowables(summary: str, styles: Dict[str, ParagraphStyle]) -> List[Any]:
+    """Build the summary section flowables"""
+    elements = [
+        Paragraph("📋 Summary", styles['heading']),
+        Spacer(1, 0.1*inch),
+    ]
+    for style_name, markup in convert_summary_markup(summary):
+        elements.append(Paragraph(markup, styles[style_name]))
+    elements.append(Spacer(1, 0.3*inch))
+    return elements
+
+
+def results_to_flowables(report: QuizReport, styles: Dict[str, ParagraphStyle]) -> List[Any]:
+    """Build the quiz results summary box flowables"""
+    grade_styles = {
+        "🌟 Excellent": styles['grade_excellent'],
+        "👍 Good": styles['grade_good'],
+        "📚 Keep Learning": styles['grade_keep_learning'],
+    }
+    results_box_style = styles['results_box']
+    return [
+        Paragraph("📊 QUIZ RESULTS", styles['results_heading']),
+        Spacer(1, 0.05*inch),
+        Paragraph("="*70, styles['code']),
+        Spacer(1, 0.1*inch),
+        Paragraph("<b>PERFORMANCE SUMMARY:</b>", results_box_style),
+        Paragraph(f"Score: <font color='#1E88E5'><b>{report.correct_count}/{report.total_count}</b></font> questions correct", results_box_style),
+        Paragraph(f"Percentage: <font color='#1E88E5'><b>{report.percentage:.1f}%</b></font>", results_box_style),
+        Paragraph(f"Answered: {report.answered_count}/{report.total_count} questions", results_box_style),
+        Paragraph(f"Grade: {report.grade}", grade_styles[report.grade]),
+        Spacer(1, 0.1*inch),
+        Paragraph("="*70, styles['code']),
+        Spacer(1, 0.3*inch),
+    ]
+
+
+def quiz_to_flowables(report: QuizReport, styles: Dict[str, ParagraphStyle]) -> List[Any]:
+    """Build the question, option and answer flowables"""
+    user_answers = report.user_answers
+    elements = []
+    for q in report.questions:
+        # Add question
+        elements.append(Paragraph(f"<b>Question {q['id']}:</b> {q['question']}", styles['question']))
+
+        # Add options
+        for key in sorted(q['options'].keys()):
+            option_text = f"{key}) {q['options'][key]}"
+            # Highlight user's answer if provided
+            if user_answers and user_answers.get(q['id']) == key:
+                option_text = f"<b>[YOUR ANSWER]</b> {option_text}"
+            elements.append(Paragraph(option_text, styles['option']))
+
+        # Add correct answer and status
+        if report.has_results:
+            status = report.question_status(q)
+            if status == 'correct':
+                elements.append(Paragraph(f"✅ CORRECT - Answer: {q['answer_text']}", styles['answer']))
+            elif status == 'incorrect':
+                elements.append(Paragraph(f"❌ INCORRECT - Correct answer: {q['answer_text']}", styles['incorrect']))
+            else:
+                elements.append(Paragraph(f"⚠️ NOT ANSWERED - Correct answer: {q['answer_text']}", styles['answer']))
+        else:
+            elements.append(Paragraph(f"✓ Answer: {q['answer_text']}", styles['answer']))
+
+        elements.append(Spacer(1, 0.2*inch))
+    return elements
+
+
+def build_flowables(report: QuizReport, quiz_heading: str = QUIZ_RESULTS_HEADING,
+                    generated_on: Optional[str] = None) -> List[Any]:
+    """
+    Build all flowables for one summary/quiz document
+
+    Args:
+        report: Parsed quiz report, with graded answers if any
+        quiz_heading: Heading shown above the quiz questions
+        generated_on: Timestamp shown under the title (defaults to now)
+
+    Returns:
+        list: ReportLab flowables
+    """
+    styles = get_pdf_styles()
+    generated_on = generated_on or datetime.now().strftime('%Y-%m-%d %H:%M')
+
+    # Title
+    elements = [
+        Paragraph(DOCUMENT_TITLE, styles['title']),
+        Paragraph(f"Generated on: {generated_on}", styles['normal']),
+        Spacer(1, 0.3*inch),
+    ]
+
+    elements.extend(summary_to_flowables(report.summary, styles))
+
+    # Quiz Results Summary Box if available (before quiz questions)
+    if report.has_results:
+        elements.extend(results_to_flowables(report, styles))
+
+    elements.append(Paragraph(quiz_heading, styles['heading']))
+    elements.append(Spacer(1, 0.1*inch))
+    elements.extend(quiz_to_flowables(report, styles))
+
+    # Footer
+    elements.append(Spacer(1, 0.3*inch))
+    elements.append(Paragraph(FOOTER_TEXT, styles['normal']))
+    return elements
+
+
+def render_report_pdf(report: QuizReport, quiz_heading: str = QUIZ_RESULTS_HEADING,
+                      generated_on: Optional[str] = None) -> bytes:
+    """
+    Render one quiz report to PDF bytes
+
+    Args:
+        report: Parsed quiz report, with graded answers if any
+        quiz_heading: Heading shown above the quiz questions
+        generated_on: Timestamp shown under the title (defaults to now)
+
+    Returns:
+        bytes: PDF file content
+    """
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=letter,
+        rightMargin=72,
+        leftMargin=72,
+        topMargin=72,
+        bottomMargin=18,
+    )
+    doc.build(build_flowables(report, quiz_heading, generated_on))
+    return buffer.getvalue()
+
+
+def render_pdf(summary: str, quiz: str, user_answers: Optional[Dict] = None,
+               quiz_heading: str = QUIZ_RESULTS_HEADING,
+               generated_on: Optional[str] = None) -> bytes:
+    """
+    Render one summary/quiz document to PDF bytes
+
+    Args:
+        summary: Summary text
+        quiz: Quiz questions text
+        user_answers: Dict of user answers {question_id: answer_key}, if any
+        quiz_heading: Heading shown above the quiz questions
+        generated_on: Timestamp shown under the title (defaults to now)
+
+    Returns:
+        bytes: PDF file content
+    """
+    return render_report_pdf(QuizReport.build(summary, quiz, user_answers), quiz_heading, generated_on)
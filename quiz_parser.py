@@ -0,0 +1,68 @@
+"""
+Quiz parsing utilities for Study Assistant
+Turns generated quiz text into structured question data
+"""
+
+import re
+from typing import Any, Dict, List
+
+# Precompiled patterns for the quiz format produced by generate_quiz_questions()
+QUESTION_SPLIT_PATTERN = re.compile(r'Question\s+\d+:')
+OPTION_PATTERN = re.compile(r'^([a-d])\)\s*(.+)', re.IGNORECASE)
+ANSWER_PREFIX_PATTERN = re.compile(r'^Answer:\s*', re.IGNORECASE)
+ANSWER_KEY_PATTERN = re.compile(r'^([a-d])\)', re.IGNORECASE)
+
+
+def parse_quiz_data(quiz: str) -> List[Dict[str, Any]]:
+    """
+    Parse quiz string into structured data
+
+    Returns:
+        list: List of dicts with question data
+    """
+    questions_data = []
+
+    # Split questions by "Question" keyword
+    questions = QUESTION_SPLIT_PATTERN.split(quiz)
+    questions = [q.strip() for q in questions if q.strip()]
+
+    for i, question_block in enumerate(questions, 1):
+        lines = question_block.strip().split('\n')
+
+        question_text = ""
+        options = {}
+        answer_key = ""
+        answer_text = ""
+
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+
+            # Check if it's an option
+            option_match = OPTION_PATTERN.match(line)
+            if option_match:
+                key = option_match.group(1).lower()
+                text = option_match.group(2).strip()
+                options[key] = text
+            # Check if it's the answer line
+            elif ANSWER_PREFIX_PATTERN.match(line):
+                answer_full = ANSWER_PREFIX_PATTERN.sub('', line)
+                # Extract answer key (a, b, c, or d)
+                answer_match = ANSWER_KEY_PATTERN.match(answer_full)
+                if answer_match:
+                    answer_key = answer_match.group(1).lower()
+                    answer_text = answer_full
+            # Otherwise, it's part of the question
+            elif not options and not answer_key:
+                question_text += " " + line
+
+        questions_data.append({
+            'id': i,
+            'question': question_text.strip(),
+            'options': options,
+            'answer_key': answer_key,
+            'answer_text': answer_text
+        })
+
+    return questions_data
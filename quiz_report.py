@@ -0,0 +1,161 @@
+"""
+Quiz report model for Study Assistant
+Shared data model for text and PDF exports, plus the streaming text report builder
+"""
+
+import io
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from quiz_parser import parse_quiz_data
+
+RULE = '=' * 70
+HEAVY_RULE = '━' * 70
+
+
+def get_grade(percentage: float) -> str:
+    """Get the grade label for a quiz percentage"""
+    if percentage >= 80:
+        return "🌟 Excellent"
+    elif percentage >= 60:
+        return "👍 Good"
+    return "📚 Keep Learning"
+
+
+@dataclass
+class QuizReport:
+    """Summary, parsed quiz questions and (optionally) graded user answers"""
+
+    summary: str
+    quiz: str
+    questions: List[Dict[str, Any]]
+    user_answers: Optional[Dict] = None
+    correct_count: int = 0
+    total_count: int = 0
+    answered_count: int = 0
+    percentage: float = 0.0
+
+    @classmethod
+    def build(cls, summary: str, quiz: str, user_answers: Optional[Dict] = None) -> "QuizReport":
+        """
+        Parse the quiz and grade the answers
+
+        Args:
+            summary: Summary text
+            quiz: Quiz questions text
+            user_answers: Dict of user answers {question_id: answer_key}, if any
+        """
+        questions = parse_quiz_data(quiz)
+        user_answers = user_answers or None
+        report = cls(summary=summary, quiz=quiz, questions=questions, user_answers=user_answers,
+                     total_count=len(questions))
+        if user_answers:
+            report.correct_count = sum(
+                1 for q in questions
+                if user_answers.get(q['id']) == q['answer_key']
+            )
+            report.answered_count = len(user_answers)
+            report.percentage = (report.correct_count / report.total_count * 100) if report.total_count > 0 else 0
+        return report
+
+    @property
+    def has_results(self) -> bool:
+        """Whether the report includes graded user answers"""
+        return bool(self.user_answers)
+
+    @property
+    def grade(self) -> str:
+        """Grade label for the report's percentage"""
+        return get_grade(self.percentage)
+
+    def question_status(self, question: Dict[str, Any]) -> str:
+        """Get 'correct', 'incorrect' or 'unanswered' for a question"""
+        user_answer = (self.user_answers or {}).get(question['id'])
+        if user_answer == question['answer_key']:
+            return 'correct'
+        return 'incorrect' if user_answer else 'unanswered'
+
+
+def iter_text_report(report: QuizReport, generated_at: Optional[datetime] = None) -> Iterator[str]:
+    """
+    Yield the plain-text report in chunks
+
+    Args:
+        report: Report to render
+        generated_at: Timestamp shown in the footer (defaults to now)
+
+    Yields:
+        str: Consecutive pieces of the report
+    """
+    yield f"""╔══════════════════════════════════════════════════════════════════════╗
+║              STUDY ASSISTANT - QUIZ GENERATOR                        ║
+╚══════════════════════════════════════════════════════════════════════╝
+
+{RULE}
+                              📋 SUMMARY
+{RULE}
+
+{report.summary}
+
+{RULE}
+                          📝 QUIZ QUESTIONS
+{RULE}
+
+{report.quiz}
+"""
+
+    if report.has_results:
+        yield f"""
+
+{RULE}
+                           📊 QUIZ RESULTS
+{RULE}
+
+PERFORMANCE SUMMARY:
+{HEAVY_RULE}
+  Score:           {report.correct_count}/{report.total_count} questions correct
+  Percentage:      {report.percentage:.1f}%
+  Answered:        {report.answered_count}/{report.total_count} questions
+  Grade:           {report.grade}
+{HEAVY_RULE}
+
+DETAILED ANSWER REVIEW:
+{RULE}
+"""
+        status_labels = {
+            'correct': "✅ CORRECT",
+            'incorrect': "❌ INCORRECT",
+            'unanswered': "⚠️  NOT ANSWERED",
+        }
+        for q in report.questions:
+            user_answer = report.user_answers.get(q['id'])
+            user_answer_text = f"{user_answer.upper()}) {q['options'].get(user_answer, 'N/A')}" if user_answer else "Not answered"
+
+            yield f"""
+Question {q['id']}: {q['question']}
+{HEAVY_RULE}
+  Your Answer:     {user_answer_text}
+  Correct Answer:  {q['answer_text']}
+  Status:          {status_labels[report.question_status(q)]}
+{RULE}
+
+"""
+
+    generated_at = generated_at or datetime.now()
+    yield f"""
+{RULE}
+
+Generated using Study Assistant
+Date: {generated_at.strftime('%Y-%m-%d %H:%M:%S')}
+
+{RULE}
+"""
+
+
+def build_text_report(report: QuizReport, generated_at: Optional[datetime] = None) -> str:
+    """Render the plain-text report into a single string"""
+    buffer = io.StringIO()
+    for chunk in iter_text_report(report, generated_at):
+        buffer.write(chunk)
+    return buffer.getvalue()
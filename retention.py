@@ -0,0 +1,294 @@
+"""
+Retention and maintenance for the Study Assistant activity database
+Archives inactive sessions to a separate database and keeps the hot file compact
+"""
+
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from database import DatabaseManager
+from scheduler import run_in_background_if_due
+
+logger = logging.getLogger(__name__)
+
+# Tables moved to the archive, in copy order
+ARCHIVE_TABLES = ['sessions', 'generations', 'quiz_results']
+
+# Scheduled maintenance: retention is only applied automatically when
+# RETENTION_DAYS is set; compaction always runs
+MAINTENANCE_INTERVAL = 6 * 3600
+INCREMENTAL_VACUUM_PAGES = 2000
+
+
+def default_archive_path(db_path: str) -> str:
+    """Get the archive database path that sits next to a hot database"""
+    root, ext = os.path.splitext(db_path)
+    return f"{root}_archive{ext or '.db'}"
+
+
+def get_retention_days() -> Optional[int]:
+    """Get the automatic retention period from the RETENTION_DAYS environment variable"""
+    value = os.getenv("RETENTION_DAYS", "").strip()
+    if not value:
+        return None
+    try:
+        days = int(value)
+    except ValueError:
+        logger.warning("Ignoring invalid RETENTION_DAYS=%r", value)
+        return None
+    return days if days > 0 else None
+
+
+def _shared_columns(cursor, table: str) -> List[str]:
+    """Get the columns a table has in both the hot and the archive database"""
+    cursor.execute(f"PRAGMA main.table_info({table})")
+    main_columns = [row[1] for row in cursor.fetchall()]
+    cursor.execute(f"PRAGMA archive.table_info({table})")
+    archive_columns = {row[1] for row in cursor.fetchall()}
+    return [column for column in main_columns if column in archive_columns]
+
+
+def archive_inactive_sessions(db: DatabaseManager, older_than_days: int,
+                              archive_path: Optional[str] = None, batch_size: int = 200,
+                              progress_callback: Optional[Callable[[int], None]] = None) -> Dict[str, int]:
+    """
+    Move sessions inactive for N days, with their activity, to the archive database
+
+    Whole sessions are archived: a session's last_activity is bumped by every
+    generation and quiz result, so everything it owns is at least as old.
+    That keeps the per-session counters and running statistics consistent.
+
+    Each batch is first copied into the archive and committed, then deleted
+    from the hot database in a second transaction. If the process dies in
+    between, the next run copies the batch again instead of losing it; rows
+    already in the archive are skipped (INSERT OR IGNORE, not REPLACE: its
+    re-insert fires the archive's statistics insert triggers, but the
+    implicit delete doesn't fire the delete triggers, so rows would be
+    counted twice). Quiz answers follow their quiz results (a trigger
+    removes them from the hot database), and archived generations are
+    taken out of its search index. Summary/quiz blobs are copied as
+    they are (already compressed) and removed from the hot database once
+    nothing references them.
+
+    Args:
+        db: Hot database
+        older_than_days: Archive sessions whose last activity is older than this
+        archive_path: Archive database file (defaults to <db>_archive.db)
+        batch_size: Sessions moved per batch
+        progress_callback: Called with the number of sessions archived so far
+
+    Returns:
+        dict: Number of sessions, generations, quiz results and blobs moved
+    """
+    archive_path = archive_path or default_archive_path(db.db_path)
+    # Create the archive schema (same tables, indexes and statistics)
+    DatabaseManager(archive_path)
+
+    cutoff_epoch = int(time.time()) - older_than_days * 86400
+    totals = {'sessions': 0, 'generations': 0, 'quiz_results': 0, 'blobs': 0}
+
+    # Every statement below has to run on the connection the archive is attached to
+    with db.connection() as conn:
+        conn.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+        try:
+            with db.cursor() as cursor:
+                columns = {table: _shared_columns(cursor, table) for table in ARCHIVE_TABLES}
+
+            while True:
+                with db.cursor() as cursor:
+                    cursor.execute("""
+                        SELECT session_id FROM main.sessions
+                        WHERE last_activity_epoch < ?
+                        ORDER BY last_activity_epoch
+                        LIMIT ?
+                    """, (cutoff_epoch, batch_size))
+                    session_ids = [row[0] for row in cursor.fetchall()]
+                if not session_ids:
+                    break
+
+                placeholders = ', '.join('?' for _ in session_ids)
+
+                # 1. Copy the batch into the archive
+                with db.transaction() as cursor:
+                    for table in ARCHIVE_TABLES:
+                        column_list = ', '.join(columns[table])
+                        cursor.execute(f"""
+                            INSERT OR IGNORE INTO archive.{table} ({column_list})
+                            SELECT {column_list} FROM main.{table}
+                            WHERE session_id IN ({placeholders})
+                        """, session_ids)
+
+                    # Per-question answers belong to the archived quiz results
+                    cursor.execute(f"""
+                        INSERT OR IGNORE INTO archive.quiz_answers
+                        SELECT * FROM main.quiz_answers
+                        WHERE result_id IN (SELECT id FROM main.quiz_results WHERE session_id IN ({placeholders}))
+                    """, session_ids)
+
+                    cursor.execute(f"""
+                        INSERT OR IGNORE INTO archive.blobs (hash, codec, size, data)
+                        SELECT hash, codec, size, data FROM main.blobs
+                        WHERE hash IN (
+                            SELECT summary_hash FROM main.generations WHERE session_id IN ({placeholders})
+                            UNION
+                            SELECT quiz_hash FROM main.generations WHERE session_id IN ({placeholders})
+                        )
+                    """, session_ids + session_ids)
+
+                # 2. Remove it from the hot database
+                with db.transaction() as cursor:
+                    cursor.execute(f"""
+                        SELECT summary_hash FROM main.generations WHERE session_id IN ({placeholders})
+                        UNION
+                        SELECT quiz_hash FROM main.generations WHERE session_id IN ({placeholders})
+                    """, session_ids + session_ids)
+                    blob_hashes = [row[0] for row in cursor.fetchall() if row[0]]
+
+                    cursor.execute(f"SELECT id FROM main.generations WHERE session_id IN ({placeholders})",
+                                   session_ids)
+                    db.unindex_generations(cursor, [row[0] for row in cursor.fetchall()])
+
+                    for table in reversed(ARCHIVE_TABLES):
+                        cursor.execute(f"DELETE FROM main.{table} WHERE session_id IN ({placeholders})",
+                                       session_ids)
+                        totals[table] += cursor.rowcount
+
+                    totals['blobs'] += _delete_unreferenced_blobs(cursor, blob_hashes)
+
+                if progress_callback:
+                    progress_callback(totals['sessions'])
+                if len(session_ids) < batch_size:
+                    break
+        finally:
+            conn.execute("DETACH DATABASE archive")
+
+    return totals
+
+
+def _delete_unreferenced_blobs(cursor, blob_hashes: List[str]) -> int:
+    """Delete the given blobs if no generation references them any more"""
+    if not blob_hashes:
+        return 0
+    cursor.execute(f"""
+        DELETE FROM main.blobs
+        WHERE hash IN ({', '.join('?' for _ in blob_hashes)})
+          AND NOT EXISTS (SELECT 1 FROM main.generations WHERE summary_hash = blobs.hash)
+          AND NOT EXISTS (SELECT 1 FROM main.generations WHERE quiz_hash = blobs.hash)
+    """, blob_hashes)
+    return cursor.rowcount
+
+
+def purge_orphan_blobs(db: DatabaseManager, batch_size: int = 1000) -> int:
+    """
+    Delete blobs that no generation references
+
+    Walks the blobs table in rowid order, one small transaction per batch.
+
+    Returns:
+        int: Number of blobs deleted
+    """
+    deleted = 0
+    last_rowid = 0
+    while True:
+        with db.transaction() as cursor:
+            cursor.execute("SELECT rowid, hash FROM blobs WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                           (last_rowid, batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                return deleted
+            deleted += _delete_unreferenced_blobs(cursor, [row[1] for row in rows])
+        last_rowid = rows[-1][0]
+
+
+def get_storage_info(db: DatabaseManager) -> Dict[str, Any]:
+    """
+    Get page usage of the database file
+
+    Returns:
+        dict: page_size, page_count, freelist_count, file_bytes, free_bytes, auto_vacuum
+    """
+    with db.cursor() as cursor:
+        page_size = cursor.execute("PRAGMA page_size").fetchone()[0]
+        page_count = cursor.execute("PRAGMA page_count").fetchone()[0]
+        freelist_count = cursor.execute("PRAGMA freelist_count").fetchone()[0]
+        auto_vacuum = cursor.execute("PRAGMA auto_vacuum").fetchone()[0]
+
+    return {
+        'page_size': page_size,
+        'page_count': page_count,
+        'freelist_count': freelist_count,
+        'file_bytes': page_size * page_count,
+        'free_bytes': page_size * freelist_count,
+        'auto_vacuum': {0: 'none', 1: 'full', 2: 'incremental'}.get(auto_vacuum, str(auto_vacuum))
+    }
+
+
+def compact_database(db: DatabaseManager, full: bool = False,
+                     max_pages: Optional[int] = INCREMENTAL_VACUUM_PAGES) -> Dict[str, Any]:
+    """
+    Return free pages to the filesystem and refresh query planner statistics
+
+    The incremental path releases at most max_pages free pages, so it is
+    cheap enough to run while the app is serving. A full VACUUM rewrites the
+    whole file, and it also switches databases created before incremental
+    auto-vacuum to that mode; run it from the CLI during a quiet period.
+
+    Args:
+        db: Database to compact
+        full: Run a full VACUUM instead of an incremental one
+        max_pages: Page limit for the incremental vacuum (None for all free pages)
+
+    Returns:
+        dict: Storage info before and after
+    """
+    before = get_storage_info(db)
+
+    with db.connection() as conn:
+        if full:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+        elif before['auto_vacuum'] == 'incremental' and before['freelist_count']:
+            pages = before['freelist_count'] if max_pages is None else min(max_pages, before['freelist_count'])
+            # executescript steps the pragma to completion; execute() would
+            # stop after freeing a single page
+            conn.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+
+        conn.execute("PRAGMA optimize")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    return {'before': before, 'after': get_storage_info(db)}
+
+
+def run_maintenance(db_path: str, retention_days: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Run one maintenance pass: retention (if configured), orphan blobs, compaction
+
+    Returns:
+        dict: Results of each step that ran
+    """
+    db = DatabaseManager(db_path)
+    results: Dict[str, Any] = {}
+    if retention_days:
+        results['archived'] = archive_inactive_sessions(db, retention_days)
+    results['orphan_blobs'] = purge_orphan_blobs(db)
+    results['compaction'] = compact_database(db)
+    return results
+
+
+def run_scheduled_maintenance(db_path: str = "study_assistant.db",
+                              interval: float = MAINTENANCE_INTERVAL) -> bool:
+    """
+    Start a background maintenance pass if none ran in the last interval seconds
+
+    Cheap to call on every rerun. Retention uses RETENTION_DAYS from the
+    environment.
+
+    Returns:
+        bool: True if a maintenance pass was started
+    """
+    return run_in_background_if_due(
+        f"maintenance:{os.path.abspath(db_path)}", interval,
+        lambda: run_maintenance(db_path, get_retention_days())
+    )
@@ -0,0 +1,230 @@
+"""
+Activity rollups for Study Assistant
+Incrementally aggregates activity per hour and per day for the dashboard charts
+"""
+
+import os
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from database import EPOCH_MIGRATION, DatabaseManager
+from scheduler import run_in_background_if_due
+
+# Bucket width in seconds per rollup period (UTC hours and days)
+PERIODS = {'hour': 3600, 'day': 86400}
+
+# How often the background job folds new activity into the rollups
+ROLLUP_INTERVAL = 300
+
+# Rows newer than this are left for the next run, so rows that are committed
+# a little after their timestamp (write-behind, concurrent writers) are not
+# skipped by the watermark
+ROLLUP_LAG_SECONDS = 60
+
+# Source table -> (key column, epoch column, extra columns). Rows are read in
+# (epoch, key) order: neither ids from concurrent writers nor session rowids
+# (reused once sessions are archived) follow time, but the set of rows with
+# a timestamp older than the lag window no longer changes.
+ROLLUP_SOURCES = {
+    'sessions': ('rowid', 'created_at_epoch', []),
+    'generations': ('id', 'timestamp_epoch', ['model_used']),
+    'quiz_results': ('id', 'completed_at_epoch', ['percentage']),
+}
+
+
+def update_rollups(db: DatabaseManager, batch_size: int = 5000) -> Dict[str, int]:
+    """
+    Fold activity added since the last run into the hourly and daily rollups
+
+    Each source table is read in (epoch, key) order from the watermark
+    stored in rollup_state, up to ROLLUP_LAG_SECONDS ago. A batch is
+    aggregated in memory, then added to the rollups in the same transaction
+    that advances the watermark, so every row is counted exactly once. The
+    first run catches up on all existing rows batch by batch. Archiving old
+    sessions does not change the rollups, so the charts keep their full
+    history.
+
+    With a sharded database every shard keeps its own rollups and
+    watermarks; the readers below add them up.
+
+    Returns:
+        dict: Number of rows rolled up per source table
+    """
+    totals = {source: 0 for source in ROLLUP_SOURCES}
+    for shard in db.shards:
+        for source, count in _update_shard_rollups(shard, batch_size).items():
+            totals[source] += count
+    return totals
+
+
+def _update_shard_rollups(db: DatabaseManager, batch_size: int) -> Dict[str, int]:
+    """Fold new activity of one database file into its rollups"""
+    totals = {source: 0 for source in ROLLUP_SOURCES}
+    # Rows without epochs yet would be left behind the watermark
+    if any(version == EPOCH_MIGRATION for version, _, _ in db.get_pending_backfills()):
+        return totals
+
+    cutoff_epoch = int(time.time()) - ROLLUP_LAG_SECONDS
+    for source, (key_column, epoch_column, extra_columns) in ROLLUP_SOURCES.items():
+        while True:
+            with db.transaction() as cursor:
+                cursor.execute("SELECT last_epoch, last_id FROM rollup_state WHERE source = ?", (source,))
+                watermark = tuple(cursor.fetchone() or (0, 0))
+
+                # An index range scan on the epoch column (the key is the rowid)
+                columns = ', '.join([key_column, epoch_column] + extra_columns)
+                cursor.execute(f"""
+                    SELECT {columns} FROM {source}
+                    WHERE ({epoch_column}, {key_column}) > (?, ?) AND {epoch_column} < ?
+                    ORDER BY {epoch_column}, {key_column}
+                    LIMIT ?
+                """, watermark + (cutoff_epoch, batch_size))
+                ready = cursor.fetchall()
+                if not ready:
+                    break
+
+                _add_to_rollups(cursor, source, ready)
+                cursor.execute("""
+                    INSERT INTO rollup_state (source, last_epoch, last_id) VALUES (?, ?, ?)
+                    ON CONFLICT(source) DO UPDATE SET
+                        last_epoch = excluded.last_epoch,
+                        last_id = excluded.last_id
+                """, (source, ready[-1][1], ready[-1][0]))
+
+            totals[source] += len(ready)
+            if len(ready) < batch_size:
+                break
+    return totals
+
+
+def _add_to_rollups(cursor, source: str, rows: List[tuple]):
+    """Aggregate a batch of source rows per bucket and add them to the rollups"""
+    activity: Dict[tuple, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    models: Dict[tuple, int] = defaultdict(int)
+
+    for row in rows:
+        epoch = row[1]
+        if epoch is None:
+            continue
+        for period, width in PERIODS.items():
+            bucket = (period, epoch - epoch % width)
+            counts = activity[bucket]
+            if source == 'sessions':
+                counts['sessions'] += 1
+            elif source == 'generations':
+                counts['generations'] += 1
+                models[bucket + (row[2] or 'unknown',)] += 1
+            else:
+                counts['quizzes'] += 1
+                if row[2] is not None:
+                    counts['score_sum'] += row[2]
+                    counts['score_count'] += 1
+
+    cursor.executemany("""
+        INSERT INTO activity_rollups (period, bucket_epoch, sessions, generations, quizzes, score_sum, score_count)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(period, bucket_epoch) DO UPDATE SET
+            sessions = sessions + excluded.sessions,
+            generations = generations + excluded.generations,
+            quizzes = quizzes + excluded.quizzes,
+            score_sum = score_sum + excluded.score_sum,
+            score_count = score_count + excluded.score_count
+    """, [
+        (period, bucket_epoch, int(counts['sessions']), int(counts['generations']),
+         int(counts['quizzes']), counts['score_sum'], int(counts['score_count']))
+        for (period, bucket_epoch), counts in activity.items()
+    ])
+
+    cursor.executemany("""
+        INSERT INTO model_rollups (period, bucket_epoch, model, generations)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(period, bucket_epoch, model) DO UPDATE SET
+            generations = generations + excluded.generations
+    """, [key + (count,) for key, count in models.items()])
+
+
+def get_activity_series(db: DatabaseManager, period: str = 'day', start_epoch: Optional[int] = None,
+                        end_epoch: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Get activity per hour or day in a time range
+
+    Reads only the buckets in the range (a primary key range scan), so the
+    cost depends on the range shown, not on how much history is stored.
+
+    Args:
+        period: 'hour' or 'day'
+        start_epoch: Inclusive lower bound on bucket start
+        end_epoch: Exclusive upper bound on bucket start
+
+    Returns:
+        list: Buckets with bucket_epoch, sessions, generations, quizzes, average_score
+    """
+    buckets: Dict[int, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    for shard in db.shards:
+        with shard.cursor() as cursor:
+            cursor.execute("""
+                SELECT bucket_epoch, sessions, generations, quizzes, score_sum, score_count
+                FROM activity_rollups
+                WHERE period = ? AND bucket_epoch >= ? AND bucket_epoch < ?
+            """, (period, start_epoch or 0, end_epoch or 2 ** 62))
+            rows = cursor.fetchall()
+
+        for bucket_epoch, sessions, generations, quizzes, score_sum, score_count in rows:
+            totals = buckets[bucket_epoch]
+            totals['sessions'] += sessions
+            totals['generations'] += generations
+            totals['quizzes'] += quizzes
+            totals['score_sum'] += score_sum
+            totals['score_count'] += score_count
+
+    return [
+        {
+            'bucket_epoch': bucket_epoch,
+            'sessions': int(totals['sessions']),
+            'generations': int(totals['generations']),
+            'quizzes': int(totals['quizzes']),
+            'average_score': totals['score_sum'] / totals['score_count'] if totals['score_count'] else None
+        }
+        for bucket_epoch, totals in sorted(buckets.items())
+    ]
+
+
+def get_model_mix(db: DatabaseManager, period: str = 'day', start_epoch: Optional[int] = None,
+                  end_epoch: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Get generations per model per hour or day in a time range
+
+    Returns:
+        list: Rows with bucket_epoch, model, generations
+    """
+    counts: Dict[tuple, int] = defaultdict(int)
+    for shard in db.shards:
+        with shard.cursor() as cursor:
+            cursor.execute("""
+                SELECT bucket_epoch, model, generations
+                FROM model_rollups
+                WHERE period = ? AND bucket_epoch >= ? AND bucket_epoch < ?
+            """, (period, start_epoch or 0, end_epoch or 2 ** 62))
+            for bucket_epoch, model, generations in cursor.fetchall():
+                counts[(bucket_epoch, model)] += generations
+
+    return [
+        {'bucket_epoch': bucket_epoch, 'model': model, 'generations': generations}
+        for (bucket_epoch, model), generations in sorted(counts.items())
+    ]
+
+
+def run_scheduled_rollups(db_path: str = "study_assistant.db", interval: float = ROLLUP_INTERVAL) -> bool:
+    """
+    Start a background rollup update if none ran in the last interval seconds
+
+    Covers one database file; call it for each shard of a sharded database.
+
+    Returns:
+        bool: True if an update was started
+    """
+    return run_in_background_if_due(
+        f"rollups:{os.path.abspath(db_path)}", interval,
+        lambda: update_rollups(DatabaseManager(db_path))
+    )
@@ -0,0 +1,52 @@
+"""
+Background job scheduling for Study Assistant
+Runs periodic database jobs on daemon threads, throttled per process
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+_last_runs: Dict[str, float] = {}
+_running: Dict[str, threading.Thread] = {}
+_lock = threading.Lock()
+
+
+def run_in_background_if_due(name: str, interval: float, job: Callable[[], object]) -> bool:
+    """
+    Start job on a daemon thread unless it ran within the last interval seconds
+
+    Cheap enough to call on every rerun: it only checks in-process state.
+    A job is never started while its previous run is still going.
+
+    Args:
+        name: Job key (include the database path for per-database jobs)
+        interval: Minimum seconds between starts
+        job: Callable to run; its return value is logged
+
+    Returns:
+        bool: True if the job was started
+    """
+    now = time.monotonic()
+    with _lock:
+        last_run = _last_runs.get(name)
+        if last_run is not None and now - last_run < interval:
+            return False
+        running = _running.get(name)
+        if running is not None and running.is_alive():
+            return False
+        _last_runs[name] = now
+
+        def worker():
+            try:
+                result = job()
+                logger.info("Background job %s finished: %s", name, result)
+            except Exception:
+                logger.exception("Background job %s failed", name)
+
+        thread = _running[name] = threading.Thread(target=worker, name=f"job-{name}", daemon=True)
+        thread.start()
+        return True
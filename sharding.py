@@ -0,0 +1,358 @@
+"""
+Sharded storage for Study Assistant
+Spreads activity over several SQLite files by session, so writes don't share one lock
+"""
+
+import heapq
+import json
+import os
+import threading
+import zlib
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from database import DatabaseManager, SESSION_HEARTBEAT_INTERVAL, sessions_rows_to_columns
+
+DEFAULT_DB_PATH = "study_assistant.db"
+
+# Ids of shard k start at k << SHARD_ID_BITS, so generation and quiz result
+# ids stay unique across shards (shard 0 keeps the ids it already has)
+SHARD_ID_BITS = 40
+SHARDED_ID_TABLES = ['generations', 'quiz_results']
+
+_reserved_shards: Set[str] = set()
+_reserved_lock = threading.Lock()
+
+
+def get_shard_count() -> int:
+    """Get the number of shards from the DB_SHARDS environment variable (default 1)"""
+    try:
+        return max(1, int(os.getenv("DB_SHARDS", "1")))
+    except ValueError:
+        return 1
+
+
+def shard_paths(db_path: str, shard_count: int) -> List[str]:
+    """
+    Get the database file of every shard
+
+    Shard 0 is the unsharded database file itself, so existing data stays
+    where it is; shard k is <name>.shard<k>.db next to it.
+    """
+    root, ext = os.path.splitext(db_path)
+    return [db_path] + [f"{root}.shard{k}{ext or '.db'}" for k in range(1, shard_count)]
+
+
+def shard_index(session_id: str, shard_count: int) -> int:
+    """Get the shard a session's activity is stored in (stable across processes)"""
+    return zlib.crc32(session_id.encode('utf-8')) % shard_count
+
+
+def merge_keyset_pages(pages: List[Tuple[List[Any], Any]], limit: int,
+                       key: Callable[[Any], tuple]) -> Tuple[List[Any], Optional[tuple]]:
+    """
+    Merge the same keyset page fetched from every shard (newest first)
+
+    Each shard returned its next `limit` rows after the same cursor, so the
+    merged page is the first `limit` of all of them, and the next cursor is
+    the key of its last row if any rows are left anywhere.
+
+    Args:
+        pages: (rows, next cursor) per shard
+        limit: Page size
+        key: Sort key of a row, which is also its cursor
+    """
+    more = any(next_cursor is not None for _, next_cursor in pages)
+    rows = sorted((row for page, _ in pages for row in page), key=key, reverse=True)
+    page = rows[:limit]
+    more = more or len(rows) > limit
+    return page, (key(page[-1]) if more and page else None)
+
+
+def open_database(db_path: str = DEFAULT_DB_PATH, shard_count: Optional[int] = None, **kwargs):
+    """
+    Open the activity store: a DatabaseManager, or a ShardedDatabaseManager for several shards
+
+    Args:
+        db_path: Database file (shard 0 when sharded)
+        shard_count: Number of shards (defaults to DB_SHARDS)
+        **kwargs: Passed on to every DatabaseManager
+
+    Returns:
+        DatabaseManager or ShardedDatabaseManager
+    """
+    shard_count = shard_count or get_shard_count()
+    if shard_count == 1:
+        return DatabaseManager(db_path, **kwargs)
+    return ShardedDatabaseManager(db_path, shard_count, **kwargs)
+
+
+class ShardedDatabaseManager:
+    """
+    DatabaseManager interface over N shard databases, routed by session
+
+    A session's activity (session row, generations, quiz results) lives in
+    one shard picked by a hash of its session_id, so every logging call is
+    a transaction on one file. Each shard has its own write lock and, with
+    write_behind, its own background writer, so writes scale with the shard
+    count. Admin queries fan out to all shards and merge the results.
+
+    Changing the shard count re-routes sessions; reads by session search all
+    shards, so older activity stays visible, but keep the count fixed.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, shard_count: int = 2,
+                 write_behind: bool = False, heartbeat_interval: float = SESSION_HEARTBEAT_INTERVAL,
+                 read_only: bool = False):
+        """
+        Open (creating and migrating if needed) every shard
+
+        Args:
+            db_path: Database file of shard 0; other shards sit next to it
+            shard_count: Number of shards
+            write_behind, heartbeat_interval, read_only: As for DatabaseManager
+        """
+        self.db_path = db_path
+        self.read_only = read_only
+        self.shards = [
+            DatabaseManager(path, write_behind=write_behind,
+                            heartbeat_interval=heartbeat_interval, read_only=read_only)
+            for path in shard_paths(db_path, shard_count)
+        ]
+        if not read_only:
+            for index, shard in enumerate(self.shards):
+                self._reserve_id_range(index, shard)
+
+    @staticmethod
+    def _reserve_id_range(index: int, shard: DatabaseManager):
+        """Start a shard's AUTOINCREMENT sequences at its id base (once per process)"""
+        key = os.path.abspath(shard.db_path)
+        with _reserved_lock:
+            if index == 0 or key in _reserved_shards:
+                return
+            base = index << SHARD_ID_BITS
+            with shard.transaction() as cursor:
+                for table in SHARDED_ID_TABLES:
+                    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,))
+                    row = cursor.fetchone()
+                    if row is None:
+                        cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table, base))
+                    elif row[0] < base:
+                        cursor.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = ?", (base, table))
+            _reserved_shards.add(key)
+
+    def shard_for(self, session_id: str) -> DatabaseManager:
+        """Get the shard that stores a session's activity"""
+        return self.shards[shard_index(session_id, len(self.shards))]
+
+    @property
+    def search_enabled(self) -> bool:
+        """Whether every shard has the full-text search index"""
+        return all(shard.search_enabled for shard in self.shards)
+
+    # Writes: routed to the session's shard
+
+    def create_or_update_session(self, session_id: str, username: Optional[str] = None,
+                                 ip_address: Optional[str] = None,
+                                 user_agent: Optional[str] = None) -> bool:
+        """Create a new session or update existing one"""
+        return self.shard_for(session_id).create_or_update_session(session_id, username, ip_address, user_agent)
+
+    def log_generation(self, session_id: str, file_name: Optional[str] = None,
+                       file_size: Optional[int] = None, content_length: Optional[int] = None,
+                       input_method: str = "text", summary: str = "", quiz: str = "",
+                       model_used: str = "", debug_mode: bool = False) -> int:
+        """Log a content generation event"""
+        return self.shard_for(session_id).log_generation(
+            session_id, file_name, file_size, content_length, input_method,
+            summary, quiz, model_used, debug_mode
+        )
+
+    def log_quiz_result(self, session_id: str, generation_id: int,
+                        score: int, total_questions: int, answered_count: int,
+                        user_answers: Dict[str, str],
+                        answer_key: Optional[Dict[int, str]] = None) -> int:
+        """Log quiz completion results"""
+        return self.shard_for(session_id).log_quiz_result(
+            session_id, generation_id, score, total_questions, answered_count, user_answers, answer_key
+        )
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until queued write-behind activity is committed on every shard"""
+        return all([shard.flush(timeout) for shard in self.shards])
+
+    # Per-session reads: the session's shard first, then the others
+
+    def _session_shards(self, session_id: str) -> List[DatabaseManager]:
+        """Get all shards, the session's own shard first"""
+        home = self.shard_for(session_id)
+        return [home] + [shard for shard in self.shards if shard is not home]
+
+    def get_session_info(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Get session information"""
+        for shard in self._session_shards(session_id):
+            info = shard.get_session_info(session_id)
+            if info is not None:
+                return info
+        return None
+
+    def get_session_generations(self, session_id: str) -> List[Dict[str, Any]]:
+        """Get all generations for a session"""
+        generations = [g for shard in self.shards for g in shard.get_session_generations(session_id)]
+        return sorted(generations, key=lambda g: g['timestamp'], reverse=True)
+
+    def get_session_quiz_results(self, session_id: str) -> List[Dict[str, Any]]:
+        """Get all quiz results for a session"""
+        results = [r for shard in self.shards for r in shard.get_session_quiz_results(session_id)]
+        return sorted(results, key=lambda r: r['completed_at'], reverse=True)
+
+    def get_session_generations_page(self, session_id: str, limit: int = 20,
+                                     after: Optional[Tuple[str, int]] = None
+                                     ) -> Tuple[List[Dict[str, Any]], Optional[Tuple[str, int]]]:
+        """Get one page of a session's generations, newest first"""
+        return merge_keyset_pages(
+            [shard.get_session_generations_page(session_id, limit, after) for shard in self.shards],
+            limit, key=lambda g: (g['timestamp'], g['id'])
+        )
+
+    def get_session_quiz_results_page(self, session_id: str, limit: int = 20,
+                                      after: Optional[Tuple[str, int]] = None
+                                      ) -> Tuple[List[Dict[str, Any]], Optional[Tuple[str, int]]]:
+        """Get one page of a session's quiz results, newest first"""
+        return merge_keyset_pages(
+            [shard.get_session_quiz_results_page(session_id, limit, after) for shard in self.shards],
+            limit, key=lambda r: (r['completed_at'], r['id'])
+        )
+
+    def get_generation_content(self, generation_id: int) -> Optional[Dict[str, str]]:
+        """Get the summary and quiz text of a generation"""
+        for shard in self.shards:
+            content = shard.get_generation_content(generation_id)
+            if content is not None:
+                return content
+        return None
+
+    def export_session_data(self, session_id: str, output_path: str) -> bool:
+        """Export all data for a specific session to JSON"""
+        session_info = self.get_session_info(session_id)
+        if not session_info:
+            return False
+
+        data = {
+            'session': session_info,
+            'generations': self.get_session_generations(session_id),
+            'quiz_results': self.get_session_quiz_results(session_id),
+            'exported_at': self.shards[0].get_utc_timestamp()
+        }
+
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+        return True
+
+    # Admin queries: fan out and merge
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get overall statistics, summed over all shards"""
+        per_shard = [shard.get_statistics() for shard in self.shards]
+        totals = {
+            key: sum(stats[key] for stats in per_shard)
+            for key in ('total_sessions', 'total_generations', 'total_quiz_completions',
+                        'score_sum', 'score_count', 'active_sessions_24h')
+        }
+        # From the exact sums, not the shards' rounded averages
+        score_count = totals['score_count']
+        totals['average_quiz_score'] = round(totals['score_sum'] / score_count, 2) if score_count else 0
+        return totals
+
+    def get_all_sessions_summary(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Get summary of all sessions for admin view"""
+        sessions, _ = self.get_sessions_page(limit=limit)
+        return sessions
+
+    def get_sessions_page(self, search: str = "", limit: int = 100,
+                          after: Optional[Tuple[str, str]] = None
+                          ) -> Tuple[List[Dict[str, Any]], Optional[Tuple[str, str]]]:
+        """
+        Get one page of sessions across all shards, most recently active first
+
+        The keyset cursor is a position in the global (last_activity,
+        session_id) order, so each shard returns its next `limit` rows after
+        it and the merged page is the first `limit` of those.
+        """
+        return merge_keyset_pages(
+            [shard.get_sessions_page(search=search, limit=limit, after=after) for shard in self.shards],
+            limit, key=lambda s: (s['last_activity'], s['session_id'])
+        )
+
+    def get_sessions_columns(self, search: str = "", limit: int = 100,
+                             after: Optional[Tuple[str, str]] = None
+                             ) -> Tuple[Dict[str, tuple], Optional[Tuple[str, str]]]:
+        """Get one page of sessions across all shards as columns (see DatabaseManager)"""
+        rows, next_cursor = self.get_sessions_page_rows(search, limit, after)
+        return sessions_rows_to_columns(rows), next_cursor
+
+    def get_sessions_page_rows(self, search: str = "", limit: int = 100,
+                               after: Optional[Tuple[str, str]] = None
+                               ) -> Tuple[List[tuple], Optional[Tuple[str, str]]]:
+        """Get one page of session rows across all shards (see DatabaseManager)"""
+        # Rows end with the ISO last_activity the cursor is built from
+        return merge_keyset_pages(
+            [shard.get_sessions_page_rows(search, limit, after) for shard in self.shards],
+            limit, key=lambda row: (row[-1], row[0])
+        )
+
+    def get_activity_after(self, cursor: Optional[Dict[str, Dict[str, Any]]] = None, limit: int = 100
+                           ) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+        """
+        Get generations and quiz results logged after a feed cursor, on all shards
+
+        Every shard is followed separately, so the cursor holds the feed
+        cursor of each one: {shard db_path: cursor of that shard}.
+        """
+        cursor = cursor or {}
+        items = []
+        next_cursor = {}
+        for shard in self.shards:
+            shard_items, next_cursor[shard.db_path] = shard.get_activity_after(cursor.get(shard.db_path), limit)
+            items.extend(shard_items)
+        items.sort(key=lambda item: item['timestamp'])
+        return items, next_cursor
+
+    def search_generations(self, query: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Full-text search over generation text on all shards
+
+        Each shard ranks with BM25 over its own documents; with sessions
+        spread evenly the scores are comparable enough to merge.
+        """
+        results = [r for shard in self.shards for r in shard.search_generations(query, limit)]
+        return sorted(results, key=lambda r: r['rank'])[:limit]
+
+    def get_question_stats(self, generation_id: int) -> List[Dict[str, Any]]:
+        """Get difficulty and answer distribution for each question of a quiz"""
+        # Answers are stored with the quiz's own session, i.e. on one shard
+        for shard in self.shards:
+            stats = shard.get_question_stats(generation_id)
+            if stats:
+                return stats
+        return []
+
+    def get_hardest_questions(self, limit: int = 20, min_attempts: int = 5) -> List[Dict[str, Any]]:
+        """Get the questions answered correctly least often, across all shards"""
+        questions = [q for shard in self.shards for q in shard.get_hardest_questions(limit, min_attempts)]
+        questions.sort(key=lambda q: (q['correct_rate'], -q['attempts']))
+        return questions[:limit]
+
+    def count_generations(self, start: Optional[str] = None, end: Optional[str] = None,
+                          session_ids: Optional[List[str]] = None) -> int:
+        """Count generations matching a date range and/or session filter"""
+        return sum(shard.count_generations(start, end, session_ids) for shard in self.shards)
+
+    def iter_generations(self, start: Optional[str] = None, end: Optional[str] = None,
+                         session_ids: Optional[List[str]] = None,
+                         chunk_size: int = 200) -> Iterator[Dict[str, Any]]:
+        """Iterate generations of all shards, merged in id order"""
+        return heapq.merge(
+            *(shard.iter_generations(start, end, session_ids, chunk_size) for shard in self.shards),
+            key=lambda g: g['id']
+        )
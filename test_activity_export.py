@@ -0,0 +1,87 @@
+"""
+Tests for the resumable NDJSON export
+"""
+
+import gzip
+import json
+import os
+
+import pytest
+
+from activity_export import export_activity_ndjson, export_state_path
+from database import DatabaseManager
+from sharding import open_database
+
+
+class Interrupted(Exception):
+    pass
+
+
+def populate(db, sessions=20):
+    for i in range(sessions):
+        session_id = f"session-{i:02d}"
+        db.create_or_update_session(session_id)
+        generation_id = db.log_generation(session_id, summary=f"summary {i}", quiz="")
+        db.log_quiz_result(session_id, generation_id, 1, 2, 2, {"1": "a", "2": "b"})
+    db.flush()
+
+
+def read_records(path, compress=False):
+    with (gzip.open if compress else open)(path, 'rt', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def record_keys(records):
+    return sorted((r['type'], r.get('session_id') if r['type'] == 'session' else r['id']) for r in records)
+
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_interrupted_export_resumes_without_gaps_or_duplicates(tmp_path, compress):
+    db = DatabaseManager(str(tmp_path / "activity.db"))
+    populate(db)
+    output = str(tmp_path / ("export.ndjson.gz" if compress else "export.ndjson"))
+    expected = str(tmp_path / "expected.ndjson")
+    export_activity_ndjson(db, expected, chunk_size=7)
+
+    def interrupt_after_three_chunks(table, done):
+        interrupt_after_three_chunks.calls += 1
+        if interrupt_after_three_chunks.calls == 3:
+            raise Interrupted
+    interrupt_after_three_chunks.calls = 0
+
+    with pytest.raises(Interrupted):
+        export_activity_ndjson(db, output, compress=compress, chunk_size=7,
+                               progress_callback=interrupt_after_three_chunks)
+    assert os.path.exists(export_state_path(output))
+    # A partly written chunk after the last saved one
+    with open(output, 'ab') as f:
+        f.write(b'{"type": "sess')
+
+    counts = export_activity_ndjson(db, output, compress=compress, chunk_size=7)
+    assert counts == {'sessions': 20, 'generations': 20, 'quiz_results': 20}
+    assert not os.path.exists(export_state_path(output))
+    records = read_records(output, compress)
+    assert len(records) == 60
+    assert record_keys(records) == record_keys(read_records(expected))
+
+
+def test_export_date_range(tmp_path):
+    db = DatabaseManager(str(tmp_path / "activity.db"))
+    populate(db, 3)
+    output = str(tmp_path / "export.ndjson")
+    counts = export_activity_ndjson(db, output, start="2000-01-01", end="2000-01-02")
+    assert counts == {'sessions': 0, 'generations': 0, 'quiz_results': 0}
+    assert read_records(output) == []
+
+
+def test_sharded_export(tmp_path):
+    db = open_database(str(tmp_path / "activity.db"), 3)
+    populate(db)
+    output = str(tmp_path / "export.ndjson")
+    counts = export_activity_ndjson(db, output, chunk_size=4)
+    assert counts == {'sessions': 20, 'generations': 20, 'quiz_results': 20}
+    records = read_records(output)
+    assert len({r['id'] for r in records if r['type'] == 'generation'}) == 20
+    # Records of one type stay together
+    types = [r['type'] for r in records]
+    assert types == sorted(types, key=['session', 'generation', 'quiz_result'].index)
@@ -0,0 +1,108 @@
+"""
+Tests for the write-behind ActivityWriter
+"""
+
+import sqlite3
+import time
+
+import pytest
+
+from database import ActivityWriter, DatabaseManager
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "activity.db")
+    DatabaseManager(path)
+    return path
+
+
+def test_flush_commits_in_submit_order(db_path):
+    writer = ActivityWriter(db_path, batch_size=7)
+    try:
+        for i in range(50):
+            writer.submit([("INSERT INTO sessions (session_id, created_at, last_activity) VALUES (?, ?, ?)",
+                            (f"s{i}", "2024-01-01", "2024-01-01"))])
+            writer.submit([("UPDATE sessions SET username = ? WHERE session_id = ?", (f"user{i}", f"s{i}"))])
+        assert writer.flush(timeout=10)
+    finally:
+        writer.close()
+
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT session_id, username FROM sessions ORDER BY rowid").fetchall()
+    conn.close()
+    assert rows == [(f"s{i}", f"user{i}") for i in range(50)]
+
+
+def test_writers_on_one_file_allocate_unique_ids(db_path):
+    writers = [ActivityWriter(db_path), ActivityWriter(db_path)]
+    ids = []
+    try:
+        for i in range(250):
+            for writer in writers:
+                row_id = writer.allocate_id('generations')
+                ids.append(row_id)
+                writer.submit([("INSERT INTO generations (id, session_id, timestamp) VALUES (?, ?, ?)",
+                                (row_id, "s", "2024-01-01"))])
+            if i == 100:
+                # A plain insert between reservations takes the next sequence value
+                conn = sqlite3.connect(db_path)
+                conn.execute("INSERT INTO generations (session_id, timestamp) VALUES ('s', '2024-01-01')")
+                conn.commit()
+                conn.close()
+        for writer in writers:
+            assert writer.flush(timeout=10)
+    finally:
+        for writer in writers:
+            writer.close()
+
+    assert len(set(ids)) == len(ids)
+    conn = sqlite3.connect(db_path)
+    count = conn.execute("SELECT COUNT(*) FROM generations").fetchone()[0]
+    conn.close()
+    assert count == len(ids) + 1
+
+
+def test_failed_write_is_reported_to_its_submitter_only(db_path, monkeypatch):
+    monkeypatch.setattr('database.WRITE_RETRY_DELAY', 60)
+    writer = ActivityWriter(db_path)
+    insert = "INSERT INTO generations (id, session_id, timestamp) VALUES (?, ?, ?)"
+    try:
+        first = writer.submit([(insert, (1, "s", "2024-01-01"))])
+        duplicate = writer.submit([(insert, (1, "s", "2024-01-01"))])
+        missing_table = writer.submit([("INSERT INTO no_such_table VALUES (1)", ())])
+        other = writer.submit([(insert, (2, "s", "2024-01-01"))])
+        # Errors other than busy/locked are not retried (the delay would time this out)
+        assert writer.flush(timeout=10)
+        assert first.result() is None and other.result() is None
+        with pytest.raises(sqlite3.IntegrityError):
+            duplicate.result()
+        with pytest.raises(sqlite3.OperationalError):
+            missing_table.result()
+        assert writer.failed_writes == 2
+        # Later callers are unaffected
+        later = writer.submit([(insert, (3, "s", "2024-01-01"))])
+        assert writer.flush(timeout=10) and later.result() is None
+    finally:
+        writer.close()
+
+
+def test_busy_write_is_retried(db_path, monkeypatch):
+    # No busy wait inside SQLite, so the lock surfaces as SQLITE_BUSY
+    monkeypatch.setattr('database.BUSY_TIMEOUT_MS', 0)
+    monkeypatch.setattr('database.WRITE_RETRY_DELAY', 0.05)
+    monkeypatch.setattr('database.WRITE_ATTEMPTS', 8)
+    writer = ActivityWriter(db_path)
+    blocker = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        assert writer.flush(timeout=10)
+        blocker.execute("BEGIN IMMEDIATE")
+        future = writer.submit([("INSERT INTO generations (id, session_id, timestamp) VALUES (1, 's', 'x')", ())])
+        time.sleep(0.2)
+        assert not future.done()
+        blocker.execute("COMMIT")
+        assert future.result(timeout=10) is None
+        assert writer.failed_writes == 0
+    finally:
+        blocker.close()
+        writer.close()
@@ -0,0 +1,59 @@
+"""
+Tests for content-addressed blob storage
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+import database
+from database import DatabaseManager, compress_text, decompress_text
+
+
+def test_compression_round_trip_defaults_to_zlib():
+    text = "Photosynthesis " * 200 + "🌱"
+    codec, data = compress_text(text)
+    assert codec == 'zlib'
+    assert len(data) < len(text)
+    assert decompress_text(codec, data) == text
+
+
+def test_zstd_is_opt_in():
+    script = "import database; print(database.BLOB_CODEC)"
+    cwd = os.path.dirname(os.path.abspath(__file__))
+
+    def codec_with(value):
+        env = dict(os.environ, BLOB_CODEC=value)
+        return subprocess.run([sys.executable, "-c", script], cwd=cwd, env=env,
+                              capture_output=True, text=True, check=True).stdout.strip()
+
+    assert codec_with("") == 'zlib'
+    assert codec_with("brotli") == 'zlib'
+    assert codec_with("zstd") == ('zstd' if database.zstandard is not None else 'zlib')
+
+
+@pytest.mark.skipif(database.zstandard is not None, reason="zstandard is installed")
+def test_reading_zstd_without_zstandard_fails_clearly():
+    with pytest.raises(RuntimeError, match="zstandard"):
+        decompress_text('zstd', b"")
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    db = DatabaseManager(str(tmp_path / "activity.db"))
+    db.create_or_update_session('s1')
+    first = db.log_generation('s1', summary="Shared summary", quiz="Quiz A")
+    second = db.log_generation('s1', summary="Shared summary", quiz="Quiz B")
+    db.log_generation('s1', summary="", quiz="")
+
+    with db.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM blobs")
+        assert cursor.fetchone()[0] == 3
+        cursor.execute("SELECT summary_hash, quiz_hash FROM generations ORDER BY id")
+        (summary_a, quiz_a), (summary_b, quiz_b), empty = cursor.fetchall()
+    assert summary_a == summary_b == database.content_hash("Shared summary")
+    assert quiz_a != quiz_b
+    assert empty == (None, None)
+    assert db.get_generation_content(second) == {'summary': "Shared summary", 'quiz': "Quiz B"}
+    assert db.get_generation_content(first)['quiz'] == "Quiz A"
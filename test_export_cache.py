@@ -0,0 +1,52 @@
+"""
+Tests for the export payload cache
+"""
+
+import datetime
+
+import database
+import export_cache
+from export_cache import ExportCache, make_export_key
+
+
+def test_get_or_build_builds_once_and_evicts_least_recently_used():
+    cache = ExportCache(max_entries=2)
+    builds = []
+
+    def builder(payload):
+        def build():
+            builds.append(payload)
+            return payload
+        return build
+
+    assert cache.get_or_build('a', builder(b'A')) == b'A'
+    assert cache.get_or_build('a', builder(b'other')) == b'A'
+    cache.put('b', b'B')
+    cache.get('a')
+    cache.put('c', b'C')
+    assert builds == [b'A']
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c'), len(cache)) == (b'A', b'C', 2)
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_export_key():
+    key = make_export_key('pdf', "summary", "quiz", {"1": "a", "2": "b"})
+    assert key == make_export_key('pdf', "summary", "quiz", {"2": "b", "1": "a"})
+    assert key[1] == database.content_hash("summary")
+    assert key != make_export_key('txt', "summary", "quiz", {"1": "a", "2": "b"})
+    assert key != make_export_key('pdf', "summary", "quiz", {"1": "a", "2": "c"})
+    assert make_export_key('pdf', None, None) == make_export_key('pdf', "", "", {})
+
+
+def test_export_key_changes_with_the_date(monkeypatch):
+    today = make_export_key('pdf', "summary", "quiz")
+
+    class Tomorrow(datetime.date):
+        @classmethod
+        def today(cls):
+            return datetime.date.today() + datetime.timedelta(days=1)
+
+    monkeypatch.setattr(export_cache, 'date', Tomorrow)
+    assert make_export_key('pdf', "summary", "quiz") != today
@@ -0,0 +1,55 @@
+"""
+Tests for the session heartbeat debounce
+"""
+
+import sqlite3
+
+import pytest
+
+from database import DatabaseManager
+
+REJECT_SESSIONS = """
+    CREATE TRIGGER reject_sessions BEFORE INSERT ON sessions
+    BEGIN SELECT RAISE(ABORT, 'rejected'); END
+"""
+
+
+def test_heartbeats_are_debounced(tmp_path):
+    db = DatabaseManager(str(tmp_path / "activity.db"), heartbeat_interval=60)
+    assert db.create_or_update_session('s1', username='alice')
+    assert not db.create_or_update_session('s1')
+    assert not db.create_or_update_session('s1', username='alice')
+    # A changed detail is written right away
+    assert db.create_or_update_session('s1', username='bob')
+    assert db.get_session_info('s1')['username'] == 'bob'
+
+    db.heartbeat_interval = 0
+    assert db.create_or_update_session('s1')
+
+
+def test_failed_heartbeat_is_retried(tmp_path):
+    db = DatabaseManager(str(tmp_path / "activity.db"), heartbeat_interval=60)
+    with db.transaction() as cursor:
+        cursor.execute(REJECT_SESSIONS)
+    with pytest.raises(sqlite3.IntegrityError):
+        db.create_or_update_session('s1')
+
+    with db.transaction() as cursor:
+        cursor.execute("DROP TRIGGER reject_sessions")
+    assert db.create_or_update_session('s1')
+    assert db.get_session_info('s1') is not None
+
+
+def test_failed_write_behind_heartbeat_is_retried(tmp_path):
+    db = DatabaseManager(str(tmp_path / "activity.db"), write_behind=True, heartbeat_interval=60)
+    with db.transaction() as cursor:
+        cursor.execute(REJECT_SESSIONS)
+    assert db.create_or_update_session('s1')
+    db.flush()
+
+    with db.transaction() as cursor:
+        cursor.execute("DROP TRIGGER reject_sessions")
+    assert db.create_or_update_session('s1')
+    db.flush()
+    assert db.get_session_info('s1') is not None
+    assert not db.create_or_update_session('s1')
@@ -0,0 +1,81 @@
+"""
+Tests for the vectorized item statistics
+"""
+
+import numpy as np
+
+from item_analysis import OPTIONS, AnswerArrays, analyze_items
+
+
+def random_answers(seed: int = 7) -> AnswerArrays:
+    """Quizzes of different lengths, each taken by several students, some questions unanswered"""
+    rng = np.random.default_rng(seed)
+    columns = {name: [] for name in ('result_id', 'generation_id', 'question_id', 'chosen', 'correct')}
+    result_id = 0
+    for generation_id in (3, 10, 42):
+        n_questions = int(rng.integers(4, 9))
+        keys = rng.integers(0, len(OPTIONS), n_questions)
+        for _ in range(int(rng.integers(20, 40))):
+            result_id += 1
+            skill = rng.random()
+            for question_id in range(1, n_questions + 1):
+                key = keys[question_id - 1]
+                if rng.random() < 0.05:
+                    chosen = -1
+                elif rng.random() < skill:
+                    chosen = key
+                else:
+                    chosen = rng.integers(0, len(OPTIONS))
+                for name, value in zip(columns, (result_id, generation_id, question_id, chosen, key)):
+                    columns[name].append(value)
+    chosen = np.array(columns['chosen'], dtype=np.int8)
+    correct = np.array(columns['correct'], dtype=np.int8)
+    return AnswerArrays(
+        result_id=np.array(columns['result_id'], dtype=np.int64),
+        generation_id=np.array(columns['generation_id'], dtype=np.int64),
+        question_id=np.array(columns['question_id'], dtype=np.int64),
+        chosen=chosen,
+        correct=correct,
+        is_correct=(chosen == correct).astype(np.int8)
+    )
+
+
+def naive_item_stats(answers: AnswerArrays, generation_id: int, question_id: int):
+    """Difficulty, item-rest correlation and option rates of one question, one attempt at a time"""
+    item = (answers.generation_id == generation_id) & (answers.question_id == question_id)
+    x, rest = [], []
+    for index in np.flatnonzero(item):
+        result = answers.result_id == answers.result_id[index]
+        x.append(answers.is_correct[index])
+        rest.append(answers.is_correct[result].sum() - answers.is_correct[index])
+    x = np.array(x, dtype=np.float64)
+    rest = np.array(rest, dtype=np.float64)
+    if x.std() == 0 or rest.std() == 0:
+        discrimination = np.nan
+    else:
+        discrimination = np.corrcoef(x, rest)[0, 1]
+    rates = [np.mean(answers.chosen[item] == option) for option in range(len(OPTIONS))]
+    return len(x), x.mean(), discrimination, rates
+
+
+def test_analyze_items_matches_per_item_computation():
+    answers = random_answers()
+    stats = analyze_items(answers)
+
+    pairs = set(zip(answers.generation_id.tolist(), answers.question_id.tolist()))
+    assert len(stats['question_id']) == len(pairs)
+    for i, (generation_id, question_id) in enumerate(zip(stats['generation_id'], stats['question_id'])):
+        attempts, p_value, discrimination, rates = naive_item_stats(answers, generation_id, question_id)
+        assert stats['attempts'][i] == attempts
+        np.testing.assert_allclose(stats['p_value'][i], p_value)
+        np.testing.assert_allclose(stats['discrimination'][i], discrimination, atol=1e-9)
+        np.testing.assert_allclose(stats['option_rates'][i], rates)
+
+
+def test_analyze_items_min_attempts_and_empty_input():
+    answers = random_answers()
+    assert len(analyze_items(answers, min_attempts=10 ** 6)['question_id']) == 0
+
+    empty = AnswerArrays(*(np.empty(0, dtype=np.int64) for _ in range(6)))
+    stats = analyze_items(empty)
+    assert all(len(values) == 0 for values in stats.values())
@@ -0,0 +1,88 @@
+"""
+Tests for the live activity feed cursor
+"""
+
+import time
+
+import pytest
+
+from database import LIVE_FEED_LAG_SECONDS, DatabaseManager
+from sharding import open_database
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / "activity.db"))
+    db.create_or_update_session('s1', username='alice')
+    return db
+
+
+def insert_generation(db, generation_id, epoch):
+    with db.transaction() as cursor:
+        cursor.execute("""
+            INSERT INTO generations (id, session_id, timestamp, timestamp_epoch, input_method)
+            VALUES (?, 's1', datetime(?, 'unixepoch'), ?, 'text')
+        """, (generation_id, epoch, epoch))
+
+
+def poll(db, cursor):
+    items, cursor = db.get_activity_after(cursor, limit=10)
+    return [item['id'] for item in items if item['type'] == 'generation'], cursor
+
+
+def test_rows_committed_out_of_id_order_are_not_skipped(db):
+    now = int(time.time())
+    ids, cursor = poll(db, None)
+    assert ids == []
+
+    insert_generation(db, 105, now)
+    ids, cursor = poll(db, cursor)
+    assert ids == [105]
+
+    # Id reserved earlier by another writer, committed later
+    insert_generation(db, 101, now)
+    ids, cursor = poll(db, cursor)
+    assert ids == [101]
+
+    ids, cursor = poll(db, cursor)
+    assert ids == []
+
+
+def test_watermark_settles_rows_past_the_lag_window(db):
+    old = int(time.time()) - LIVE_FEED_LAG_SECONDS - 100
+    for generation_id in range(1, 6):
+        insert_generation(db, generation_id, old + generation_id)
+    ids, cursor = poll(db, None)
+    assert ids == [1, 2, 3, 4, 5]
+    assert cursor['generations']['seen'] == []
+    assert (cursor['generations']['epoch'], cursor['generations']['id']) == (old + 5, 5)
+
+    insert_generation(db, 7, int(time.time()))
+    ids, cursor = poll(db, cursor)
+    assert ids == [7]
+    assert cursor['generations']['seen'] == [7]
+
+
+def test_more_new_rows_than_the_limit(db):
+    now = int(time.time())
+    _, cursor = poll(db, None)
+    for generation_id in range(1, 26):
+        insert_generation(db, generation_id, now)
+
+    returned = []
+    for _ in range(4):
+        ids, cursor = poll(db, cursor)
+        returned.extend(ids)
+    assert returned == list(range(1, 26))
+
+
+def test_sharded_feed(tmp_path):
+    db = open_database(str(tmp_path / "activity.db"), 2)
+    _, cursor = db.get_activity_after(None)
+    for i in range(6):
+        db.create_or_update_session(f"session-{i}")
+        db.log_generation(f"session-{i}", summary="text")
+    items, cursor = db.get_activity_after(cursor)
+    assert len(items) == 6
+    items, cursor = db.get_activity_after(cursor)
+    assert items == []
@@ -0,0 +1,196 @@
+"""
+Tests for upgrading a database created before schema versioning
+"""
+
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+from database import DatabaseManager
+
+# The original (version 1) schema, with text stored inline
+BASELINE_SCHEMA = """
+    CREATE TABLE sessions (
+        session_id TEXT PRIMARY KEY,
+        username TEXT,
+        ip_address TEXT,
+        user_agent TEXT,
+        created_at TEXT NOT NULL,
+        last_activity TEXT NOT NULL
+    );
+    CREATE TABLE generations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id TEXT NOT NULL,
+        timestamp TEXT NOT NULL,
+        file_name TEXT,
+        file_size INTEGER,
+        content_length INTEGER,
+        input_method TEXT,
+        summary TEXT,
+        quiz TEXT,
+        model_used TEXT,
+        debug_mode INTEGER,
+        FOREIGN KEY (session_id) REFERENCES sessions(session_id)
+    );
+    CREATE TABLE quiz_results (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id TEXT NOT NULL,
+        generation_id INTEGER NOT NULL,
+        completed_at TEXT NOT NULL,
+        score INTEGER,
+        total_questions INTEGER,
+        percentage REAL,
+        answered_count INTEGER,
+        user_answers TEXT,
+        FOREIGN KEY (session_id) REFERENCES sessions(session_id),
+        FOREIGN KEY (generation_id) REFERENCES generations(id)
+    );
+"""
+
+QUIZ = """Question 1: What is photosynthesis?
+a) Respiration
+b) Making sugar from light
+c) Digestion
+d) Osmosis
+Answer: b) Making sugar from light
+
+Question 2: Where does it happen?
+a) Chloroplasts
+b) Nucleus
+c) Ribosomes
+d) Vacuoles
+Answer: a) Chloroplasts
+"""
+
+
+def create_baseline_database(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.execute("""
+        INSERT INTO sessions (session_id, username, created_at, last_activity)
+        VALUES ('s1', 'alice', '2024-03-01T10:00:00+00:00', '2024-03-01T11:00:00+00:00')
+    """)
+    conn.execute("""
+        INSERT INTO generations (session_id, timestamp, file_name, summary, quiz, model_used)
+        VALUES ('s1', '2024-03-01T10:30:00+00:00', 'biology.pdf',
+                'Photosynthesis turns sunlight into chemical energy', ?, 'gpt-4o')
+    """, (QUIZ,))
+    conn.execute("""
+        INSERT INTO quiz_results (session_id, generation_id, completed_at, score,
+                                  total_questions, percentage, answered_count, user_answers)
+        VALUES ('s1', 1, '2024-03-01T10:45:00+00:00', 1, 2, 50.0, 2, ?)
+    """, (json.dumps({"1": "b", "2": "c"}),))
+    conn.commit()
+    conn.close()
+
+
+def test_baseline_database_is_migrated_to_the_latest_version(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    create_baseline_database(path)
+
+    db = DatabaseManager(path)
+    latest = max(version for version, *_ in db._migrations())
+    assert db.get_schema_version() == latest
+    pending = [version for version, _, _ in db.get_pending_backfills()]
+    assert pending and pending == sorted(pending)
+
+    completed = db.run_backfills()
+    assert set(completed) == set(pending)
+    assert db.get_pending_backfills() == []
+
+    # Inline text moved into blobs
+    with db.cursor() as cursor:
+        cursor.execute("SELECT summary, quiz, summary_hash, quiz_hash FROM generations")
+        summary, quiz, summary_hash, quiz_hash = cursor.fetchone()
+    assert summary is None and quiz is None and summary_hash and quiz_hash
+    assert db.get_generation_content(1) == {
+        'summary': 'Photosynthesis turns sunlight into chemical energy', 'quiz': QUIZ
+    }
+
+    # Epoch columns, counters and statistics
+    with db.cursor() as cursor:
+        cursor.execute("SELECT created_at_epoch, last_activity_epoch FROM sessions")
+        assert cursor.fetchone() == (1709287200, 1709290800)
+        cursor.execute("SELECT completed_at_epoch FROM quiz_results")
+        assert cursor.fetchone() == (1709289900,)
+    info = db.get_session_info('s1')
+    assert (info['generation_count'], info['quiz_count']) == (1, 1)
+    stats = db.get_statistics()
+    assert (stats['total_sessions'], stats['total_generations'], stats['total_quiz_completions']) == (1, 1, 1)
+    assert stats['average_quiz_score'] == 50.0
+
+    # Per-question answers graded from the quiz text
+    with db.cursor() as cursor:
+        cursor.execute("SELECT question_id, chosen, correct_key, is_correct FROM quiz_answers ORDER BY question_id")
+        assert cursor.fetchall() == [(1, 'b', 'b', 1), (2, 'c', 'a', 0)]
+
+    if db.search_enabled:
+        results = db.search_generations("photosynthesis")
+        assert [result['id'] for result in results] == [1]
+        assert 'Photosynthesis' in results[0]['snippet']
+
+    # Opening the database again applies nothing
+    assert DatabaseManager(path).apply_migrations() == []
+
+
+def test_new_database_has_no_pending_backfills(tmp_path):
+    db = DatabaseManager(str(tmp_path / "new.db"))
+    assert db.get_pending_backfills() == []
+
+
+def test_schema_transaction_rolls_back_ddl(tmp_path):
+    db = DatabaseManager(str(tmp_path / "activity.db"))
+    with pytest.raises(RuntimeError):
+        with db.schema_transaction() as cursor:
+            cursor.execute("CREATE TABLE scratch (id INTEGER)")
+            cursor.execute("ALTER TABLE sessions ADD COLUMN scratch TEXT")
+            raise RuntimeError("interrupted")
+
+    with db.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'scratch'")
+        assert cursor.fetchone() is None
+        cursor.execute("PRAGMA table_info(sessions)")
+        assert 'scratch' not in {row[1] for row in cursor.fetchall()}
+
+
+def test_missing_search_index_is_recreated(tmp_path):
+    path = str(tmp_path / "activity.db")
+    db = DatabaseManager(path)
+    if not db.search_enabled:
+        pytest.skip("SQLite built without FTS5")
+    db.create_or_update_session('s1')
+    db.log_generation('s1', summary="Mitochondria are the powerhouse of the cell")
+    # As left by an interrupted migration 12 before its DDL was transactional
+    with db.transaction() as cursor:
+        cursor.execute("DELETE FROM schema_version WHERE version = 12")
+    with db.schema_transaction() as cursor:
+        cursor.execute("DROP TABLE generations_fts")
+
+    assert db.apply_migrations() == [12]
+    assert [version for version, _, _ in db.get_pending_backfills()] == [12]
+    db.run_backfills()
+    assert [result['id'] for result in db.search_generations("mitochondria")] == [1]
+
+
+def test_processes_migrating_one_file_at_once(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    create_baseline_database(path)
+    script = "import sys; from database import DatabaseManager; print(DatabaseManager(sys.argv[1]).get_schema_version())"
+    processes = [
+        subprocess.Popen([sys.executable, "-c", script, path], cwd=os.path.dirname(os.path.abspath(__file__)),
+                         stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        for _ in range(4)
+    ]
+    results = [process.communicate(timeout=60) for process in processes]
+    assert all(process.returncode == 0 for process in processes), [err for _, err in results]
+
+    db = DatabaseManager(path)
+    latest = max(version for version, *_ in db._migrations())
+    assert {int(out) for out, _ in results} == {latest}
+    with db.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM schema_version")
+        assert cursor.fetchone()[0] == latest
@@ -0,0 +1,61 @@
+"""
+Tests for the PDF renderer
+"""
+
+from reportlab.platypus import Paragraph
+
+from pdf_renderer import QUIZ_HEADING, build_flowables, convert_summary_markup, render_pdf
+from quiz_report import QuizReport
+
+SUMMARY = """## Photosynthesis
+Plants make **sugar** from light
+- Happens in chloroplasts
+"""
+
+QUIZ = """Question 1: What do plants make?
+a) Sugar
+b) Salt
+c) Iron
+d) Oil
+Answer: a) Sugar
+
+Question 2: Where?
+a) Roots
+b) Chloroplasts
+c) Soil
+d) Air
+Answer: b) Chloroplasts
+"""
+
+
+def paragraph_texts(flowables):
+    return [flowable.text for flowable in flowables if isinstance(flowable, Paragraph)]
+
+
+def test_convert_summary_markup():
+    assert convert_summary_markup(SUMMARY) == (
+        ('heading', 'Photosynthesis'),
+        ('body', '• Plants make <b>sugar</b> from light'),
+        ('body', '- Happens in chloroplasts'),
+    )
+
+
+def test_flowables_with_and_without_results():
+    plain = paragraph_texts(build_flowables(QuizReport.build(SUMMARY, QUIZ), QUIZ_HEADING, "2024-03-01 10:00"))
+    assert "Generated on: 2024-03-01 10:00" in plain
+    assert QUIZ_HEADING in plain
+    assert "✓ Answer: a) Sugar" in plain
+    assert not any("QUIZ RESULTS" in text for text in plain)
+
+    graded = paragraph_texts(build_flowables(QuizReport.build(SUMMARY, QUIZ, {1: 'a', 2: 'c'})))
+    assert "📊 QUIZ RESULTS" in graded
+    assert "<b>[YOUR ANSWER]</b> a) Sugar" in graded
+    assert "✅ CORRECT - Answer: a) Sugar" in graded
+    assert "❌ INCORRECT - Correct answer: b) Chloroplasts" in graded
+    assert any("50.0%" in text for text in graded)
+
+
+def test_render_pdf():
+    pdf = render_pdf(SUMMARY, QUIZ, {1: 'a'}, generated_on="2024-03-01 10:00")
+    assert pdf.startswith(b"%PDF-") and pdf.rstrip().endswith(b"%%EOF")
+    assert b"/Type /Page" in pdf
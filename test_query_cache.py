@@ -0,0 +1,79 @@
+"""
+Tests for the admin read query cache
+"""
+
+import sqlite3
+
+import pytest
+
+import database
+from database import DatabaseManager, cached_query
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / "activity.db"))
+    db.create_or_update_session('s1', username='alice')
+    return db
+
+
+def rename_outside_this_process(db, username):
+    """Write the way another process would, without bumping the write version"""
+    conn = sqlite3.connect(db.db_path)
+    conn.execute("UPDATE sessions SET username = ? WHERE session_id = 's1'", (username,))
+    conn.commit()
+    conn.close()
+
+
+def test_results_are_reused_until_a_write_is_committed(db):
+    assert db.get_session_info('s1')['username'] == 'alice'
+    rename_outside_this_process(db, 'bob')
+    assert db.get_session_info('s1')['username'] == 'alice'
+
+    # Any commit in this process invalidates the database file's results
+    db.create_or_update_session('s2')
+    assert db.get_session_info('s1')['username'] == 'bob'
+
+
+def test_write_behind_commits_invalidate(tmp_path):
+    db = DatabaseManager(str(tmp_path / "activity.db"), write_behind=True)
+    db.create_or_update_session('s1')
+    db.flush()
+    assert db.get_session_info('s1')['generation_count'] == 0
+    db.log_generation('s1', summary="text")
+    db.flush()
+    assert db.get_session_info('s1')['generation_count'] == 1
+
+
+def test_ttl_bounds_staleness_from_other_processes(db, monkeypatch):
+    monkeypatch.setattr(database, 'QUERY_CACHE_TTL', 0)
+    db.get_session_info('s1')
+    rename_outside_this_process(db, 'bob')
+    assert db.get_session_info('s1')['username'] == 'bob'
+
+
+def test_cache_is_per_file_and_per_arguments(db, tmp_path):
+    other = DatabaseManager(str(tmp_path / "other.db"))
+    db.get_session_info('s1')
+    rename_outside_this_process(db, 'bob')
+    other.create_or_update_session('s1', username='carol')
+    assert db.get_session_info('s1')['username'] == 'alice'
+    assert other.get_session_info('s1')['username'] == 'carol'
+    assert db.get_session_info('missing') is None
+
+
+def test_unhashable_arguments_are_not_cached(db):
+    calls = []
+
+    class Reader:
+        db_path = db.db_path
+
+        @cached_query
+        def read(self, value):
+            calls.append(value)
+            return len(calls)
+
+    reader = Reader()
+    assert reader.read(('a',)) == reader.read(('a',)) == 1
+    assert reader.read(['a']) == 2
+    assert reader.read(['a']) == 3
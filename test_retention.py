@@ -0,0 +1,93 @@
+"""
+Tests for archiving inactive sessions
+"""
+
+import time
+
+import pytest
+
+from database import DatabaseManager
+from retention import archive_inactive_sessions, compact_database, purge_orphan_blobs
+
+QUIZ = """Question 1: Which gas do plants take in?
+a) Oxygen
+b) Carbon dioxide
+c) Helium
+d) Neon
+Answer: b) Carbon dioxide
+"""
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / "activity.db"))
+    for session_id in ('old1', 'old2', 'new'):
+        db.create_or_update_session(session_id)
+        generation_id = db.log_generation(session_id, summary="Shared chlorophyll summary",
+                                          quiz=QUIZ if session_id != 'new' else "")
+        db.log_quiz_result(session_id, generation_id, 1, 1, 1, {"1": "b"}, {1: "b"})
+    db.log_generation('old1', summary="Only in old1 about stomata")
+    old_epoch = int(time.time()) - 90 * 86400
+    with db.transaction() as cursor:
+        cursor.execute("UPDATE sessions SET last_activity_epoch = ? WHERE session_id LIKE 'old%'", (old_epoch,))
+    return db
+
+
+def counts(db):
+    with db.cursor() as cursor:
+        cursor.execute("""
+            SELECT (SELECT COUNT(*) FROM sessions), (SELECT COUNT(*) FROM generations),
+                   (SELECT COUNT(*) FROM quiz_results), (SELECT COUNT(*) FROM quiz_answers)
+        """)
+        return cursor.fetchone()
+
+
+def test_archive_moves_whole_sessions(db, tmp_path):
+    archive_path = str(tmp_path / "archive.db")
+    totals = archive_inactive_sessions(db, 30, archive_path=archive_path, batch_size=1)
+    assert (totals['sessions'], totals['generations'], totals['quiz_results']) == (2, 3, 2)
+    # The shared summary is still used by the remaining session
+    assert totals['blobs'] == 2
+
+    archive = DatabaseManager(archive_path)
+    assert counts(db) == (1, 1, 1, 1)
+    assert counts(archive) == (2, 3, 2, 2)
+    stats = archive.get_statistics()
+    assert (stats['total_sessions'], stats['total_generations'], stats['total_quiz_completions']) == (2, 3, 2)
+    assert db.get_statistics()['total_generations'] == 1
+
+    with archive.cursor() as cursor:
+        cursor.execute("SELECT id FROM generations WHERE session_id = 'old2'")
+        generation_id = cursor.fetchone()[0]
+    assert archive.get_generation_content(generation_id) == {'summary': "Shared chlorophyll summary", 'quiz': QUIZ}
+    if db.search_enabled:
+        assert db.search_generations("stomata") == []
+        assert [r['session_id'] for r in db.search_generations("chlorophyll")] == ['new']
+
+
+def test_interrupted_archive_is_not_counted_twice(db, tmp_path, monkeypatch):
+    archive_path = str(tmp_path / "archive.db")
+
+    def crash(cursor, generation_ids):
+        raise RuntimeError("killed between copy and delete")
+
+    monkeypatch.setattr(db, 'unindex_generations', crash)
+    with pytest.raises(RuntimeError):
+        archive_inactive_sessions(db, 30, archive_path=archive_path)
+    assert counts(db) == (3, 4, 3, 3)
+    monkeypatch.undo()
+
+    archive_inactive_sessions(db, 30, archive_path=archive_path)
+    archive = DatabaseManager(archive_path)
+    assert counts(archive) == (2, 3, 2, 2)
+    stats = archive.get_statistics()
+    assert (stats['total_sessions'], stats['total_generations'], stats['total_quiz_completions']) == (2, 3, 2)
+    assert stats['score_count'] == 2
+
+
+def test_purge_orphan_blobs_and_compact(db):
+    with db.transaction() as cursor:
+        cursor.execute("DELETE FROM generations WHERE session_id = 'old1'")
+    assert purge_orphan_blobs(db, batch_size=1) == 1
+    result = compact_database(db)
+    assert result['after']['freelist_count'] == 0
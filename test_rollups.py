@@ -0,0 +1,94 @@
+"""
+Tests for incremental activity rollups
+"""
+
+import time
+
+import pytest
+
+import rollups
+from database import DatabaseManager
+from rollups import get_activity_series, get_model_mix, update_rollups
+from sharding import open_database
+
+HOUR = 3600
+
+
+@pytest.fixture
+def db(tmp_path):
+    return DatabaseManager(str(tmp_path / "activity.db"))
+
+
+def insert_generation(db, generation_id, epoch, model='gpt-4o'):
+    with db.transaction() as cursor:
+        cursor.execute("""
+            INSERT INTO generations (id, session_id, timestamp, timestamp_epoch, model_used)
+            VALUES (?, 's', datetime(?, 'unixepoch'), ?, ?)
+        """, (generation_id, epoch, epoch, model))
+
+
+def insert_session(db, session_id, epoch):
+    with db.transaction() as cursor:
+        cursor.execute("""
+            INSERT INTO sessions (session_id, created_at, last_activity, created_at_epoch, last_activity_epoch)
+            VALUES (?, datetime(?, 'unixepoch'), datetime(?, 'unixepoch'), ?, ?)
+        """, (session_id, epoch, epoch, epoch, epoch))
+
+
+def total(db, column):
+    return sum(bucket[column] for bucket in get_activity_series(db, 'hour'))
+
+
+def test_rows_are_counted_once_in_hour_and_day_buckets(db):
+    base = (int(time.time()) - 10 * HOUR) // HOUR * HOUR
+    insert_generation(db, 1, base + 10)
+    insert_generation(db, 2, base + 20, model='claude')
+    insert_generation(db, 3, base + HOUR + 5)
+
+    assert update_rollups(db, batch_size=2)['generations'] == 3
+    assert update_rollups(db)['generations'] == 0
+    hours = {b['bucket_epoch']: b['generations'] for b in get_activity_series(db, 'hour')}
+    assert hours == {base: 2, base + HOUR: 1}
+    assert sum(b['generations'] for b in get_activity_series(db, 'day')) == 3
+    mix = {(m['bucket_epoch'], m['model']): m['generations'] for m in get_model_mix(db, 'hour')}
+    assert mix == {(base, 'gpt-4o'): 1, (base, 'claude'): 1, (base + HOUR, 'gpt-4o'): 1}
+
+
+def test_row_committed_late_with_a_lower_id_is_counted(db):
+    now = int(time.time())
+    insert_generation(db, 100, now - 500)
+    update_rollups(db)
+    # Id reserved before 100 by another writer, committed after the last run
+    insert_generation(db, 50, now - 400)
+    assert update_rollups(db)['generations'] == 1
+    assert total(db, 'generations') == 2
+
+
+def test_rows_inside_the_lag_window_wait_for_the_next_run(db, monkeypatch):
+    now = int(time.time())
+    insert_generation(db, 1, now)
+    assert update_rollups(db)['generations'] == 0
+    monkeypatch.setattr(rollups, 'ROLLUP_LAG_SECONDS', -10)
+    assert update_rollups(db)['generations'] == 1
+
+
+def test_reused_session_rowid_is_counted(db):
+    now = int(time.time())
+    insert_session(db, 'a', now - 900)
+    insert_session(db, 'b', now - 800)
+    update_rollups(db)
+    # Archiving deletes the newest session; its rowid is handed out again
+    with db.transaction() as cursor:
+        cursor.execute("DELETE FROM sessions WHERE session_id = 'b'")
+    insert_session(db, 'c', now - 700)
+    assert update_rollups(db)['sessions'] == 1
+    assert total(db, 'sessions') == 3
+
+
+def test_sharded_rollups_add_up(tmp_path):
+    db = open_database(str(tmp_path / "activity.db"), 2)
+    now = int(time.time())
+    for index, shard in enumerate(db.shards):
+        insert_generation(shard, (index << 40) + 1, now - 600)
+    assert update_rollups(db)['generations'] == 2
+    assert total(db, 'generations') == 2
@@ -0,0 +1,70 @@
+"""
+Tests for keyset paging of a session's generations and quiz results
+"""
+
+import pytest
+
+from database import DatabaseManager
+from sharding import open_database
+
+
+def insert_activity(db, session_id, generation_id, timestamp):
+    with db.transaction() as cursor:
+        cursor.execute("""
+            INSERT INTO generations (id, session_id, timestamp, file_name)
+            VALUES (?, ?, ?, ?)
+        """, (generation_id, session_id, timestamp, f"file{generation_id}.txt"))
+        cursor.execute("""
+            INSERT INTO quiz_results (id, session_id, generation_id, completed_at, score, total_questions, percentage)
+            VALUES (?, ?, ?, ?, 1, 2, 50.0)
+        """, (generation_id, session_id, generation_id, timestamp))
+
+
+def all_pages(fetch, limit):
+    rows, after, pages = [], None, 0
+    while True:
+        page, after = fetch(limit, after)
+        rows.extend(page)
+        pages += 1
+        if after is None:
+            return rows, pages
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / "activity.db"))
+    db.create_or_update_session('s1')
+    db.create_or_update_session('s2')
+    # Equal timestamps are ordered by id
+    timestamps = ['2024-03-01T10:00:00', '2024-03-01T10:00:00', '2024-03-01T11:00:00',
+                  '2024-03-02T09:00:00', '2024-03-02T09:00:00', '2024-03-03T08:00:00']
+    for generation_id, timestamp in enumerate(timestamps, 1):
+        insert_activity(db, 's1', generation_id, timestamp)
+    insert_activity(db, 's2', 99, '2024-03-02T09:00:00')
+    return db
+
+
+@pytest.mark.parametrize('limit, expected_pages', [(1, 6), (3, 2), (4, 2), (6, 1), (10, 1)])
+def test_generation_pages(db, limit, expected_pages):
+    rows, pages = all_pages(lambda n, after: db.get_session_generations_page('s1', n, after), limit)
+    assert [row['id'] for row in rows] == [6, 5, 4, 3, 2, 1]
+    assert pages == expected_pages
+    assert 'summary' not in rows[0]
+
+
+@pytest.mark.parametrize('limit', [1, 4, 10])
+def test_quiz_result_pages(db, limit):
+    rows, _ = all_pages(lambda n, after: db.get_session_quiz_results_page('s1', n, after), limit)
+    assert [row['id'] for row in rows] == [6, 5, 4, 3, 2, 1]
+    assert rows[0]['file_name'] == "file6.txt"
+
+
+def test_pages_of_a_session_spread_over_shards(tmp_path):
+    db = open_database(str(tmp_path / "activity.db"), 2)
+    # As after the shard count changed: older activity sits in the other shard
+    for generation_id in range(1, 8):
+        shard = db.shards[generation_id % 2]
+        insert_activity(shard, 's1', (generation_id % 2 << 40) + generation_id,
+                        f"2024-03-{generation_id:02d}T10:00:00")
+    rows, _ = all_pages(lambda n, after: db.get_session_generations_page('s1', n, after), 3)
+    assert [row['id'] & ((1 << 40) - 1) for row in rows] == [7, 6, 5, 4, 3, 2, 1]
@@ -0,0 +1,94 @@
+"""
+Tests for sharded storage
+"""
+
+import inspect
+
+from database import DatabaseManager
+from sharding import SHARD_ID_BITS, ShardedDatabaseManager, merge_keyset_pages, open_database, shard_index
+
+
+def test_shard_ids_stay_in_their_range(tmp_path):
+    db = open_database(str(tmp_path / "activity.db"), 3)
+    assert isinstance(db, ShardedDatabaseManager)
+
+    generation_ids = {}
+    for i in range(30):
+        session_id = f"session-{i}"
+        db.create_or_update_session(session_id)
+        generation_id = db.log_generation(session_id, summary=f"summary {i}", quiz="")
+        db.log_quiz_result(session_id, generation_id, 1, 2, 2, {"1": "a"})
+        generation_ids[generation_id] = shard_index(session_id, 3)
+    db.flush()
+
+    assert len(generation_ids) == 30
+    assert len(set(generation_ids.values())) == 3
+    for generation_id, index in generation_ids.items():
+        assert generation_id >> SHARD_ID_BITS == index
+    for index, shard in enumerate(db.shards):
+        with shard.cursor() as cursor:
+            cursor.execute("SELECT MIN(id), MAX(id) FROM quiz_results")
+            low, high = cursor.fetchone()
+        assert low >> SHARD_ID_BITS == high >> SHARD_ID_BITS == index
+
+    stats = db.get_statistics()
+    assert (stats['total_sessions'], stats['total_generations'], stats['total_quiz_completions']) == (30, 30, 30)
+    assert stats['average_quiz_score'] == 50.0
+
+
+def test_sessions_pages_cover_every_shard_once(tmp_path):
+    db = open_database(str(tmp_path / "activity.db"), 2)
+    for i in range(25):
+        db.create_or_update_session(f"session-{i}")
+    db.flush()
+
+    seen = []
+    after = None
+    while True:
+        rows, after = db.get_sessions_page_rows(limit=10, after=after)
+        seen.extend(row[0] for row in rows)
+        if after is None:
+            break
+    assert sorted(seen) == sorted(f"session-{i}" for i in range(25))
+
+
+def test_merge_keyset_pages():
+    key = lambda row: (row[1], row[0])
+    pages = [
+        ([("a", 9), ("b", 5), ("c", 1)], ("c", 1)),
+        ([("d", 8), ("e", 7)], None),
+        ([], None),
+    ]
+    rows, cursor = merge_keyset_pages(pages, 3, key)
+    assert rows == [("a", 9), ("d", 8), ("e", 7)]
+    assert cursor == (7, "e")
+
+    # Every shard exhausted and everything fits: no next page
+    rows, cursor = merge_keyset_pages([([("a", 2)], None), ([("b", 1)], None)], 3, key)
+    assert rows == [("a", 2), ("b", 1)] and cursor is None
+
+    # One shard has more rows even though the merged page isn't full
+    rows, cursor = merge_keyset_pages([([("a", 2)], (2, "a")), ([], None)], 3, key)
+    assert rows == [("a", 2)] and cursor == (2, "a")
+
+    assert merge_keyset_pages([([], None), ([], None)], 3, key) == ([], None)
+
+
+def test_sharded_methods_mirror_database_manager():
+    for name, method in vars(ShardedDatabaseManager).items():
+        if name.startswith('_') or not hasattr(DatabaseManager, name):
+            continue
+        sharded = inspect.signature(method).parameters
+        single = inspect.signature(getattr(DatabaseManager, name)).parameters
+        assert [(p.name, p.kind, p.default) for p in sharded.values()] == \
+               [(p.name, p.kind, p.default) for p in single.values()], name
+
+
+def test_positional_logging_calls(tmp_path):
+    db = open_database(str(tmp_path / "activity.db"), 2)
+    db.create_or_update_session("s1", "alice")
+    generation_id = db.log_generation("s1", "notes.txt", 10, 10, "file", "summary", "", "model")
+    db.log_quiz_result("s1", generation_id, 1, 1, 1, {"1": "a"}, {1: "a"})
+    db.flush()
+    assert db.get_session_info("s1")['quiz_count'] == 1
+    assert db.get_session_generations("s1")[0]['file_name'] == "notes.txt"